@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     secret_key: str = "nightingale_secret_change_in_production"
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 7
+    operator_api_token: Optional[str] = None  # bearer token for admin endpoints; unset disables them
     
     # Database settings
     database_url: str = "sqlite:///./nightingale.db"
@@ -40,16 +41,38 @@ class Settings(BaseSettings):
     phi_redaction_enabled: bool = True
     phi_confidence_threshold: float = 0.7
     phi_redaction_timeout: int = 5  # seconds
+    phi_redaction_workers: Optional[int] = None  # None = one per CPU, 0 = inline
+    phi_entity_backend: str = "rule"  # rule (offline stand-in) or spacy
+    phi_rule_pack_file: Optional[str] = None  # JSON rule packs, reloadable at runtime
     
     # Audio processing settings
     audio_chunk_duration: int = 30  # seconds
-    audio_sample_rate: int = 16000
+    audio_chunk_overlap: float = 2.0  # seconds shared by consecutive chunks
+    audio_vad_enabled: bool = True  # cut silence before ASR
+    audio_vad_padding: float = 0.2  # seconds kept around detected speech
+    audio_vad_min_silence: float = 0.6  # shorter pauses are not cut
+    stream_segment_seconds: float = 2.0  # live WebSocket audio is transcribed in pieces this long
+    stream_max_pending_segments: int = 8  # queued segments before socket reads pause
+    stream_partial_interval: float = 0.5  # seconds of new audio between interim results
+    stream_max_sessions: int = 256  # live sessions kept before the least recently used is evicted
+    stream_session_idle_timeout: float = 900.0  # seconds without audio before a live session is evicted
+    audio_sample_rate: int = 16000  # ASR input rate; WAV uploads are resampled to it
     audio_max_file_size: int = 50 * 1024 * 1024  # 50MB
+    masked_audio_dir: Optional[str] = None  # store PHI-masked recordings here
+    audio_mask_mode: str = "tone"  # tone or zero
+    transcription_cache_dir: Optional[str] = None  # reuse transcripts of re-uploaded audio
+    transcription_cache_ttl: float = 86400.0  # seconds
+    transcription_cache_max_mb: int = 512
+    transcription_cache_version: str = "1"  # bump to invalidate cached transcripts
     
     # Speech-to-text settings
     whisper_model: str = "base"  # base, small, medium, large
     whisper_language: str = "en"
     whisper_device: str = "cpu"  # cpu or cuda
+    asr_backend: str = "stub"  # stub (offline stand-in) or whisper
+    asr_workers: int = 1  # model worker processes, 0 = thread in the API process
+    asr_max_pending: int = 4  # queued jobs before callers wait
+    asr_queue_timeout: float = 30.0  # seconds to wait for a queue slot
     
     # LLM settings for summary generation
     openai_api_key: Optional[str] = None
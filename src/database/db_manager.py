@@ -5,17 +5,24 @@ Uses in-memory storage for development
 
 from typing import Dict, List, Optional, Any
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+
+
+class JobInProgress(Exception):
+    """Another attempt is already running this processing job"""
 
 
 class DatabaseManager:
     """Mock database manager using in-memory storage"""
     
-    def __init__(self):
+    def __init__(self, checkpoint_ttl_hours: float = 24.0):
         self.patients = {}
         self.consultations = {}
         self.summaries = {}
         self.sessions = {}
+        # Progress of unfinished processing jobs, for resuming retries
+        self.checkpoints = {}
+        self.checkpoint_ttl = timedelta(hours=checkpoint_ttl_hours)
         self.initialized = False
     
     async def initialize(self):
@@ -93,6 +100,86 @@ class DatabaseManager:
             self.sessions[session_id]["status"] = "completed"
             self.consultations[session_id]["status"] = "completed"
     
+    async def claim_processing_checkpoint(self, job_id: str) -> Dict:
+        """
+        Claim a processing job for this attempt, creating its checkpoint if new
+
+        A new checkpoint has no session_id until the caller records one.
+
+        Raises:
+            JobInProgress: If another attempt is still running the job
+        """
+        now = datetime.utcnow()
+        # Jobs never retried are dropped after the TTL
+        for stale in [key for key, checkpoint in self.checkpoints.items()
+                      if now - checkpoint["updated_at"] > self.checkpoint_ttl]:
+            del self.checkpoints[stale]
+
+        checkpoint = self.checkpoints.get(job_id)
+        if checkpoint is None:
+            checkpoint = {
+                "job_id": job_id,
+                "session_id": None,
+                "chunks": {},
+                "stages": {},
+                "claimed": False,
+                "created_at": now,
+                "updated_at": now
+            }
+            self.checkpoints[job_id] = checkpoint
+        if checkpoint["claimed"]:
+            raise JobInProgress(job_id)
+        checkpoint["claimed"] = True
+        checkpoint["updated_at"] = now
+        return checkpoint
+
+    async def release_processing_checkpoint(self, job_id: str):
+        """Give up the claim on a job after a failed attempt, keeping its progress for a retry"""
+        if job_id in self.checkpoints:
+            self.checkpoints[job_id]["claimed"] = False
+
+    async def store_checkpoint_session(self, job_id: str, session_id: str):
+        """Record the consultation session a newly claimed job writes to"""
+        if job_id in self.checkpoints:
+            self.checkpoints[job_id]["session_id"] = session_id
+            self.checkpoints[job_id]["updated_at"] = datetime.utcnow()
+
+    async def get_processing_checkpoint(self, job_id: str) -> Optional[Dict]:
+        """Checkpoint of an unfinished processing job (chunks and stages completed so far)"""
+        checkpoint = self.checkpoints.get(job_id)
+        if checkpoint and datetime.utcnow() - checkpoint["updated_at"] > self.checkpoint_ttl:
+            del self.checkpoints[job_id]
+            return None
+        return checkpoint
+
+    async def store_chunk_checkpoint(self, job_id: str, index: int, result: Any):
+        """Record a completed chunk transcription"""
+        if job_id in self.checkpoints:
+            self.checkpoints[job_id]["chunks"][index] = result
+            self.checkpoints[job_id]["updated_at"] = datetime.utcnow()
+
+    async def clear_chunk_checkpoints(self, job_id: str):
+        """Drop a job's window results (raw transcript) once they have been redacted"""
+        if job_id in self.checkpoints:
+            self.checkpoints[job_id]["chunks"].clear()
+            self.checkpoints[job_id]["updated_at"] = datetime.utcnow()
+
+    async def store_stage_checkpoint(self, job_id: str, stage: str, data: Any):
+        """
+        Record the output of a completed pipeline stage
+
+        Window results are dropped once a stage is stored: later stages
+        resume from the stage output instead.
+        """
+        if job_id in self.checkpoints:
+            self.checkpoints[job_id]["stages"][stage] = data
+            self.checkpoints[job_id]["chunks"].clear()
+            self.checkpoints[job_id]["updated_at"] = datetime.utcnow()
+
+    async def clear_processing_checkpoint(self, job_id: str):
+        """Drop a checkpoint once its job has completed"""
+        self.checkpoints.pop(job_id, None)
+
     async def get_consultation_data(self, session_id: str) -> Optional[Dict]:
         """Retrieve consultation data"""
         return self.consultations.get(session_id)
@@ -6,21 +6,33 @@ pre-care, during-care, and post-care stages with security and provenance.
 """
 
 import asyncio
+import hmac
+import json
 import logging
 from datetime import datetime
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Optional
 
 from auth.consent_manager import ConsentManager
 from redaction.phi_redactor import PHIRedactor  
-from transcription.audio_processor import AudioProcessor
+from redaction.rule_pack import RULE_PACKS
+from redaction.streaming_redactor import StreamingRedactor
+from transcription.asr_backend import ASRBusy
+from transcription.audio_processor import AudioProcessor, TranscriptionResult, WindowCheckpoint
+from transcription.audio_ingest import UploadTooLarge, spool_upload
+from transcription.audio_masker import AudioMasker, spans_to_time_ranges
+from transcription.audio_normalizer import AudioNormalizer
+from transcription.segment_table import SegmentTable
+from transcription.session_registry import SESSION_FINALIZED, StreamingSession
+from transcription.transcription_cache import TranscriptionCache
+from transcription.vad import VoiceActivityDetector
 from provenance.provenance_engine import ProvenanceEngine
 from summarization.summary_generator import SummaryGenerator
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, JobInProgress
 from config.settings import Settings
 
 # Pydantic models for request/response
@@ -32,12 +44,85 @@ class AuthenticationRequest(BaseModel):
 settings = Settings()
 security = HTTPBearer()
 consent_manager = ConsentManager()
-phi_redactor = PHIRedactor()
-audio_processor = AudioProcessor()
+phi_redactor = PHIRedactor(
+    max_workers=settings.phi_redaction_workers,
+    entity_backend=settings.phi_entity_backend,
+    timeout=settings.phi_redaction_timeout
+)
+audio_processor = AudioProcessor(
+    backend=settings.asr_backend,
+    model=settings.whisper_model,
+    device=settings.whisper_device,
+    language=settings.whisper_language,
+    max_workers=settings.asr_workers,
+    max_pending=settings.asr_max_pending,
+    queue_timeout=settings.asr_queue_timeout,
+    chunk_duration=settings.audio_chunk_size,
+    chunk_overlap=settings.audio_chunk_overlap,
+    stream_segment_seconds=settings.stream_segment_seconds,
+    max_sessions=settings.stream_max_sessions,
+    session_idle_timeout=settings.stream_session_idle_timeout,
+    cache=TranscriptionCache(
+        settings.transcription_cache_dir,
+        settings.secret_key,
+        ttl=settings.transcription_cache_ttl,
+        max_bytes=settings.transcription_cache_max_mb * 1024 * 1024,
+        version=settings.transcription_cache_version
+    ) if settings.transcription_cache_dir else None,
+    normalizer=AudioNormalizer(settings.audio_sample_rate),
+    vad=VoiceActivityDetector(
+        padding=settings.audio_vad_padding,
+        min_silence=settings.audio_vad_min_silence
+    ) if settings.audio_vad_enabled else None
+)
+audio_masker = AudioMasker(mode=settings.audio_mask_mode)
 provenance_engine = ProvenanceEngine()
 summary_generator = SummaryGenerator()
 db_manager = DatabaseManager()
 
+
+def streaming_redactor(session: StreamingSession) -> StreamingRedactor:
+    """Per-session streaming redactor, attached to (and evicted with) the recording session"""
+    return session.attachments.setdefault("redactor", StreamingRedactor(phi_redactor))
+
+
+# Flushes of sessions that ended without a final chunk, kept until they finish
+_closing_flushes = set()
+
+# Interim transcriptions still running when their stream closed, kept until they finish
+_finishing_partials = set()
+
+# Subprotocol a browser offers, followed by its token, to authenticate a stream
+STREAM_AUTH_SUBPROTOCOL = "nightingale.bearer"
+
+
+def flush_closed_session(session: StreamingSession):
+    """Store the transcript a session still held back when it was aborted or evicted"""
+    streaming = session.attachments.get("redactor")
+    if streaming is None or session.status == SESSION_FINALIZED:
+        # A finalized session is flushed by whoever finalized it
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(_store_flushed(session.session_id, streaming))
+    except RuntimeError:
+        logger.warning(f"No event loop to flush held transcript of session {session.session_id}")
+        return
+    _closing_flushes.add(task)
+    task.add_done_callback(_closing_flushes.discard)
+
+
+async def _store_flushed(session_id: str, streaming: StreamingRedactor):
+    try:
+        redacted, timestamps = await streaming.flush_async()
+        if redacted.strip():
+            provenance_chunk = await provenance_engine.map_provenance(redacted, timestamps, session_id)
+            await db_manager.store_transcription_chunk(session_id, provenance_chunk)
+    except Exception as e:
+        logger.error(f"Failed to flush held transcript of session {session_id}: {e}")
+
+
+audio_processor.sessions.on_close = flush_closed_session
+
 """
 Logging configuration
 - Default to project_root/app_logs/nightingale.log (app_logs is sibling of src)
@@ -84,9 +169,15 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Nightingale VoiceAI...")
     await db_manager.initialize()
+    if settings.phi_rule_pack_file:
+        RULE_PACKS.load_file(settings.phi_rule_pack_file)
+    await phi_redactor.warm_up()
+    await audio_processor.warm_up()
     yield
     # Shutdown
     logger.info("Shutting down Nightingale VoiceAI...")
+    phi_redactor.close()
+    audio_processor.shutdown()
     await db_manager.close()
 
 
@@ -123,6 +214,38 @@ async def verify_auth_and_consent(credentials: HTTPAuthorizationCredentials = De
         raise HTTPException(status_code=401, detail="Invalid authentication or consent")
 
 
+async def verify_operator(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Admin endpoints take the configured operator token; patient tokens are refused"""
+    expected = settings.operator_api_token
+    if not expected or not hmac.compare_digest(credentials.credentials.encode(), expected.encode()):
+        logger.warning("Admin endpoint called without the operator credential")
+        raise HTTPException(status_code=403, detail="Operator credential required")
+
+
+def store_masked_audio(session_id: str, audio: BinaryIO, transcription, redaction_result) -> Optional[str]:
+    """Write the recording with redacted spans masked; never store unmasked audio"""
+    if redaction_result.offset_map is None:
+        logger.warning(f"Redaction failed, not storing audio for session: {session_id}")
+        return None
+    
+    char_spans = [(start, end) for start, end, _, _ in redaction_result.offset_map.spans]
+    time_ranges = spans_to_time_ranges(transcription.text, transcription.timestamps, char_spans)
+    
+    os.makedirs(settings.masked_audio_dir, exist_ok=True)
+    path = os.path.join(settings.masked_audio_dir, f"{session_id}.wav")
+    try:
+        with open(path, 'wb') as destination:
+            stats = audio_masker.mask_wav(audio, destination, time_ranges)
+    except ValueError as e:
+        os.remove(path)
+        logger.warning(f"Audio not stored for session {session_id}: {e}")
+        return None
+    
+    logger.info(f"Stored masked audio for session {session_id}: "
+                f"{stats['masked_seconds']:.1f}s masked in {stats['masked_ranges']} ranges")
+    return path
+
+
 # Root and basic endpoints
 @app.get("/")
 async def root():
@@ -220,6 +343,9 @@ async def capture_patient_concerns(
             "dossier": dossier
         }
         
+    except ASRBusy as e:
+        logger.error(f"Concern capture failed: {e}")
+        raise HTTPException(status_code=503, detail="Transcription service busy, retry shortly")
     except Exception as e:
         logger.error(f"Concern capture failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to process patient concerns")
@@ -239,7 +365,9 @@ async def start_consultation_recording(
         return {
             "status": "success",
             "recording_session": recording_session,
-            "chunk_interval": 30  # seconds
+            "chunk_interval": 30,  # seconds
+            "partial_interval": settings.stream_partial_interval,
+            "stream_endpoint": f"/api/v1/during-care/stream/{session_id}"
         }
         
     except Exception as e:
@@ -254,6 +382,8 @@ async def process_audio_file(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """During care: Process complete audio file"""
+    spooled_audio = None
+    claimed_job = None
     try:
         # Verify authentication token
         token = credentials.credentials
@@ -263,22 +393,74 @@ async def process_audio_file(
         if patient_info.patient_id != consent_manager._hash_patient_id(patient_id):
             raise HTTPException(status_code=403, detail="Patient ID mismatch")
         
-        # Read audio data
-        audio_data = await audio.read()
+        # Stream the upload into a spooled file, enforcing the size limit as it arrives
+        spooled_audio = await spool_upload(audio, settings.audio_max_file_size)
         
-        # Start consultation session
-        session_id = await db_manager.create_consultation_session(
-            patient_info.patient_id,
-            None,  # Will be updated with transcription
-            {}   # Will be updated with dossier
-        )
+        # A retry of the same upload resumes the earlier attempt's session and progress;
+        # the audio digest doubles as the transcription cache key
+        digest = await audio_processor.recording_digest(spooled_audio, settings.secret_key)
+        job_id = audio_processor.recording_key(digest, settings.secret_key, patient_info.patient_id)
+        checkpoint = await db_manager.claim_processing_checkpoint(job_id)
+        claimed_job = job_id
+        session_id = checkpoint["session_id"]
+        if session_id is not None:
+            logger.info(f"Resuming audio processing for session: {session_id}")
+        else:
+            # Start consultation session
+            session_id = await db_manager.create_consultation_session(
+                patient_info.patient_id,
+                None,  # Will be updated with transcription
+                {}   # Will be updated with dossier
+            )
+            await db_manager.store_checkpoint_session(job_id, session_id)
         
-        # Process audio to text
-        transcription = await audio_processor.transcribe_audio(audio_data)
-
-        # Redact PHI before processing (extract redacted text string)
-        redaction_result = await phi_redactor.redact_phi(transcription.text)
-        redacted_text = redaction_result.redacted_text
+        # Only redacted output is checkpointed; the raw transcript never is
+        redacted_stage = checkpoint["stages"].get("redaction")
+        if redacted_stage is None:
+            # Process audio to text, saving each finished window of a long recording
+            transcription = await audio_processor.transcribe_audio(
+                spooled_audio,
+                WindowCheckpoint(
+                    completed=dict(checkpoint["chunks"]),
+                    save=lambda index, result: db_manager.store_chunk_checkpoint(job_id, index, result)
+                ),
+                digest=digest
+            )
+            
+            # Redact PHI before processing (extract redacted text string)
+            redaction_result = await phi_redactor.redact_phi(transcription.text)
+            redacted_text = redaction_result.redacted_text
+            # The raw window transcripts are not kept past redaction
+            await db_manager.clear_chunk_checkpoints(job_id)
+            
+            # Mask the spoken PHI before the recording is kept
+            masked_audio_path = None
+            if settings.masked_audio_dir:
+                masked_audio_path = await asyncio.to_thread(
+                    store_masked_audio, session_id, spooled_audio.open(), transcription, redaction_result
+                )
+            
+            if redaction_result.offset_map is not None:
+                # A failed-closed redaction is not checkpointed; its rejected text is returned as is
+                await db_manager.store_stage_checkpoint(job_id, "redaction", {
+                    "redacted_text": redacted_text,
+                    "confidence": transcription.confidence,
+                    "segment_times": [(s["start_time"], s["end_time"]) for s in transcription.timestamps],
+                    "metadata": transcription.metadata,
+                    "masked_audio_path": masked_audio_path
+                })
+        else:
+            # A resumed job only has the redacted transcript
+            redacted_text = redacted_stage["redacted_text"]
+            masked_audio_path = redacted_stage["masked_audio_path"]
+            transcription = TranscriptionResult(
+                text=redacted_text,
+                confidence=redacted_stage["confidence"],
+                timestamps=SegmentTable.from_segments(
+                    {"start_time": start, "end_time": end} for start, end in redacted_stage["segment_times"]
+                ),
+                metadata=redacted_stage["metadata"]
+            )
         
         # Add provenance mapping
         provenance_data = await provenance_engine.map_provenance(
@@ -303,10 +485,12 @@ async def process_audio_file(
             "redacted_text": redacted_text,
             "provenance": provenance_data,
             "clinician_summary": clinician_summary,
-            "patient_summary": patient_summary
+            "patient_summary": patient_summary,
+            "masked_audio_path": masked_audio_path
         }
         
         await db_manager.update_consultation_session(session_id, consultation_data)
+        await db_manager.clear_processing_checkpoint(job_id)
         
         logger.info(f"Audio processed successfully for session: {session_id}")
         return {
@@ -322,6 +506,15 @@ async def process_audio_file(
             }
         }
         
+    except UploadTooLarge as e:
+        logger.error(f"Audio processing failed: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except JobInProgress:
+        logger.warning("Audio processing already running for this upload")
+        raise HTTPException(status_code=409, detail="This recording is already being processed, retry shortly")
+    except ASRBusy as e:
+        logger.error(f"Audio processing failed: {e}")
+        raise HTTPException(status_code=503, detail="Transcription service busy, retry shortly")
     except ValueError as ve:
         # Handle authentication/authorization errors specifically
         if "expired" in str(ve).lower() or "invalid" in str(ve).lower():
@@ -333,6 +526,12 @@ async def process_audio_file(
     except Exception as e:
         logger.error(f"Audio processing failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to process audio file")
+    finally:
+        if claimed_job is not None:
+            # No-op once the job completed and its checkpoint was cleared
+            await db_manager.release_processing_checkpoint(claimed_job)
+        if spooled_audio is not None:
+            spooled_audio.close()
 
 
 @app.post("/api/v1/during-care/process-chunk")
@@ -350,14 +549,26 @@ async def process_audio_chunk(
             chunk_metadata
         )
         
-        # Redact PHI
-        redacted_chunk = await phi_redactor.redact_phi(chunk_transcription.text)
-        redacted_chunk_text = redacted_chunk.redacted_text
+        # Redact PHI incrementally so PHI split across chunks is still caught
+        # Held-back text keeps its own timestamps, released with it
+        streaming = streaming_redactor(await audio_processor.streaming_session(session_id))
+        redacted_chunk_text, timestamps = await streaming.feed_async(
+            chunk_transcription.text + " ", chunk_transcription.timestamps
+        )
+        if chunk_metadata.get("final"):
+            flushed_text, flushed_timestamps = await streaming.flush_async()
+            redacted_chunk_text += flushed_text
+            timestamps += flushed_timestamps
+            audio_processor.finish_streaming_session(session_id)
+        
+        # Nothing finalized yet: the chunk's text is still held back
+        if not redacted_chunk_text.strip():
+            return {"status": "success", "chunk_id": None, "transcription": ""}
         
         # Add provenance mapping
         provenance_chunk = await provenance_engine.map_provenance(
             redacted_chunk_text,
-            chunk_transcription.timestamps,
+            timestamps,
             session_id
         )
         
@@ -370,11 +581,191 @@ async def process_audio_chunk(
             "transcription": provenance_chunk.text
         }
         
+    except ASRBusy as e:
+        logger.error(f"Chunk processing failed: {e}")
+        raise HTTPException(status_code=503, detail="Transcription service busy, retry shortly")
     except Exception as e:
         logger.error(f"Chunk processing failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to process audio chunk")
 
 
+@app.websocket("/api/v1/during-care/stream/{session_id}")
+async def stream_consultation_audio(
+    websocket: WebSocket,
+    session_id: str,
+    sample_rate: Optional[int] = None,
+    channels: int = 1
+):
+    """During care: Stream raw 16-bit PCM over one connection, receive redacted transcript as it finalizes
+
+    Authenticated once at connect: a Bearer Authorization header, or for
+    browsers (which cannot set headers on a WebSocket) the subprotocols
+    ["nightingale.bearer", <token>] in Sec-WebSocket-Protocol. The token is
+    never taken from the query string, where proxy and access logs would
+    record it. Binary messages carry audio; a text message {"type": "end"} finishes
+    the recording. The server sends:
+    - {"type": "partial", "is_final": false, ...} about every
+      stream_partial_interval seconds of audio. Its text is an unstable,
+      redacted hypothesis of everything not yet finalized. It replaces the
+      previous partial.
+    - {"type": "transcript", "is_final": true, ...} once per segment. Its
+      text is newly finalized redacted transcript, to append. Its pending
+      field is the redacted, not yet finalized tail, which replaces any
+      partial.
+    - {"type": "final", ...} when the stream is complete.
+    """
+    token, subprotocol = _stream_token(websocket)
+    try:
+        patient_info = await consent_manager.verify_token(token or "")
+        if not consent_manager.has_required_consent(patient_info):
+            raise ValueError("Insufficient consent permissions")
+    except Exception as e:
+        logger.error(f"Stream authentication/consent verification failed: {e}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept(subprotocol=subprotocol)
+    recording_session = await audio_processor.start_streaming_session(session_id, sample_rate, channels)
+    streaming = streaming_redactor(audio_processor.sessions.get(session_id))
+    # Bounded: a slow transcriber stops reads from the socket instead of buffering audio
+    segments: asyncio.Queue = asyncio.Queue(maxsize=settings.stream_max_pending_segments)
+    # Sequence of the last segment sent as final, and whether the stream is ending;
+    # older or late partials are dropped
+    progress: Dict[str, Any] = {"final_sequence": -1, "closed": False}
+    transcriber = asyncio.create_task(_transcribe_stream(websocket, session_id, segments, streaming, progress))
+    partial: Optional[asyncio.Task] = None
+    partial_time = 0.0
+    await websocket.send_json({"type": "ready", **recording_session})
+    logger.info(f"Started streaming for session: {session_id}")
+
+    try:
+        while not transcriber.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                for segment in audio_processor.feed_stream(session_id, message["bytes"]):
+                    await segments.put(segment)
+                # At most one interim transcription in flight; skipped, not queued, when busy
+                if (partial is None or partial.done()) and audio_processor.pool.has_idle_worker:
+                    pending = audio_processor.pending_segment(session_id)
+                    if pending is not None and pending.end_time - partial_time >= settings.stream_partial_interval:
+                        partial_time = pending.end_time
+                        partial = asyncio.create_task(
+                            _send_stream_partial(websocket, session_id, pending, streaming, progress)
+                        )
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                # An in-flight partial finishes on its own and is dropped, so its workers are kept
+                progress["closed"] = True
+                final_segment = audio_processor.finish_streaming_session(session_id)
+                if final_segment is not None:
+                    await segments.put(final_segment)
+                await segments.put(None)
+                await transcriber
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    except KeyError:
+        logger.warning(f"Streaming session ended or evicted: {session_id}")
+        await websocket.send_json({"type": "error", "detail": "Recording session expired"})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+    except ValueError as e:
+        logger.error(f"Stream rejected: {e}")
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+    except Exception as e:
+        logger.error(f"Stream processing failed: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        progress["closed"] = True
+        transcriber.cancel()
+        if partial is not None and not partial.done():
+            _finishing_partials.add(partial)
+            partial.add_done_callback(_finishing_partials.discard)
+        # No-op after a clean end (already finalized)
+        audio_processor.abort_streaming_session(session_id)
+
+
+def _stream_token(websocket: WebSocket):
+    """Bearer token of a stream connection and the subprotocol to accept it with"""
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:], None
+    subprotocols = websocket.scope.get("subprotocols") or []
+    if len(subprotocols) == 2 and subprotocols[0] == STREAM_AUTH_SUBPROTOCOL:
+        return subprotocols[1], STREAM_AUTH_SUBPROTOCOL
+    return None, None
+
+
+async def _transcribe_stream(websocket: WebSocket, session_id: str, segments: asyncio.Queue,
+                             streaming: StreamingRedactor, progress: Dict[str, Any]):
+    """Transcribe queued stream segments in order and push finalized redacted text"""
+    try:
+        while (segment := await segments.get()) is not None:
+            transcription = await audio_processor.transcribe_segment(segment, {"session_id": session_id})
+            redacted, timestamps = await streaming.feed_async(transcription.text + " ", transcription.timestamps)
+            pending = await streaming.preview_async()
+            progress["final_sequence"] = segment.sequence
+            await _send_stream_transcript(websocket, session_id, segment.sequence, redacted, pending, timestamps)
+
+        redacted, timestamps = await streaming.flush_async()
+        await _send_stream_transcript(websocket, session_id, progress["final_sequence"], redacted, "", timestamps)
+        await websocket.send_json({"type": "final", "session_id": session_id})
+    except ASRBusy as e:
+        logger.error(f"Stream transcription failed: {e}")
+        await websocket.send_json({"type": "error", "detail": "Transcription service busy, retry shortly"})
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except Exception as e:
+        logger.error(f"Stream transcription failed: {e}")
+        await websocket.send_json({"type": "error", "detail": "Failed to process audio stream"})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+
+
+async def _send_stream_transcript(websocket: WebSocket, session_id: str, sequence: int,
+                                  redacted_text: str, pending_text: str, timestamps: list):
+    """Store and push one piece of finalized redacted transcript, replacing any partial"""
+    message = {"type": "transcript", "is_final": True, "sequence": sequence,
+               "chunk_id": None, "text": "", "pending": pending_text}
+    if redacted_text.strip():
+        provenance_chunk = await provenance_engine.map_provenance(redacted_text, timestamps, session_id)
+        await db_manager.store_transcription_chunk(session_id, provenance_chunk)
+        message.update(
+            chunk_id=provenance_chunk.chunk_id,
+            text=provenance_chunk.text,
+            start_time=provenance_chunk.start_time,
+            end_time=provenance_chunk.end_time
+        )
+    await websocket.send_json(message)
+
+
+async def _send_stream_partial(websocket: WebSocket, session_id: str, segment,
+                               streaming: StreamingRedactor, progress: Dict[str, Any]):
+    """Transcribe the segment still accumulating and push it, redacted, as an unstable hypothesis"""
+    try:
+        transcription = await audio_processor.transcribe_segment(
+            segment, {"session_id": session_id, "is_final": False}
+        )
+        text = await streaming.preview_async(transcription.text)
+    except ASRBusy:
+        # Interim results are best effort; finals keep their place in the queue
+        return
+    except Exception as e:
+        logger.warning(f"Interim transcription failed: {e}")
+        return
+    if progress["closed"] or segment.sequence <= progress["final_sequence"]:
+        return
+    await websocket.send_json({
+        "type": "partial",
+        "is_final": False,
+        "stable": False,
+        "sequence": segment.sequence,
+        "text": text,
+        "start_time": segment.start_time,
+        "end_time": segment.end_time
+    })
+
+
 @app.post("/api/v1/during-care/generate-summaries")
 async def generate_consultation_summaries(
     session_id: str,
@@ -461,6 +852,29 @@ async def post_care_query(
         raise HTTPException(status_code=500, detail="Failed to process query")
 
 
+@app.post("/api/v1/admin/rule-packs/reload")
+async def reload_rule_packs(_: None = Depends(verify_operator)):
+    """Hot-swap PHI rule packs from the configured file without a restart"""
+    if not settings.phi_rule_pack_file:
+        raise HTTPException(status_code=400, detail="No rule pack file configured")
+    
+    try:
+        # Redactors pick up the new packs on their next call; worker pools are recycled
+        loaded = RULE_PACKS.load_file(settings.phi_rule_pack_file)
+        return {"status": "success", "rule_packs": loaded}
+    except Exception as e:
+        logger.error(f"Rule pack reload failed, keeping current packs: {e}")
+        raise HTTPException(status_code=500, detail="Failed to reload rule packs")
+
+
+@app.get("/api/v1/metrics/redaction")
+async def redaction_metrics(_: None = Depends(verify_operator)):
+    """Per-rule PHI redaction counters, aggregated across worker processes"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return phi_redactor.metrics_snapshot()
+
+
 @app.get("/api/v1/health")
 async def api_health():
     """System health check endpoint"""
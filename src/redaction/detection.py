@@ -0,0 +1,73 @@
+"""
+Compact PHI Detection Records
+
+A detection stores only its PHI type, offsets and method plus a reference
+to the source text while the redaction pipeline works on it; the matched
+substring is sliced on demand instead of being copied into every hit.
+Once a result is built its detections are detached: each keeps only its
+matched substring, so a result (or a pickled detection sent back from a
+pool worker) never holds the whole source. Dict-style access
+(detection['original']) is kept for existing callers.
+"""
+
+from typing import Any
+
+
+class PHIDetection:
+    """Single PHI hit within a source text"""
+
+    __slots__ = ('type', 'start_pos', 'end_pos', 'method', 'replacement', '_source', '_source_offset')
+
+    # Keys readable through the dict-style interface
+    FIELDS = ('type', 'original', 'replacement', 'start_pos', 'end_pos', 'method')
+
+    def __init__(self, phi_type: str, start_pos: int, end_pos: int,
+                 method: str, replacement: str, source: str, source_offset: int = 0):
+        """
+        Args:
+            source: Text the offsets point into, or a slice of it
+            source_offset: Position of source within the text the offsets refer to
+        """
+        self.type = phi_type
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+        self.method = method
+        self.replacement = replacement
+        self._source = source
+        self._source_offset = source_offset
+
+    @property
+    def original(self) -> str:
+        """Matched text, sliced from the source on access"""
+        return self._source[self.start_pos - self._source_offset:self.end_pos - self._source_offset]
+
+    def detach(self):
+        """Keep only the matched substring, dropping the reference to the source"""
+        self._source = self.original
+        self._source_offset = self.start_pos
+
+    def __reduce__(self):
+        # Ship only the matched substring, not the source it points into
+        return (PHIDetection, (self.type, self.start_pos, self.end_pos, self.method,
+                               self.replacement, self.original, self.start_pos))
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get() equivalent"""
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self) -> dict:
+        """Expand into the legacy per-hit dict"""
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def __repr__(self) -> str:
+        # Never include the PHI itself in reprs (they end up in logs)
+        return (f"PHIDetection(type={self.type!r}, start_pos={self.start_pos}, "
+                f"end_pos={self.end_pos}, method={self.method!r})")
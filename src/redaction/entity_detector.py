@@ -0,0 +1,108 @@
+"""
+Pluggable Entity Detection Backends
+
+Named-entity detectors used by PHIRedactor. Every backend works on batches
+so model overhead is paid once per batch (e.g. all chunks of a session),
+loads its model lazily and can be warmed up at startup. A deterministic
+rule-based backend ships as the offline stand-in for spaCy; it reports
+only ID-like numbers, the one label PHIRedactor's entity policy redacts
+from a regex hit, and leaves person names to the gazetteer stage.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Entity:
+    """Entity span found by a detector (label uses spaCy's scheme)"""
+    label: str
+    start: int
+    end: int
+
+
+class EntityDetector:
+    """Base interface for entity detection backends"""
+
+    name = "base"
+
+    def load(self):
+        """Load model resources (called lazily on first use)"""
+
+    def warm_up(self):
+        """Load the model and run one small batch so first requests are fast"""
+        self.load()
+        self.detect_batch(["Dr. Jane Smith saw the patient on March 3, 2024."])
+
+    def detect(self, text: str) -> List[Entity]:
+        """Detect entities in a single text"""
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts: List[str]) -> List[List[Entity]]:
+        """Detect entities in many texts, one entity list per input text"""
+        raise NotImplementedError
+
+
+class RuleEntityDetector(EntityDetector):
+    """Deterministic offline stand-in: ID-like numbers only (no PERSON entities)"""
+
+    name = "rule"
+
+    def __init__(self):
+        self.rules = [
+            ('CARDINAL', re.compile(r'\b[A-Z]{0,4}\d{6,12}\b'))
+        ]
+
+    def detect_batch(self, texts: List[str]) -> List[List[Entity]]:
+        results = []
+        for text in texts:
+            entities = []
+            for label, pattern in self.rules:
+                entities.extend(Entity(label, m.start(), m.end()) for m in pattern.finditer(text))
+            results.append(entities)
+        return results
+
+
+class SpacyEntityDetector(EntityDetector):
+    """spaCy NER backend with lazy loading and batched pipe() inference"""
+
+    name = "spacy"
+
+    # Only the NER component is needed for PHI detection
+    UNUSED_COMPONENTS = ['parser', 'tagger', 'lemmatizer', 'attribute_ruler', 'senter', 'morphologizer']
+
+    def __init__(self, model: str = "en_core_web_sm", batch_size: int = 32):
+        self.model = model
+        self.batch_size = batch_size
+        self.nlp = None
+
+    def load(self):
+        if self.nlp is None:
+            import spacy
+            self.nlp = spacy.load(self.model, disable=self.UNUSED_COMPONENTS)
+            logger.info(f"Loaded spaCy model {self.model} with pipes {self.nlp.pipe_names}")
+
+    def detect_batch(self, texts: List[str]) -> List[List[Entity]]:
+        self.load()
+        return [
+            [Entity(ent.label_, ent.start_char, ent.end_char) for ent in doc.ents]
+            for doc in self.nlp.pipe(texts, batch_size=self.batch_size)
+        ]
+
+
+ENTITY_BACKENDS = {
+    RuleEntityDetector.name: RuleEntityDetector,
+    SpacyEntityDetector.name: SpacyEntityDetector
+}
+
+
+def create_entity_detector(backend: Optional[str] = "rule", **options) -> EntityDetector:
+    """Instantiate an entity detection backend by name"""
+    try:
+        return ENTITY_BACKENDS[backend or "rule"](**options)
+    except KeyError:
+        raise ValueError(f"Unknown entity detection backend: {backend}")
@@ -0,0 +1,221 @@
+"""
+Gazetteer Dictionary Matcher
+
+Token-trie matcher over first/last-name lists and a medical-vocabulary
+allowlist. Text is tokenized once and every dictionary is matched in the
+same left-to-right pass, so per-text cost does not depend on how many
+entries are loaded. The default gazetteer is loaded once per process and
+only read afterwards, so forked redaction workers share it.
+"""
+
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Dictionary labels
+FIRST_NAME = 'first_name'
+LAST_NAME = 'last_name'
+MEDICAL_TERM = 'medical_term'
+
+# Honorifics and spoken titles that mark the following capitalized word as a name
+NAME_TITLES = frozenset({
+    'dr', 'mr', 'mrs', 'ms', 'miss', 'prof',
+    'doctor', 'nurse', 'professor', 'mister'
+})
+
+# Punctuation ending a sentence; the next word is capitalized regardless
+SENTENCE_END = frozenset('.!?')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+DICTIONARY_FILES = {
+    FIRST_NAME: 'first_names.txt',
+    LAST_NAME: 'last_names.txt',
+    MEDICAL_TERM: 'medical_terms.txt'
+}
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+(?:['-][A-Za-z]+)*")
+
+# Trie node key holding the labels of a phrase ending at that node
+# (tokens are never empty, so it cannot collide with a child)
+_LABELS = ''
+
+Token = Tuple[int, int, str]
+
+
+class Gazetteer:
+    """Token trie over dictionary phrases"""
+
+    def __init__(self):
+        self._root: Dict = {}
+        self.entries = 0
+
+    def add(self, phrase: str, label: str):
+        """Add a (possibly multi-word) phrase under a label"""
+        words = [token.lower() for token in TOKEN_PATTERN.findall(phrase)]
+        if not words:
+            return
+
+        node = self._root
+        for word in words:
+            node = node.setdefault(word, {})
+
+        if _LABELS not in node:
+            node[_LABELS] = frozenset({label})
+            self.entries += 1
+        else:
+            node[_LABELS] = node[_LABELS] | {label}
+
+    def load(self, path: str, label: str) -> int:
+        """Load one phrase per line (blank lines and # comments skipped)"""
+        count = 0
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    self.add(line, label)
+                    count += 1
+        return count
+
+    def tokenize(self, text: str) -> List[Token]:
+        """Split text into (start, end, lowercase word) tokens"""
+        return [(m.start(), m.end(), m.group().lower()) for m in TOKEN_PATTERN.finditer(text)]
+
+    def label_tokens(self, tokens: List[Token]) -> List[FrozenSet[str]]:
+        """Labels covering each token, using the longest phrase match at each position"""
+        labels: List[FrozenSet[str]] = [frozenset()] * len(tokens)
+        root = self._root
+
+        i = 0
+        while i < len(tokens):
+            node = root.get(tokens[i][2])
+            if node is None:
+                i += 1
+                continue
+
+            # Walk the trie as far as the following tokens allow
+            best_end, best_labels = i, None
+            j = i
+            while node is not None:
+                if _LABELS in node:
+                    best_end, best_labels = j + 1, node[_LABELS]
+                j += 1
+                node = node.get(tokens[j][2]) if j < len(tokens) else None
+
+            if best_labels is None:
+                i += 1
+                continue
+
+            for k in range(i, best_end):
+                labels[k] = best_labels
+            i = best_end
+
+        return labels
+
+    def is_allowlisted(self, text: str) -> bool:
+        """True if every word in the text is covered by the medical allowlist"""
+        tokens = self.tokenize(text)
+        if not tokens:
+            return False
+        return all(MEDICAL_TERM in labels for labels in self.label_tokens(tokens))
+
+    def find_names(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find person-name spans in one pass over the text
+
+        A name is a known first name followed by further known first/last
+        names, a title (Dr., Mrs., Doctor, ...) followed by a capitalized
+        word, or a lone capitalized first name that does not open a
+        sentence. Words on the medical allowlist never count as names.
+        """
+        return list(self._iter_names(text))
+
+    def has_name(self, text: str) -> bool:
+        """Stop at the first person name instead of collecting every span"""
+        # Every name starts at a title (of any case) or a capitalized first
+        # name; without one, skip the labelling pass (the common case for
+        # redacted text)
+        for match in TOKEN_PATTERN.finditer(text):
+            word = match.group()
+            lower = word.lower()
+            if lower in NAME_TITLES or (word[0].isupper()
+                                        and FIRST_NAME in self._root.get(lower, {}).get(_LABELS, ())):
+                return next(self._iter_names(text), None) is not None
+        return False
+
+    def _iter_names(self, text: str) -> Iterator[Tuple[int, int]]:
+        tokens = self.tokenize(text)
+        labels = self.label_tokens(tokens)
+
+        def name_like(k: int) -> bool:
+            return (text[tokens[k][0]].isupper()
+                    and MEDICAL_TERM not in labels[k]
+                    and (FIRST_NAME in labels[k] or LAST_NAME in labels[k]))
+
+        def adjacent(a: int, b: int) -> bool:
+            gap = text[tokens[a][1]:tokens[b][0]]
+            return len(gap) <= 3 and gap.strip(' .') == ''
+
+        def opens_sentence(k: int) -> bool:
+            # Only the true start of the text or sentence-ending punctuation
+            # opens a sentence; digits, symbols and redaction tags do not
+            before = text[tokens[k - 1][1] if k else 0:tokens[k][0]].strip()
+            return before[-1] in SENTENCE_END if before else k == 0
+
+        i = 0
+        while i < len(tokens):
+            end = None
+
+            if (tokens[i][2] in NAME_TITLES and i + 1 < len(tokens) and adjacent(i, i + 1)
+                    and text[tokens[i + 1][0]].isupper() and MEDICAL_TERM not in labels[i + 1]):
+                end = i + 1
+            elif name_like(i) and FIRST_NAME in labels[i]:
+                if i + 1 < len(tokens) and name_like(i + 1) and adjacent(i, i + 1):
+                    end = i + 1
+                elif not opens_sentence(i):
+                    # Capitalized mid-sentence, so a proper noun rather than a word
+                    end = i
+
+            if end is None:
+                i += 1
+                continue
+
+            # Absorb a middle/last name or two
+            while end + 1 < len(tokens) and end - i < 3 and name_like(end + 1) and adjacent(end, end + 1):
+                end += 1
+
+            yield tokens[i][0], tokens[end][1]
+            i = end + 1
+
+
+def build_gazetteer(*directories: Optional[str]) -> Gazetteer:
+    """Build a gazetteer from the dictionary files found in each directory"""
+    gazetteer = Gazetteer()
+    for directory in directories:
+        if not directory:
+            continue
+        for label, filename in DICTIONARY_FILES.items():
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                gazetteer.load(path, label)
+    return gazetteer
+
+
+@lru_cache(maxsize=1)
+def get_default_gazetteer() -> Gazetteer:
+    """
+    Process-wide gazetteer: bundled seed lists plus any larger lists in
+    NIGHTINGALE_GAZETTEER_DIR. Loaded once and shared read-only.
+
+    The seed lists hold a few hundred common names for tests and
+    development only; production deployments must set the directory.
+    """
+    extra_dir = os.environ.get('NIGHTINGALE_GAZETTEER_DIR')
+    if not extra_dir:
+        logger.warning("NIGHTINGALE_GAZETTEER_DIR is not set; matching names against the small seed lists only")
+    gazetteer = build_gazetteer(DATA_DIR, os.path.expanduser(extra_dir) if extra_dir else None)
+    logger.info(f"Gazetteer loaded with {gazetteer.entries} entries")
+    return gazetteer
@@ -0,0 +1,162 @@
+"""
+Redaction Instrumentation
+
+Per-rule hit counters, bytes scanned and match time, per-stage
+timings and a redact_phi latency histogram. Recording is a few dict and
+list updates per call; worker processes ship their counters back as
+deltas with each result and the parent merges them, so one snapshot
+covers every process.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Upper bounds (ms) of the redact_phi latency histogram; one overflow bucket follows
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Per-rule counter slots
+_HITS, _BYTES, _MATCH_SECONDS = range(3)
+
+
+class RedactionMetrics:
+    """Counters for one redactor (and, merged in, its workers)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters: Dict[str, int] = {'texts': 0, 'failures': 0, 'timeouts': 0, 'scans': 0}
+        self.rules: Dict[str, list] = {}
+        self.stages: Dict[str, list] = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+
+    def increment(self, counter: str, amount: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record_scan(self, nbytes: int, hits: Dict[str, int], timings: Dict[str, float]):
+        """
+        Count one scan (every rule's pattern run over the text)
+
+        Args:
+            nbytes: Length of the scanned text
+            hits: Matches kept per rule
+            timings: Seconds each rule's finditer took, as timed by the scan
+        """
+        rules = self.rules
+        for name, seconds in timings.items():
+            entry = rules.get(name)
+            if entry is None:
+                entry = rules[name] = [0, 0, 0.0]
+            entry[_BYTES] += nbytes
+            entry[_MATCH_SECONDS] += seconds
+        for name, count in hits.items():
+            rules[name][_HITS] += count
+        self.counters['scans'] += 1
+
+    def record_stage(self, stage: str, seconds: float, hits: int = 0):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += hits
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Time a block as one call of a pipeline stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start)
+
+    def observe_latency(self, seconds: float):
+        """Add one redact_phi call to the latency histogram"""
+        milliseconds = seconds * 1000
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.latency_sum_ms += milliseconds
+        self.latency_max_ms = max(self.latency_max_ms, milliseconds)
+
+    def to_dict(self) -> Dict:
+        """Raw counters in the form merge() accepts"""
+        return {
+            'counters': dict(self.counters),
+            'rules': {name: list(entry) for name, entry in self.rules.items()},
+            'stages': {name: list(entry) for name, entry in self.stages.items()},
+            'latency_buckets': list(self.latency_buckets),
+            'latency_sum_ms': self.latency_sum_ms,
+            'latency_max_ms': self.latency_max_ms
+        }
+
+    def take_delta(self) -> Dict:
+        """Counters accumulated since the last call (used by worker processes)"""
+        delta = self.to_dict()
+        self.reset()
+        return delta
+
+    def merge(self, delta: Optional[Dict]):
+        """Fold counters from another process into this one"""
+        if not delta:
+            return
+        for name, amount in delta['counters'].items():
+            self.increment(name, amount)
+        for table, source in ((self.rules, delta['rules']), (self.stages, delta['stages'])):
+            for name, values in source.items():
+                entry = table.setdefault(name, [0] * len(values))
+                for i, value in enumerate(values):
+                    entry[i] += value
+        for i, count in enumerate(delta['latency_buckets']):
+            self.latency_buckets[i] += count
+        self.latency_sum_ms += delta['latency_sum_ms']
+        self.latency_max_ms = max(self.latency_max_ms, delta['latency_max_ms'])
+
+    def snapshot(self) -> Dict:
+        """Readable metrics with derived rates and latency percentiles"""
+        rules = {}
+        for name, (hits, nbytes, match_seconds) in self.rules.items():
+            rules[name] = {
+                'hits': hits,
+                'bytes_scanned': nbytes,
+                'match_seconds': round(match_seconds, 6),
+                # Cost of this rule alone, from its own pass in every scan
+                'us_per_kb': round(match_seconds * 1e6 / (nbytes / 1024), 3) if nbytes else None
+            }
+
+        stages = {
+            name: {'calls': calls, 'seconds': round(seconds, 6), 'hits': hits}
+            for name, (calls, seconds, hits) in self.stages.items()
+        }
+
+        count = sum(self.latency_buckets)
+        bounds = [str(bound) for bound in LATENCY_BUCKETS_MS] + ['inf']
+        return {
+            **self.counters,
+            'rules': dict(sorted(rules.items(), key=lambda item: -item[1]['hits'])),
+            'stages': stages,
+            'latency_ms': {
+                'count': count,
+                'mean': round(self.latency_sum_ms / count, 3) if count else None,
+                'p50': self._latency_percentile(0.50),
+                'p95': self._latency_percentile(0.95),
+                'p99': self._latency_percentile(0.99),
+                'max': round(self.latency_max_ms, 3),
+                'buckets': dict(zip(bounds, self.latency_buckets))
+            }
+        }
+
+    def _latency_percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the q-quantile (max if it overflowed)"""
+        count = sum(self.latency_buckets)
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS, self.latency_buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return round(self.latency_max_ms, 3)
@@ -6,60 +6,117 @@ before data reaches LLM systems, ensuring HIPAA compliance.
 """
 
 import re
+import math
+import time
+import asyncio
 import logging
-from typing import List, Dict, Tuple
+from functools import partial
+from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 
+from .detection import PHIDetection
+from .entity_detector import Entity, SpacyEntityDetector, create_entity_detector
+from .gazetteer import get_default_gazetteer
+from .metrics import RedactionMetrics
+from .pattern_scanner import PatternScanner
+from .rule_pack import RulePack, get_rule_pack
+from .span_rewriter import OffsetMap, rewrite_spans
+from .streaming_redactor import redact_window
+from .worker_pool import RedactionWorkerPool
+
 logger = logging.getLogger(__name__)
 
 
 @dataclass
 class RedactionResult:
-    """Result of PHI redaction operation"""
-    original_text: str
+    """Result of PHI redaction operation (the input text is not kept)"""
     redacted_text: str
-    detected_phi: List[Dict[str, str]]
+    detected_phi: List[PHIDetection]
     confidence_score: float
+    offset_map: Optional[OffsetMap] = None
+
+    def __post_init__(self):
+        # Detections point into the input while it is redacted; keep only their substrings
+        for detection in self.detected_phi:
+            detection.detach()
 
 
 class PHIRedactor:
     """PHI detection and redaction system"""
     
-    def __init__(self):
-        # Simplified initialization without spaCy for MVP
-        self.nlp_available = False
-        self.nlp = None
-        logger.warning("spaCy not available, using regex-only PHI detection")
-            
-        # PHI patterns for regex matching
-        self.phi_patterns = {
-            'ssn': r'\b(?:\d{3}-?\d{2}-?\d{4})\b',
-            'phone': r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b',
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'date_birth': r'\b(?:0[1-9]|1[0-2])[/-](?:0[1-9]|[12]\d|3[01])[/-](?:19|20)\d{2}\b',
-            'mrn': r'\b(?:MRN|mrn|Medical Record Number)[\s:]*(\d{6,10})\b',
-            'address': r'\b\d+\s+[A-Za-z0-9\s,]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Place|Pl)\b'
-        }
-        
-        # Medical entities that may contain PHI
-        self.sensitive_entities = {
-            'PERSON', 'ORG', 'GPE', 'DATE', 'CARDINAL'
-        }
-        
-        # Replacement tokens for different PHI types
-        self.replacements = {
-            'ssn': '[SSN_REDACTED]',
-            'phone': '[PHONE_REDACTED]', 
-            'email': '[EMAIL_REDACTED]',
-            'date_birth': '[DOB_REDACTED]',
-            'mrn': '[MRN_REDACTED]',
-            'address': '[ADDRESS_REDACTED]',
-            'person_name': '[NAME_REDACTED]',
-            'organization': '[ORG_REDACTED]',
-            'location': '[LOCATION_REDACTED]',
-            'date': '[DATE_REDACTED]',
-            'number': '[NUMBER_REDACTED]'
-        }
+    # Entity labels that may contain PHI, and the PHI type each maps to
+    sensitive_entities = frozenset({'PERSON', 'ORG', 'GPE', 'DATE', 'CARDINAL'})
+    ENTITY_PHI_TYPES = {
+        'PERSON': 'person_name',
+        'ORG': 'organization',
+        'GPE': 'location',
+        'DATE': 'date',
+        'CARDINAL': 'number'
+    }
+    
+    # Registry name of the rule pack this profile follows
+    RULE_PACK = 'phi'
+    
+    def __init__(self, max_workers: Optional[int] = None, entity_backend: str = "rule",
+                 rule_pack: Optional[RulePack] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            max_workers: Size of the redaction process pool. None uses one
+                worker per CPU; 0 redacts inline on the calling thread.
+            entity_backend: Entity detector ("rule" offline stand-in or "spacy");
+                the model is loaded lazily on first use or warm_up()
+            rule_pack: Pin a specific rule pack; by default the current
+                registry pack is used, so swapped packs apply immediately
+            timeout: Deadline in seconds for pooled redaction; an overrunning
+                job fails closed and the worker running it is killed, while
+                other jobs continue. Inline redaction runs on the calling
+                thread and cannot be interrupted.
+        """
+        self.entity_backend = entity_backend
+        self.timeout = timeout
+        self.entity_detector = create_entity_detector(entity_backend)
+        self.nlp_available = isinstance(self.entity_detector, SpacyEntityDetector)
+        self._pinned_pack = rule_pack
+        
+        # Name lists and medical allowlist, loaded once per process
+        self.gazetteer = get_default_gazetteer()
+        
+        # Per-rule and per-call instrumentation (worker counters are merged in)
+        self.metrics = RedactionMetrics()
+        
+        # CPU-bound redaction runs in worker processes, off the event loop
+        self.pool = None
+        self._pool_pack = None
+        if max_workers != 0:
+            self._pool_pack = self.rule_pack
+            self.pool = RedactionWorkerPool(
+                self._worker_factory(self._pool_pack), max_workers, on_metrics=self.metrics.merge
+            )
+
+    @property
+    def rule_pack(self) -> RulePack:
+        """Compiled rules shared by every redactor in the process"""
+        return self._pinned_pack or get_rule_pack(self.RULE_PACK)
+
+    @property
+    def scanner(self) -> PatternScanner:
+        return self.rule_pack.scanner
+
+    @property
+    def replacements(self) -> Dict[str, str]:
+        return self.rule_pack.replacements
+
+    def _worker_factory(self, pack: RulePack):
+        """Picklable factory building an inline redactor pinned to a pack"""
+        return partial(PHIRedactor, max_workers=0, entity_backend=self.entity_backend, rule_pack=pack)
+
+    def _current_pool(self) -> RedactionWorkerPool:
+        """Worker pool for the current rule pack, recycled after a pack swap"""
+        pack = self.rule_pack
+        if pack is not self._pool_pack:
+            self.pool.recycle(self._worker_factory(pack))
+            self._pool_pack = pack
+        return self.pool
 
     async def redact_phi(self, text: str) -> RedactionResult:
         """
@@ -69,33 +126,103 @@ class PHIRedactor:
             text: Input text potentially containing PHI
             
         Returns:
-            RedactionResult with original, redacted text and detected PHI
+            RedactionResult with redacted text and detected PHI
         """
-        detected_phi = []
-        redacted_text = text
+        start = time.perf_counter()
+        try:
+            if self.pool is None:
+                return self.redact_text(text)
+            return await self._current_pool().submit(text, self.timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out([text])[0]
+        except Exception as e:
+            logger.error(f"PHI redaction worker failed: {e}")
+            return self._failed_result(text)
+        finally:
+            self.metrics.observe_latency(time.perf_counter() - start)
+
+    async def redact_batch(self, texts: List[str]) -> List[RedactionResult]:
+        """
+        Redact many texts across the worker pool
+        
+        Returns:
+            One RedactionResult per input text, in input order
+        """
+        if self.pool is None:
+            return self.redact_texts(list(texts))
+        
+        texts = list(texts)
+        # Each worker handles its share of the batch one text at a time
+        deadline = None
+        if self.timeout:
+            deadline = self.timeout * math.ceil(len(texts) / self.pool.max_workers)
         
         try:
-            # 1. Regex-based pattern detection
-            pattern_detections = self._detect_patterns(text)
-            detected_phi.extend(pattern_detections)
-            
-            # Apply pattern-based redactions
-            for detection in pattern_detections:
-                redacted_text = redacted_text.replace(
-                    detection['original'],
-                    detection['replacement']
-                )
+            return await self._current_pool().map(texts, deadline)
+        except asyncio.TimeoutError:
+            return self._timed_out(texts)
+        except Exception as e:
+            logger.error(f"PHI batch redaction failed: {e}")
+            return [self._failed_result(text) for text in texts]
+
+    async def redact_stream_window(self, original_context: str, redacted_context: str,
+                                   buffer: str, cut: Optional[int] = None) -> Tuple[int, str]:
+        """
+        One StreamingRedactor step, run like redact_phi: in the pool under the deadline
+        
+        Returns:
+            (characters finalized, their redacted text); on a missed deadline or
+            a failed worker the characters are finalized as rejected text
+        """
+        try:
+            if self.pool is None:
+                return await asyncio.to_thread(redact_window, self, original_context, redacted_context, buffer, cut)
+            return await self._current_pool().redact_window(
+                original_context, redacted_context, buffer, cut, self.timeout
+            )
+        except asyncio.TimeoutError:
+            result = self._timed_out([buffer])[0]
+        except Exception as e:
+            logger.error(f"Streaming PHI redaction failed: {e}")
+            result = self._failed_result(buffer)
+        return (len(buffer) if cut is None else cut), result.redacted_text
+
+    def redact_texts(self, texts: List[str]) -> List[RedactionResult]:
+        """Synchronous batch redaction with one batched entity-detection call"""
+        try:
+            entity_batches = self.entity_detector.detect_batch(texts)
+        except Exception as e:
+            logger.error(f"Batched entity detection failed: {e}")
+            return [self._failed_result(text) for text in texts]
+        
+        return [
+            self.redact_text(text, entities)
+            for text, entities in zip(texts, entity_batches)
+        ]
+
+    def redact_text(self, text: str, entities: Optional[List[Entity]] = None) -> RedactionResult:
+        """
+        Synchronous redaction core, run inline or inside a pool worker
+        
+        Args:
+            text: Input text potentially containing PHI
+            entities: Entities already found by a batched detector call
+        """
+        self.metrics.increment('texts')
+        try:
+            # 1-3. Regex patterns, dictionary names and NLP entities
+            detected_phi = self.detect_phi(text, entities)
             
-            # 2. NLP-based entity detection
-            entity_detections = self._detect_entities(redacted_text)
-            detected_phi.extend(entity_detections)
+            # Apply all redactions by offset in a single rewrite
+            with self.metrics.stage('rewrite'):
+                redacted_text, offset_map = rewrite_spans(text, detected_phi, self.rule_pack.priority)
             
-            # Apply entity-based redactions
-            for detection in entity_detections:
-                redacted_text = redacted_text.replace(
-                    detection['original'],
-                    detection['replacement']
-                )
+            # Post-condition: nothing detectable may survive redaction
+            with self.metrics.stage('verify'):
+                leaked = self.contains_phi(redacted_text)
+            if leaked:
+                logger.error("PHI remained after redaction, rejecting text")
+                return self._failed_result(text)
             
             # 3. Calculate confidence score
             confidence = self._calculate_confidence(detected_phi, text)
@@ -104,55 +231,95 @@ class PHIRedactor:
             self._audit_redaction(len(detected_phi), confidence)
             
             return RedactionResult(
-                original_text=text,
                 redacted_text=redacted_text,
                 detected_phi=detected_phi,
-                confidence_score=confidence
+                confidence_score=confidence,
+                offset_map=offset_map
             )
             
         except Exception as e:
             logger.error(f"PHI redaction failed: {e}")
-            # Fail safe: if redaction fails, reject the text entirely
-            return RedactionResult(
-                original_text=text,
-                redacted_text="[TEXT_REDACTION_FAILED]",
-                detected_phi=[],
-                confidence_score=0.0
-            )
+            return self._failed_result(text)
 
-    def _detect_patterns(self, text: str) -> List[Dict[str, str]]:
-        """Detect PHI using regex patterns"""
-        detections = []
+    def _timed_out(self, texts: List[str]) -> List[RedactionResult]:
+        """Fail closed on a missed deadline (the pool has killed the stuck worker)"""
+        logger.error(f"PHI redaction exceeded its {self.timeout}s deadline, rejecting text")
+        self.metrics.increment('timeouts', len(texts))
+        return [self._failed_result(text) for text in texts]
+
+    def _failed_result(self, text: str) -> RedactionResult:
+        """Fail safe: if redaction fails, reject the text entirely"""
+        self.metrics.increment('failures')
+        return RedactionResult(
+            redacted_text="[TEXT_REDACTION_FAILED]",
+            detected_phi=[],
+            confidence_score=0.0
+        )
+
+    def detect_phi(self, text: str, entities: Optional[List[Entity]] = None) -> List[PHIDetection]:
+        """Run all detectors over the text without redacting it"""
+        metrics = self.metrics
         
-        for phi_type, pattern in self.phi_patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                detections.append({
-                    'type': phi_type,
-                    'original': match.group(),
-                    'replacement': self.replacements.get(phi_type, '[PHI_REDACTED]'),
-                    'start_pos': match.start(),
-                    'end_pos': match.end(),
-                    'method': 'regex'
-                })
+        # 1. Regex-based pattern detection
+        start = time.perf_counter()
+        patterns = self._detect_patterns(text)
         
-        return detections
+        # 2. Dictionary-based name detection
+        patterns_done = time.perf_counter()
+        names = self._detect_names(text)
+        
+        # 3. NLP-based entity detection
+        names_done = time.perf_counter()
+        nlp_entities = self._detect_entities(text, entities)
+        
+        metrics.record_stage('patterns', patterns_done - start, len(patterns))
+        metrics.record_stage('names', names_done - patterns_done, len(names))
+        metrics.record_stage('entities', time.perf_counter() - names_done, len(nlp_entities))
+        return patterns + names + nlp_entities
+
+    def contains_phi(self, text: str) -> bool:
+        """Verify-only scan: stops at the first PHI hit and builds no detections"""
+        if self.rule_pack.contains(text):
+            return True
+        return self.gazetteer.has_name(text)
+
+    def _detect_patterns(self, text: str) -> List[PHIDetection]:
+        """Detect PHI using the rule pack's regex patterns"""
+        return self.rule_pack.detect(text, metrics=self.metrics)
+
+    def _detect_names(self, text: str) -> List[PHIDetection]:
+        """Detect person names using the gazetteer name lists"""
+        replacement = self.rule_pack.replacement_for('person_name')
+        return [
+            PHIDetection('person_name', start, end, 'dictionary', replacement, text)
+            for start, end in self.gazetteer.find_names(text)
+        ]
 
-    def _detect_entities(self, text: str) -> List[Dict[str, str]]:
+    def _detect_entities(self, text: str, entities: Optional[List[Entity]] = None) -> List[PHIDetection]:
         """Detect PHI using NLP entity recognition"""
-        # Simplified version without spaCy - returns empty list
-        # In production, this would use spaCy for entity recognition
-        return []
+        if entities is None:
+            entities = self.entity_detector.detect(text)
+        
+        pack = self.rule_pack
+        detections = []
+        for entity in entities:
+            if entity.label not in self.sensitive_entities:
+                continue
+            
+            if not self._is_likely_phi(text[entity.start:entity.end], entity.label):
+                continue
+            
+            phi_type = self._map_entity_to_phi_type(entity.label)
+            detections.append(PHIDetection(
+                phi_type, entity.start, entity.end, 'nlp', pack.replacement_for(phi_type), text
+            ))
+        
+        return detections
 
     def _is_likely_phi(self, text: str, entity_label: str) -> bool:
         """Determine if detected entity is likely PHI"""
         # Skip common medical terms that aren't PHI
-        medical_terms = {
-            'headache', 'pain', 'medication', 'treatment', 'diagnosis',
-            'symptoms', 'doctor', 'patient', 'clinic', 'hospital'
-        }
-        
-        if text.lower() in medical_terms:
+        if self.gazetteer.is_allowlisted(text):
             return False
             
         # Person names are almost always PHI in medical context
@@ -174,38 +341,51 @@ class PHIRedactor:
 
     def _map_entity_to_phi_type(self, entity_label: str) -> str:
         """Map spaCy entity labels to PHI types"""
-        mapping = {
-            'PERSON': 'person_name',
-            'ORG': 'organization', 
-            'GPE': 'location',
-            'DATE': 'date',
-            'CARDINAL': 'number'
-        }
-        return mapping.get(entity_label, 'unknown')
-
-    def _calculate_confidence(self, detections: List[Dict], original_text: str) -> float:
+        return self.ENTITY_PHI_TYPES.get(entity_label, 'unknown')
+
+    def _calculate_confidence(self, detections: List[PHIDetection], original_text: str) -> float:
         """Calculate confidence score for redaction quality"""
         if not detections:
             return 1.0  # High confidence if no PHI detected
             
         # Simple scoring based on detection methods and coverage
-        regex_detections = sum(1 for d in detections if d['method'] == 'regex')
-        nlp_detections = sum(1 for d in detections if d['method'] == 'nlp')
+        regex_detections = sum(1 for d in detections if d.method == 'regex')
+        dictionary_detections = sum(1 for d in detections if d.method == 'dictionary')
+        nlp_detections = sum(1 for d in detections if d.method == 'nlp')
         
-        # Regex patterns have higher confidence than NLP detection
-        confidence = min(1.0, (regex_detections * 0.9 + nlp_detections * 0.7) / len(detections))
+        # Regex patterns have higher confidence than dictionary and NLP detection
+        confidence = min(1.0, (
+            regex_detections * 0.9 + dictionary_detections * 0.8 + nlp_detections * 0.7
+        ) / len(detections))
         
         return confidence
 
     def _audit_redaction(self, phi_count: int, confidence: float):
         """Log redaction operation for audit purposes (no PHI stored)"""
-        logger.info(f"PHI redaction completed: {phi_count} entities detected, confidence: {confidence:.2f}")
+        # Counts are always in the metrics; the per-call line is debug-only
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"PHI redaction completed: {phi_count} entities detected, confidence: {confidence:.2f}")
+
+    async def warm_up(self):
+        """Load the entity model and start the worker pool before first use"""
+        self.entity_detector.warm_up()
+        if self.pool is not None:
+            await self.pool.warm_up()
+
+    def close(self):
+        """Shut down the redaction worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def metrics_snapshot(self) -> Dict:
+        """Per-rule counters, stage timings and redact_phi latency histogram"""
+        return self.metrics.snapshot()
 
     def health_check(self) -> Dict[str, str]:
         """Health check for PHI redactor"""
         try:
             # Test basic functionality
-            return {"status": "healthy", "model": "regex-only"}
+            return {"status": "healthy", "model": f"regex+{self.entity_detector.name}"}
         except Exception as e:
             logger.error(f"PHI redactor health check failed: {e}")
             return {"status": "unhealthy", "error": str(e)}
@@ -213,14 +393,10 @@ class PHIRedactor:
     async def validate_redaction(self, original: str, redacted: str) -> bool:
         """
         Validate that redaction was successful
-        Used in testing to ensure no PHI leaks
+        Checks that no detectable PHI remains in the redacted text
         """
         try:
-            # Re-run detection on redacted text
-            result = await self.redact_phi(redacted)
-            
-            # Should find minimal or no PHI in already-redacted text
-            return len(result.detected_phi) == 0
+            return not self.contains_phi(redacted)
             
         except Exception as e:
             logger.error(f"Redaction validation failed: {e}")
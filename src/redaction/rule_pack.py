@@ -0,0 +1,221 @@
+"""
+PHI Rule Packs
+
+Redaction rules are declared once, each with its PHI type, replacement
+token and merge priority, and compiled into an immutable RulePack: one
+compiled matcher per pattern plus the replacement and priority tables.
+Packs are shared by every redactor instance in a process and are rebuilt
+once per worker process. The registry swaps a pack atomically, so new
+rules take effect on the next redaction without a restart.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .detection import PHIDetection
+from .pattern_scanner import PatternScanner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLACEMENT = '[PHI_REDACTED]'
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    One redaction rule
+
+    Rules without a pattern only declare the replacement and priority of a
+    PHI type produced by another detector (gazetteer names, NLP entities).
+    """
+    name: str
+    phi_type: str
+    replacement: str
+    priority: int
+    pattern: Optional[str] = None
+    case_sensitive: bool = False
+    method: str = 'regex'
+    # Drop matches made up entirely of allowlisted medical vocabulary
+    allowlist_filtered: bool = False
+
+
+class RulePack:
+    """Immutable compiled set of rules"""
+
+    def __init__(self, name: str, rules: Iterable[Rule]):
+        self.name = name
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+
+        self._pattern_rules = {rule.name: rule for rule in self.rules if rule.pattern}
+        self.scanner = PatternScanner({
+            rule.name: rule.pattern if not rule.case_sensitive else f'(?-i:{rule.pattern})'
+            for rule in self._pattern_rules.values()
+        })
+        self._filtered = any(rule.allowlist_filtered for rule in self._pattern_rules.values())
+
+        # First declaration of a PHI type supplies its token; the highest rule supplies its priority
+        self.replacements: Dict[str, str] = {}
+        self.priority: Dict[str, int] = {}
+        for rule in self.rules:
+            self.replacements.setdefault(rule.phi_type, rule.replacement)
+            self.priority[rule.phi_type] = max(rule.priority, self.priority.get(rule.phi_type, rule.priority))
+
+    def __reduce__(self):
+        # Workers receive the declarations and compile them once on arrival
+        return (RulePack, (self.name, self.rules))
+
+    def replacement_for(self, phi_type: str) -> str:
+        return self.replacements.get(phi_type, DEFAULT_REPLACEMENT)
+
+    def scan(self, text: str, timings: Optional[Dict[str, float]] = None) -> Iterator[Tuple[Rule, int, int]]:
+        """Yield (rule, start, end) for every pattern match, ordered by start (see PatternScanner.scan)"""
+        for rule_name, start, end in self.scanner.scan(text, timings):
+            yield self._pattern_rules[rule_name], start, end
+
+    def detect(self, text: str, gazetteer=None, metrics=None) -> List[PHIDetection]:
+        """
+        Pattern detections, with allowlisted matches dropped for filtered rules
+
+        Args:
+            metrics: Optional RedactionMetrics receiving per-rule hits, bytes
+                and match time
+        """
+        detections = []
+        hits: Dict[str, int] = {}
+        timings: Optional[Dict[str, float]] = {} if metrics is not None else None
+        for rule, start, end in self.scan(text, timings):
+            if rule.allowlist_filtered and gazetteer is not None \
+                    and gazetteer.is_allowlisted(text[start:end]):
+                continue
+            detections.append(PHIDetection(
+                rule.phi_type, start, end, rule.method, rule.replacement, text
+            ))
+            hits[rule.name] = hits.get(rule.name, 0) + 1
+
+        if metrics is not None:
+            metrics.record_scan(len(text), hits, timings)
+        return detections
+
+    def contains(self, text: str, gazetteer=None) -> bool:
+        """True at the first pattern match that would be redacted"""
+        if not self._filtered or gazetteer is None:
+            return self.scanner.search(text)
+
+        # Any order will do, so stop at the first hit rule by rule
+        for name, pattern in self.scanner.compiled.items():
+            rule = self._pattern_rules[name]
+            for match in pattern.finditer(text):
+                if not (rule.allowlist_filtered and gazetteer.is_allowlisted(match.group())):
+                    return True
+        return False
+
+
+# Structured identifiers. Every quantifier is bounded so matching stays
+# linear in text length (no catastrophic backtracking) and no match can
+# exceed a few hundred characters.
+STRUCTURED_RULES = (
+    Rule('ssn', 'ssn', '[SSN_REDACTED]', 100,
+         r'\b(?:\d{3}-?\d{2}-?\d{4})\b'),
+    Rule('phone', 'phone', '[PHONE_REDACTED]', 60,
+         r'(?:(?<![\w+])|(?=\())(?:\+?1[-.\s]?)?(?:\(\d{3}\)|\d{3})[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    Rule('email', 'email', '[EMAIL_REDACTED]', 70,
+         r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,190}\.[A-Za-z]{2,24}\b'),
+    Rule('date_birth', 'date_birth', '[DOB_REDACTED]', 80,
+         r'\b(?:0[1-9]|1[0-2])[/-](?:0[1-9]|[12]\d|3[01])[/-](?:19|20)\d{2}\b'),
+    Rule('mrn', 'mrn', '[MRN_REDACTED]', 90,
+         r'\b(?:MRN|mrn|Medical Record Number)[\s:]{0,8}(\d{6,10})\b'),
+    Rule('address', 'address', '[ADDRESS_REDACTED]', 50,
+         r'\b\d{1,6}\s{1,3}(?:[A-Za-z0-9]{1,30}[\s,]{1,3}){0,5}'
+         r'(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Place|Pl)\b'),
+)
+
+# PHI types produced by the gazetteer and entity detectors
+ENTITY_RULES = (
+    Rule('person_name', 'person_name', '[NAME_REDACTED]', 40),
+    Rule('organization', 'organization', '[ORG_REDACTED]', 30),
+    Rule('location', 'location', '[LOCATION_REDACTED]', 30),
+    Rule('date', 'date', '[DATE_REDACTED]', 20),
+    Rule('number', 'number', '[NUMBER_REDACTED]', 10),
+)
+
+# Capitalized-word name heuristics used by the regex-only profile
+NAME_PATTERN_RULES = (
+    Rule('name_first_last', 'name', '[NAME_REDACTED]', 40, r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b',
+         case_sensitive=True, method='name_pattern', allowlist_filtered=True),
+    Rule('name_doctor', 'name', '[NAME_REDACTED]', 40, r'\bDr\.\s+[A-Z][a-z]+\b',
+         case_sensitive=True, method='name_pattern', allowlist_filtered=True),
+    Rule('name_patient', 'name', '[NAME_REDACTED]', 40, r'\bPatient\s+[A-Z][a-z]+\b',
+         case_sensitive=True, method='name_pattern', allowlist_filtered=True),
+)
+
+DEFAULT_RULES = {
+    'phi': STRUCTURED_RULES + ENTITY_RULES,
+    'simple': STRUCTURED_RULES + NAME_PATTERN_RULES
+}
+
+# Merge priority across every built-in PHI type
+PHI_PRIORITY = {
+    rule.phi_type: rule.priority
+    for rule in STRUCTURED_RULES + ENTITY_RULES + NAME_PATTERN_RULES
+}
+
+
+class RulePackRegistry:
+    """Process-wide named rule packs with atomic hot swapping"""
+
+    def __init__(self, packs: Optional[Dict[str, Iterable[Rule]]] = None):
+        self._packs: Dict[str, RulePack] = {}
+        self._lock = threading.Lock()
+        for name, rules in (packs or {}).items():
+            self._packs[name] = RulePack(name, rules)
+
+    def get(self, name: str) -> RulePack:
+        try:
+            return self._packs[name]
+        except KeyError:
+            raise ValueError(f"Unknown rule pack: {name}")
+
+    def names(self) -> List[str]:
+        return sorted(self._packs)
+
+    def swap(self, name: str, rules: Iterable[Rule]) -> RulePack:
+        """Compile new rules and replace the named pack in one step"""
+        # Compile outside the lock; an invalid pattern leaves the old pack in place
+        pack = RulePack(name, rules)
+        with self._lock:
+            self._packs[name] = pack
+        logger.info(f"Rule pack '{name}' swapped in with {len(pack.rules)} rules")
+        return pack
+
+    def load_file(self, path: str) -> List[str]:
+        """
+        Swap in every pack from a JSON file of {pack_name: [rule, ...]}
+
+        All packs are compiled before any is swapped, so a bad file changes nothing.
+        """
+        with open(path, encoding='utf-8') as handle:
+            declarations = json.load(handle)
+
+        packs = {
+            name: RulePack(name, [Rule(**rule) for rule in rules])
+            for name, rules in declarations.items()
+        }
+        with self._lock:
+            self._packs.update(packs)
+        logger.info(f"Loaded rule packs {sorted(packs)} from {path}")
+        return sorted(packs)
+
+    def dump(self, name: str) -> List[Dict]:
+        """Rule declarations of a pack, in the load_file() format"""
+        return [asdict(rule) for rule in self.get(name).rules]
+
+
+RULE_PACKS = RulePackRegistry(DEFAULT_RULES)
+
+
+def get_rule_pack(name: str) -> RulePack:
+    """Current pack registered under a name"""
+    return RULE_PACKS.get(name)
@@ -3,151 +3,140 @@ Simplified PHI Redactor - No External Dependencies
 Basic regex-based PHI detection for MVP demonstration
 """
 
-import re
+import time
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 
+from .detection import PHIDetection
+from .gazetteer import get_default_gazetteer
+from .metrics import RedactionMetrics
+from .rule_pack import RulePack, get_rule_pack
+from .span_rewriter import OffsetMap, rewrite_spans
+
 logger = logging.getLogger(__name__)
 
 
 @dataclass
 class RedactionResult:
-    """Result of PHI redaction operation"""
-    original_text: str
+    """Result of PHI redaction operation (the input text is not kept)"""
     redacted_text: str
-    detected_phi: List[Dict[str, str]]
+    detected_phi: List[PHIDetection]
     confidence_score: float
+    offset_map: Optional[OffsetMap] = None
+
+    def __post_init__(self):
+        # Detections point into the input while it is redacted; keep only their substrings
+        for detection in self.detected_phi:
+            detection.detach()
 
 
 class SimplePHIRedactor:
     """Simplified PHI detection using only regex patterns"""
     
-    def __init__(self):
-        # PHI patterns for regex matching
-        self.phi_patterns = {
-            'ssn': r'\b(?:\d{3}-?\d{2}-?\d{4})\b',
-            'phone': r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b',
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'date_birth': r'\b(?:0[1-9]|1[0-2])[/-](?:0[1-9]|[12]\d|3[01])[/-](?:19|20)\d{2}\b',
-            'mrn': r'\b(?:MRN|mrn|Medical Record Number)[\s:]*(\d{6,10})\b',
-            'address': r'\b\d+\s+[A-Za-z0-9\s,]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Place|Pl)\b'
-        }
+    # Registry name of the rule pack this profile follows
+    RULE_PACK = 'simple'
+    
+    def __init__(self, rule_pack: Optional[RulePack] = None):
+        """
+        Args:
+            rule_pack: Pin a specific rule pack; by default the current
+                registry pack is used, so swapped packs apply immediately
+        """
+        self._pinned_pack = rule_pack
         
-        # Simple name patterns
-        self.name_patterns = [
-            r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b',  # First Last
-            r'\bDr\.\s+[A-Z][a-z]+\b',         # Dr. Name
-            r'\bPatient\s+[A-Z][a-z]+\b'       # Patient Name
-        ]
+        # Name lists and medical allowlist, loaded once per process
+        self.gazetteer = get_default_gazetteer()
         
-        # Replacement tokens
-        self.replacements = {
-            'ssn': '[SSN_REDACTED]',
-            'phone': '[PHONE_REDACTED]', 
-            'email': '[EMAIL_REDACTED]',
-            'date_birth': '[DOB_REDACTED]',
-            'mrn': '[MRN_REDACTED]',
-            'address': '[ADDRESS_REDACTED]',
-            'name': '[NAME_REDACTED]'
-        }
+        # Per-rule and per-call instrumentation
+        self.metrics = RedactionMetrics()
+
+    @property
+    def rule_pack(self) -> RulePack:
+        """Compiled rules shared by every redactor in the process"""
+        return self._pinned_pack or get_rule_pack(self.RULE_PACK)
+
+    @property
+    def replacements(self) -> Dict[str, str]:
+        return self.rule_pack.replacements
 
     async def redact_phi(self, text: str) -> RedactionResult:
         """Main PHI redaction function using regex only"""
-        detected_phi = []
-        redacted_text = text
-        
+        start = time.perf_counter()
+        self.metrics.increment('texts')
         try:
-            # 1. Pattern-based detection
-            pattern_detections = self._detect_patterns(text)
-            detected_phi.extend(pattern_detections)
-            
-            # Apply pattern-based redactions
-            for detection in pattern_detections:
-                redacted_text = redacted_text.replace(
-                    detection['original'],
-                    detection['replacement']
-                )
+            # 1-2. Pattern-based and simple name detection
+            detected_phi = self.detect_phi(text)
             
-            # 2. Simple name detection
-            name_detections = self._detect_names(redacted_text)
-            detected_phi.extend(name_detections)
+            # Apply all redactions by offset in a single rewrite
+            redacted_text, offset_map = rewrite_spans(text, detected_phi, self.rule_pack.priority)
             
-            # Apply name redactions
-            for detection in name_detections:
-                redacted_text = redacted_text.replace(
-                    detection['original'],
-                    detection['replacement']
-                )
+            # Post-condition: nothing detectable may survive redaction
+            if self.contains_phi(redacted_text):
+                raise ValueError("PHI remained after redaction")
             
             # 3. Calculate simple confidence score
             confidence = 1.0 if detected_phi else 1.0  # Always confident in regex
             
-            # 4. Audit log
-            logger.info(f"PHI redaction: {len(detected_phi)} entities detected")
+            # 4. Audit log (counts are always in the metrics)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"PHI redaction: {len(detected_phi)} entities detected")
             
             return RedactionResult(
-                original_text=text,
                 redacted_text=redacted_text,
                 detected_phi=detected_phi,
-                confidence_score=confidence
+                confidence_score=confidence,
+                offset_map=offset_map
             )
             
         except Exception as e:
             logger.error(f"PHI redaction failed: {e}")
+            self.metrics.increment('failures')
             return RedactionResult(
-                original_text=text,
                 redacted_text="[TEXT_REDACTION_FAILED]",
                 detected_phi=[],
                 confidence_score=0.0
             )
+        finally:
+            self.metrics.observe_latency(time.perf_counter() - start)
 
-    def _detect_patterns(self, text: str) -> List[Dict[str, str]]:
-        """Detect PHI using regex patterns"""
-        detections = []
+    def detect_phi(self, text: str) -> List[PHIDetection]:
+        """Run pattern and name detection without redacting"""
+        start = time.perf_counter()
+        patterns = self._detect_patterns(text)
+        patterns_done = time.perf_counter()
+        names = self._detect_names(text)
         
-        for phi_type, pattern in self.phi_patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                detections.append({
-                    'type': phi_type,
-                    'original': match.group(),
-                    'replacement': self.replacements.get(phi_type, '[PHI_REDACTED]'),
-                    'start_pos': match.start(),
-                    'end_pos': match.end(),
-                    'method': 'regex'
-                })
-        
-        return detections
+        self.metrics.record_stage('patterns', patterns_done - start, len(patterns))
+        self.metrics.record_stage('names', time.perf_counter() - patterns_done, len(names))
+        return patterns + names
 
-    def _detect_names(self, text: str) -> List[Dict[str, str]]:
-        """Detect names using simple patterns"""
-        detections = []
-        
-        for pattern in self.name_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                name_text = match.group()
-                # Skip common medical terms
-                if not self._is_medical_term(name_text):
-                    detections.append({
-                        'type': 'name',
-                        'original': name_text,
-                        'replacement': self.replacements['name'],
-                        'start_pos': match.start(),
-                        'end_pos': match.end(),
-                        'method': 'name_pattern'
-                    })
-        
-        return detections
+    def contains_phi(self, text: str) -> bool:
+        """Verify-only scan that stops at the first PHI hit"""
+        if self.rule_pack.contains(text, self.gazetteer):
+            return True
+        return self.gazetteer.has_name(text)
+
+    def _detect_patterns(self, text: str) -> List[PHIDetection]:
+        """Detect PHI and simple name patterns from the rule pack"""
+        # Name-pattern rules skip matches made up of medical vocabulary
+        return self.rule_pack.detect(text, self.gazetteer, self.metrics)
+
+    def _detect_names(self, text: str) -> List[PHIDetection]:
+        """Detect known first/last names from the gazetteer, matched in one pass"""
+        replacement = self.rule_pack.replacement_for('name')
+        return [
+            PHIDetection('name', start, end, 'dictionary', replacement, text)
+            for start, end in self.gazetteer.find_names(text)
+        ]
 
     def _is_medical_term(self, text: str) -> bool:
-        """Check if text is a common medical term"""
-        medical_terms = {
-            'patient reports', 'doctor smith', 'nurse jones', 'headache pain',
-            'blood pressure', 'heart rate', 'pain level', 'medical history'
-        }
-        return text.lower() in medical_terms
+        """Check if text is made up of medical vocabulary"""
+        return self.gazetteer.is_allowlisted(text)
+
+    def metrics_snapshot(self) -> Dict:
+        """Per-rule counters, stage timings and redact_phi latency histogram"""
+        return self.metrics.snapshot()
 
     def health_check(self) -> Dict[str, str]:
         """Health check"""
@@ -156,8 +145,7 @@ class SimplePHIRedactor:
     async def validate_redaction(self, original: str, redacted: str) -> bool:
         """Validate redaction success"""
         try:
-            result = await self.redact_phi(redacted)
-            return len(result.detected_phi) == 0
+            return not self.contains_phi(redacted)
         except:
             return False
 
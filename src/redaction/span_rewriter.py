@@ -0,0 +1,101 @@
+"""
+Offset-based Span Rewriter
+
+Applies PHI detections to the source text by their character offsets.
+Overlapping spans are merged (the highest-priority PHI type supplies the
+replacement token) and the redacted text is built in a single join.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .detection import PHIDetection
+from .rule_pack import PHI_PRIORITY
+
+
+@dataclass
+class OffsetMap:
+    """Maps character offsets between original and redacted text"""
+    # (original_start, original_end, redacted_start, redacted_end) per replaced span
+    spans: List[Tuple[int, int, int, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._original_starts = [span[0] for span in self.spans]
+        self._redacted_starts = [span[2] for span in self.spans]
+
+    def to_redacted(self, position: int) -> int:
+        """Map an offset in the original text to the redacted text
+
+        Offsets inside a replaced span map to the start of its token.
+        """
+        index = bisect_right(self._original_starts, position) - 1
+        if index < 0:
+            return position
+
+        orig_start, orig_end, red_start, red_end = self.spans[index]
+        if position < orig_end:
+            return red_start
+        return position + (red_end - orig_end)
+
+    def to_original(self, position: int) -> int:
+        """Map an offset in the redacted text back to the original text"""
+        index = bisect_right(self._redacted_starts, position) - 1
+        if index < 0:
+            return position
+
+        orig_start, orig_end, red_start, red_end = self.spans[index]
+        if position < red_end:
+            return orig_start
+        return position + (orig_end - red_end)
+
+
+def merge_spans(detections: List[PHIDetection], priority: Dict[str, int] = PHI_PRIORITY) -> List[Tuple[int, int, str]]:
+    """Sort and merge overlapping detections into (start, end, replacement) spans"""
+    ordered = sorted(
+        detections,
+        key=lambda d: (d.start_pos, -priority.get(d.type, 0))
+    )
+
+    merged = []
+    for detection in ordered:
+        start, end = detection.start_pos, detection.end_pos
+        if end <= start:
+            continue
+
+        rank = priority.get(detection.type, 0)
+        if merged and start < merged[-1][1]:
+            # Overlap: widen the current span, keep the higher-priority token
+            cur_start, cur_end, cur_replacement, cur_rank = merged[-1]
+            if rank > cur_rank:
+                cur_replacement, cur_rank = detection.replacement, rank
+            merged[-1] = (cur_start, max(cur_end, end), cur_replacement, cur_rank)
+        else:
+            merged.append((start, end, detection.replacement, rank))
+
+    return [(start, end, replacement) for start, end, replacement, _ in merged]
+
+
+def rewrite_spans(text: str,
+                  detections: List[PHIDetection],
+                  priority: Dict[str, int] = PHI_PRIORITY) -> Tuple[str, OffsetMap]:
+    """Replace detected spans in one pass
+
+    Returns:
+        Redacted text and the offset map from original to redacted text
+    """
+    pieces = []
+    spans = []
+    cursor = 0
+    redacted_length = 0
+
+    for start, end, replacement in merge_spans(detections, priority):
+        pieces.append(text[cursor:start])
+        redacted_length += start - cursor
+        pieces.append(replacement)
+        spans.append((start, end, redacted_length, redacted_length + len(replacement)))
+        redacted_length += len(replacement)
+        cursor = end
+
+    pieces.append(text[cursor:])
+    return ''.join(pieces), OffsetMap(spans)
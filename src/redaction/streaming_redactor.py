@@ -0,0 +1,347 @@
+"""
+Streaming PHI Redactor
+
+Redacts a transcript that arrives chunk by chunk (e.g. real-time recording).
+A small carry-over window is held back so PHI split across chunk boundaries
+(a phone number or address spoken over two chunks) is still detected, while
+text before the window is finalized, emitted once and never scanned again.
+The held-back window (and any interim hypothesis) can be previewed, redacted,
+without finalizing it. The tail of the already-finalized text is passed
+along as read-only left context, so a word at the start of the window is
+not mistaken for the start of a sentence; the window is never cut inside a
+run of names, which is grouped from its first word. Calls may come from several threads at once (e.g.
+a final segment and an interim preview of the same session); feeds are
+serialized and previews work on a snapshot of the window. A session is
+fed either synchronously or through the async variants: a synchronous
+feed or flush while an async step awaits its scan raises RuntimeError. Timestamp
+segments fed with the text are held back with it and released with the
+finalized text they belong to. On the event loop the async variants run
+each scan through the redactor's worker pool under its deadline.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .detection import PHIDetection
+from .gazetteer import NAME_TITLES, TOKEN_PATTERN
+from .span_rewriter import rewrite_spans
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingRedactor:
+    """Stateful per-session redactor with a bounded carry-over window"""
+
+    def __init__(self, redactor: Any, window: int = 512, context: int = 64):
+        """
+        Args:
+            redactor: Redactor exposing synchronous detect_phi(text), contains_phi(text)
+                and its rule_pack; the async variants use its redact_stream_window()
+                when it has one
+            window: Characters held back for cross-chunk matches; must be at
+                least as long as the longest PHI span the patterns can match
+                (the bounded email pattern tops out around 350 characters)
+            context: Characters of finalized text scanned (never re-emitted)
+                ahead of the window
+        """
+        self.redactor = redactor
+        self.window = window
+        self.context = context
+        self._carry = ''
+        # Tails of the finalized original and redacted text, as left context
+        self._original_tail = ''
+        self._redacted_tail = ''
+        # Original characters finalized so far (absolute offset of the carry)
+        self.finalized_chars = 0
+        # (absolute offset, segment) for timestamp segments not yet released
+        self._segments: List[Tuple[int, Dict]] = []
+        # Guards the carry and the finalized count across threads
+        self._lock = threading.Lock()
+        # Serializes feed_async/flush_async across their awaited scans
+        self._feeding = asyncio.Lock()
+
+    def feed(self, text: str) -> str:
+        """
+        Add transcript text and return newly finalized redacted text
+
+        Only the carry-over window plus the new text is scanned.
+        """
+        with self._lock:
+            self._check_no_async_step()
+            return self._feed(text)
+
+    def feed_timed(self, text: str, timestamps: Sequence[Dict]) -> Tuple[str, List[Dict]]:
+        """
+        feed() that also takes the text's timestamp segments
+
+        Returns:
+            (newly finalized redacted text, timestamp segments starting in it)
+        """
+        with self._lock:
+            self._check_no_async_step()
+            self._hold_segments(text, timestamps)
+            redacted = self._feed(text)
+            return redacted, self._release_segments(self.finalized_chars)
+
+    def _feed(self, text: str) -> str:
+        buffer = self._carry + text
+        cut, redacted = self._find_cut(buffer), ''
+        if cut > 0:
+            cut, redacted = redact_window(self.redactor, self._original_tail, self._redacted_tail, buffer, cut)
+        return self._commit(buffer, cut, redacted)
+
+    def flush(self) -> str:
+        """Finalize and return whatever is left in the carry-over window"""
+        return self.flush_timed()[0]
+
+    def flush_timed(self) -> Tuple[str, List[Dict]]:
+        """flush() that also returns the timestamp segments still held back"""
+        with self._lock:
+            self._check_no_async_step()
+            buffer = self._carry
+            segments = self._release_segments(None)
+            if not buffer:
+                return '', segments
+
+            cut, redacted = redact_window(self.redactor, self._original_tail, self._redacted_tail, buffer)
+            return self._commit(buffer, cut, redacted), segments
+
+    def preview(self, text: str = '') -> str:
+        """
+        Redacted view of the carry-over window plus unstable text, state unchanged
+
+        For interim display only: the unstable text is a hypothesis that the
+        next feed() replaces. A trailing word still being spoken is withheld,
+        since it may be the start of PHI that only matches once complete.
+        """
+        buffer, original_tail, redacted_tail = self._preview_snapshot(text)
+        if not buffer:
+            return ''
+        return redact_window(self.redactor, original_tail, redacted_tail, buffer)[1]
+
+    async def feed_async(self, text: str, timestamps: Sequence[Dict] = ()) -> Tuple[str, List[Dict]]:
+        """
+        feed_timed() for the event loop, scanning through the redactor's worker pool
+
+        The scan is bounded by the redactor's deadline and fails closed
+        (see PHIRedactor.redact_stream_window); feeds are serialized. The
+        text joins the carry before the scan is awaited, so a feed cancelled
+        mid-scan leaves it pending for the next feed or flush.
+        """
+        async with self._feeding:
+            with self._lock:
+                self._hold_segments(text, timestamps)
+                self._carry += text
+                buffer = self._carry
+                original_tail, redacted_tail = self._original_tail, self._redacted_tail
+            cut, redacted = self._find_cut(buffer), ''
+            if cut > 0:
+                cut, redacted = await self._redact_window(original_tail, redacted_tail, buffer, cut)
+            with self._lock:
+                redacted = self._commit(buffer, cut, redacted)
+                return redacted, self._release_segments(self.finalized_chars)
+
+    async def flush_async(self) -> Tuple[str, List[Dict]]:
+        """flush_timed() for the event loop, scanning through the redactor's worker pool"""
+        async with self._feeding:
+            with self._lock:
+                buffer = self._carry
+                original_tail, redacted_tail = self._original_tail, self._redacted_tail
+            cut, redacted = 0, ''
+            if buffer:
+                cut, redacted = await self._redact_window(original_tail, redacted_tail, buffer)
+            with self._lock:
+                return self._commit(buffer, cut, redacted), self._release_segments(None)
+
+    async def preview_async(self, text: str = '') -> str:
+        """preview() for the event loop, scanning through the redactor's worker pool"""
+        buffer, original_tail, redacted_tail = self._preview_snapshot(text)
+        if not buffer:
+            return ''
+        return (await self._redact_window(original_tail, redacted_tail, buffer))[1]
+
+    async def _redact_window(self, *args) -> Tuple[int, str]:
+        """Pooled, deadline-bounded scan when the redactor offers one, else a thread"""
+        redact_stream_window = getattr(self.redactor, 'redact_stream_window', None)
+        if redact_stream_window is not None:
+            return await redact_stream_window(*args)
+        return await asyncio.to_thread(redact_window, self.redactor, *args)
+
+    def _check_no_async_step(self):
+        """Reject a synchronous feed or flush while feed_async/flush_async awaits its scan"""
+        if self._feeding.locked():
+            raise RuntimeError("Streaming redaction step already in flight; use feed_async/flush_async")
+
+    def _preview_snapshot(self, text: str) -> Tuple[str, str, str]:
+        """Window plus unstable text (minus a trailing partial word) and the left context"""
+        # Snapshot the window; redacting it needs no lock
+        with self._lock:
+            buffer = self._carry + text
+            original_tail, redacted_tail = self._original_tail, self._redacted_tail
+        if buffer and not buffer[-1].isspace():
+            buffer = buffer[:max(buffer.rfind(' '), buffer.rfind('\n')) + 1]
+        return buffer, original_tail, redacted_tail
+
+    def _commit(self, buffer: str, cut: int, redacted: str) -> str:
+        """Finalize buffer[:cut] as redacted, keeping the tails as context for the next scan"""
+        self._carry = buffer[cut:]
+        if cut <= 0:
+            return ''
+        self.finalized_chars += cut
+        self._original_tail = self._tail(self._original_tail + buffer[:cut])
+        self._redacted_tail = self._tail(self._redacted_tail + redacted)
+        return redacted
+
+    @property
+    def pending_chars(self) -> int:
+        """Characters currently held back in the carry-over window"""
+        return len(self._carry)
+
+    def _hold_segments(self, text: str, timestamps: Sequence[Dict]):
+        """Place each segment at the absolute offset where its text starts"""
+        base = self.finalized_chars + len(self._carry)
+        lowered = text.lower()
+        cursor = 0
+        for segment in timestamps:
+            segment_text = (segment.get('text') or '').strip().lower()
+            start = lowered.find(segment_text, cursor) if segment_text else -1
+            if start < 0:
+                # Not found verbatim: keep it in order at the cursor
+                start = cursor
+            else:
+                cursor = start + len(segment_text)
+            self._segments.append((base + start, dict(segment)))
+
+    def _release_segments(self, offset: Optional[int]) -> List[Dict]:
+        """Take the held segments starting before offset (all of them for None)"""
+        count = len(self._segments)
+        if offset is not None:
+            count = next((i for i, (start, _) in enumerate(self._segments) if start >= offset), count)
+        released, self._segments = self._segments[:count], self._segments[count:]
+        return [segment for _, segment in released]
+
+    def _tail(self, text: str) -> str:
+        """Last context characters of text, starting on a word boundary"""
+        if len(text) <= self.context:
+            return text
+        tail = text[-self.context:]
+        return tail[tail.find(' ') + 1:]
+
+    def _find_cut(self, buffer: str) -> int:
+        """Pick the finalization point: before the window, on a whitespace boundary"""
+        cut = len(buffer) - self.window
+        if cut <= 0:
+            return 0
+
+        # Never finalize mid-word, but only look back one window for whitespace
+        # so an unbroken run cannot make the carry grow without bound
+        lookback = max(0, cut - self.window)
+        boundary = max(buffer.rfind(' ', lookback, cut), buffer.rfind('\n', lookback, cut))
+        if boundary >= 0:
+            return boundary + 1
+        # Cut mid-word only once the unbroken run is longer than a window
+        return cut if cut >= self.window else 0
+
+
+def redact_window(redactor: Any, original_context: str, redacted_context: str,
+                  buffer: str, cut: Optional[int] = None) -> Tuple[int, str]:
+    """
+    One streaming step: redact the start of buffer after its left context
+
+    Pure, so a pool worker can run it with its own redactor.
+
+    Args:
+        redactor: Redactor exposing detect_phi(text), contains_phi(text) and its rule_pack
+        original_context: Tail of the finalized original text, scanned but not redacted
+        redacted_context: The same tail as emitted, for the leak check
+        buffer: Unfinalized text
+        cut: Finalize buffer[:cut], moved left so no PHI straddles it; None for all of it
+
+    Returns:
+        (characters finalized, their redacted text)
+    """
+    detections = _detect(redactor, original_context, buffer)
+    if cut is None:
+        cut = len(buffer)
+    else:
+        cut = _choose_cut(buffer, detections, cut)
+        if cut <= 0:
+            return 0, ''
+
+    finalized = [d for d in detections if d.end_pos <= cut]
+    redacted, _ = rewrite_spans(buffer[:cut], finalized, redactor.rule_pack.priority)
+
+    # Post-condition: fail closed if PHI survived redaction (checked after the redacted context)
+    if redacted and redactor.contains_phi(redacted_context + redacted):
+        logger.error("PHI remained in streamed text, rejecting segment")
+        return cut, "[TEXT_REDACTION_FAILED]"
+    return cut, redacted
+
+
+def _detect(redactor: Any, context: str, buffer: str) -> List[PHIDetection]:
+    """Detections in buffer, scanned after its left context (offsets relative to buffer)"""
+    detections = []
+    for detection in redactor.detect_phi(context + buffer):
+        start, end = detection.start_pos - len(context), detection.end_pos - len(context)
+        if end <= 0:
+            continue
+        # A match reaching back into finalized text redacts only its unfinalized part
+        detections.append(PHIDetection(detection.type, max(start, 0), end,
+                                       detection.method, detection.replacement, buffer))
+    return detections
+
+
+def _choose_cut(buffer: str, detections: List[PHIDetection], cut: int) -> int:
+    """Move the cut left until it splits neither a detection nor a run of name-like words"""
+    while True:
+        moved = _avoid_name_run(buffer, _avoid_splitting(detections, cut))
+        if moved == cut:
+            return cut
+        cut = moved
+
+
+def _avoid_name_run(buffer: str, cut: int) -> int:
+    """
+    Move the cut to the start of a run of name-like words it falls inside
+
+    Names in a run are grouped from its first word, so a run split at the
+    cut would be grouped differently after the left context than in the
+    whole text. A run reaching back to the start of the buffer is held
+    whole until its part before the cut outgrows the window after it, so
+    the carry stays bounded.
+    """
+    tokens = [match.span() for match in TOKEN_PATTERN.finditer(buffer)]
+    after = next((k for k, (start, _) in enumerate(tokens) if start >= cut), None)
+    if not after:
+        return cut
+
+    def name_like(k: int) -> bool:
+        start, end = tokens[k]
+        return buffer[start].isupper() or buffer[start:end].lower() in NAME_TITLES
+
+    def adjacent(a: int, b: int) -> bool:
+        gap = buffer[tokens[a][1]:tokens[b][0]]
+        return len(gap) <= 3 and gap.strip(' .') == ''
+
+    first = after - 1
+    if not (name_like(first) and name_like(after) and adjacent(first, after)):
+        return cut
+    while first > 0 and name_like(first - 1) and adjacent(first - 1, first):
+        first -= 1
+    if tokens[first][0] > 0:
+        return tokens[first][0]
+    return 0 if cut < len(buffer) - cut else cut
+
+
+def _avoid_splitting(detections: List[PHIDetection], cut: int) -> int:
+    """Move the cut left until no detection straddles it"""
+    moved = True
+    while moved:
+        moved = False
+        for detection in detections:
+            if detection.start_pos < cut < detection.end_pos:
+                cut = detection.start_pos
+                moved = True
+    return cut
@@ -0,0 +1,313 @@
+"""
+Process-pool Redaction Workers
+
+Runs CPU-bound PHI redaction in worker processes so large transcripts
+do not stall the event loop. Each worker builds its redactor once when
+it starts, so patterns are compiled a single time per process. Every
+worker has its own pipe and runs one job at a time, so a job abandoned
+at its deadline is stopped by killing only the process running it;
+other jobs carry on and a replacement worker takes its place.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .streaming_redactor import redact_window
+
+logger = logging.getLogger(__name__)
+
+# Redactor instance owned by the current worker process
+_worker_redactor = None
+
+# Seconds a stopping worker gets to exit before it is killed
+STOP_TIMEOUT = 5.0
+
+
+def _init_worker(factory: Callable[[], Any]):
+    """Build the worker-local redactor (patterns compiled once per process)"""
+    global _worker_redactor
+    _worker_redactor = factory()
+
+
+def _worker_main(conn, factory: Callable[[], Any]):
+    """Worker process loop: run (function, args) jobs until told to stop"""
+    _init_worker(factory)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        function, args = job
+        try:
+            reply = (True, function(*args))
+        except Exception as e:
+            reply = (False, e)
+        conn.send(reply)
+
+
+def _metrics_delta():
+    """Worker counters since the last job, shipped back with each result"""
+    metrics = getattr(_worker_redactor, 'metrics', None)
+    return metrics.take_delta() if metrics is not None else None
+
+
+def _redact_in_worker(text: str):
+    """Redact a single text inside a worker process"""
+    return _worker_redactor.redact_text(text), _metrics_delta()
+
+
+def _redact_many_in_worker(texts: List[str]):
+    """Redact a slice of a batch inside a worker process"""
+    return _worker_redactor.redact_texts(texts), _metrics_delta()
+
+
+def _redact_window_in_worker(*args):
+    """Run one streaming step inside a worker process"""
+    return redact_window(_worker_redactor, *args), _metrics_delta()
+
+
+def _warm_up_worker():
+    """Load the worker's entity model ahead of the first request"""
+    _worker_redactor.entity_detector.warm_up()
+    return os.getpid()
+
+
+class _Worker:
+    """One worker process and the parent end of its pipe"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(child, factory), daemon=True)
+        self.process.start()
+        child.close()
+
+    def call(self, function: Callable, args: Tuple) -> Any:
+        """Run one job and wait for its result (blocks the calling thread)"""
+        self.conn.send((function, args))
+        ok, value = self.conn.recv()
+        if not ok:
+            raise value
+        return value
+
+    def kill(self):
+        self.process.kill()
+
+    def stop(self):
+        """Ask an idle worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class _Job:
+    """A dispatched call and the worker running it, so only that worker is killed at the deadline"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._worker: Optional[_Worker] = None
+        self._abandoned = False
+
+    def start(self, worker: _Worker) -> bool:
+        """Bind the job to a worker; False if it was abandoned while queued"""
+        with self._lock:
+            if self._abandoned:
+                return False
+            self._worker = worker
+            return True
+
+    def finish(self) -> bool:
+        """Unbind the worker; True if the job was abandoned (its worker may be killed)"""
+        with self._lock:
+            self._worker = None
+            return self._abandoned
+
+    def abandon(self) -> bool:
+        """Abandon the job at its deadline, killing its worker if it is running; True if one was killed"""
+        with self._lock:
+            self._abandoned = True
+            if self._worker is None:
+                return False
+            self._worker.kill()
+            return True
+
+
+class _WorkerGroup:
+    """Workers built from one factory, with one dispatch thread per worker"""
+
+    def __init__(self, factory: Callable[[], Any], size: int):
+        self.factory = factory
+        self.idle: "queue.Queue[_Worker]" = queue.Queue()
+        for _ in range(size):
+            self.idle.put(_Worker(factory))
+        # A running job holds one thread and one worker, so a thread never waits long for a worker
+        self.dispatcher = ThreadPoolExecutor(max_workers=size, thread_name_prefix='redaction-dispatch')
+
+    def run(self, job: _Job, function: Callable, args: Tuple) -> Any:
+        """Dispatch thread: take an idle worker, run the job on it, hand it back"""
+        worker = self.idle.get()
+        if not job.start(worker):
+            self.idle.put(worker)
+            return None
+
+        died = False
+        try:
+            return worker.call(function, args)
+        except (EOFError, OSError):
+            # The process died mid-job: killed at its deadline, or crashed
+            died = True
+            raise RuntimeError("Redaction worker exited before finishing its job")
+        finally:
+            if job.finish() or died:
+                worker = self._replace(worker)
+            self.idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Reap a killed or crashed worker and start a new one"""
+        worker.kill()
+        worker.process.join()
+        worker.conn.close()
+        return _Worker(self.factory)
+
+    def close(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop every worker once the jobs already dispatched have finished"""
+        def drain():
+            self.dispatcher.shutdown(wait=True, cancel_futures=cancel_pending)
+            while True:
+                try:
+                    self.idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+
+        if wait:
+            drain()
+        else:
+            threading.Thread(target=drain, name='redaction-drain', daemon=True).start()
+
+
+class RedactionWorkerPool:
+    """Lazily started process pool dispatching redaction jobs"""
+
+    def __init__(self, factory: Callable[[], Any], max_workers: Optional[int] = None,
+                 on_metrics: Optional[Callable[[Dict], None]] = None):
+        """
+        Args:
+            factory: Picklable callable returning an inline redactor for the worker
+            max_workers: Pool size, defaults to the number of CPUs
+            on_metrics: Receives the metrics delta returned with every job
+        """
+        self.factory = factory
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.on_metrics = on_metrics
+        self._group: Optional[_WorkerGroup] = None
+
+    def _workers(self) -> _WorkerGroup:
+        """Worker processes, started on first use"""
+        if self._group is None:
+            self._group = _WorkerGroup(self.factory, self.max_workers)
+            logger.info(f"Started redaction worker pool with {self.max_workers} processes")
+        return self._group
+
+    async def _run(self, function: Callable, *args, deadline: Optional[float] = None) -> Any:
+        """
+        Run one job on an idle worker
+
+        A job still running at its deadline is abandoned: the worker running
+        it is killed and asyncio.TimeoutError is raised; the rest of the pool
+        is untouched. Ordinary cancellation (a client disconnect, a shutdown
+        sweep) only stops waiting: a running job finishes and its worker
+        returns to the idle queue.
+        """
+        group = self._workers()
+        job = _Job()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(group.dispatcher, group.run, job, function, args)
+        if not deadline:
+            return await future
+        try:
+            return await asyncio.wait_for(future, deadline)
+        except asyncio.TimeoutError:
+            if job.abandon():
+                logger.warning("Killed the redaction worker running a job past its deadline")
+            raise
+
+    async def submit(self, text: str, deadline: Optional[float] = None):
+        """Redact one text in the pool, raising asyncio.TimeoutError after the deadline"""
+        result, delta = await self._run(_redact_in_worker, text, deadline=deadline)
+        self._collect(delta)
+        return result
+
+    async def redact_window(self, original_context: str, redacted_context: str,
+                            buffer: str, cut: Optional[int] = None,
+                            deadline: Optional[float] = None) -> Tuple[int, str]:
+        """Run one streaming step in the pool (see streaming_redactor.redact_window)"""
+        result, delta = await self._run(
+            _redact_window_in_worker, original_context, redacted_context, buffer, cut, deadline=deadline
+        )
+        self._collect(delta)
+        return result
+
+    async def map(self, texts: List[str], deadline: Optional[float] = None) -> List[Any]:
+        """
+        Redact many texts across the pool, preserving input order
+
+        Every slice is dispatched at once, so the deadline bounds the whole
+        batch; slices still queued or running when it passes are abandoned.
+        """
+        if not texts:
+            return []
+
+        # A few slices per worker amortizes IPC while keeping the load balanced
+        chunk_size = max(1, math.ceil(len(texts) / (self.max_workers * 4)))
+        jobs = [
+            self._run(_redact_many_in_worker, texts[i:i + chunk_size], deadline=deadline)
+            for i in range(0, len(texts), chunk_size)
+        ]
+
+        results = []
+        for chunk_results, delta in await asyncio.gather(*jobs):
+            results.extend(chunk_results)
+            self._collect(delta)
+        return results
+
+    def _collect(self, delta: Optional[Dict]):
+        if delta and self.on_metrics is not None:
+            self.on_metrics(delta)
+
+    async def warm_up(self):
+        """Start the worker processes and load their models"""
+        await asyncio.gather(*[self._run(_warm_up_worker) for _ in range(self.max_workers)])
+
+    def recycle(self, factory: Callable[[], Any]):
+        """
+        Switch to a new worker factory (e.g. after a rule-pack swap)
+
+        In-flight jobs finish on the old workers; new workers are started
+        lazily on the next job.
+        """
+        old_group, self._group = self._group, None
+        self.factory = factory
+        if old_group is not None:
+            old_group.close(wait=False)
+            logger.info("Recycled redaction worker pool")
+
+    def shutdown(self, wait: bool = True):
+        """Stop worker processes"""
+        if self._group is not None:
+            self._group.close(wait=wait, cancel_pending=True)
+            self._group = None
@@ -0,0 +1,372 @@
+"""
+Pluggable ASR Backends and Model-Worker Pool
+
+Speech recognition runs in dedicated worker processes that load the model
+once in the pool initializer and keep it warm, so model loading and
+multi-second decodes never run on the event loop. Jobs enter through a
+bounded number of slots: when all workers are busy and the queue is full,
+callers wait (backpressure) and give up with ASRBusy after queue_timeout.
+Long recordings are submitted as windows that share one queue slot and
+spread across all workers.
+A deterministic stub backend stands in for Whisper in offline tests.
+"""
+
+import asyncio
+import io
+import logging
+import math
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .audio_normalizer import pcm16_mono_view
+from .segment_table import SegmentTable
+from .stitcher import read_wav_window
+
+logger = logging.getLogger(__name__)
+
+# Audio handed to a worker: raw bytes or the path of a file on disk
+AudioSource = Union[bytes, str]
+
+
+class ASRBusy(Exception):
+    """No ASR queue slot became free within the queue timeout"""
+
+
+class ASRBackend:
+    """Base interface for speech recognition engines"""
+
+    name = "base"
+
+    def load(self):
+        """Load the model (called once per worker process)"""
+
+    def transcribe(self, audio: AudioSource, language: Optional[str] = None,
+                   context: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Transcribe audio
+
+        Args:
+            audio: Audio bytes or a path to an audio file
+            language: Language hint
+            context: Chunk metadata when transcribing a live-recording chunk
+        Returns:
+            Dict with text, confidence, segments ({start_time, end_time, text}),
+            language and duration
+        """
+        raise NotImplementedError
+
+
+def wav_duration(audio: AudioSource) -> Optional[float]:
+    """Duration of PCM WAV audio in seconds, None if it is not WAV"""
+    try:
+        source = audio if isinstance(audio, str) else io.BytesIO(audio)
+        with wave.open(source, 'rb') as reader:
+            return reader.getnframes() / reader.getframerate()
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+class StubASRBackend(ASRBackend):
+    """Deterministic offline stand-in returning fixed transcripts"""
+
+    name = "stub"
+
+    MOCK_SEGMENTS = [
+        {"start_time": 0.0, "end_time": 5.2, "text": "Patient reports headache"},
+        {"start_time": 5.3, "end_time": 10.1, "text": "with pain level 7 out of 10"},
+        {"start_time": 10.2, "end_time": 15.8, "text": "Duration approximately three days"}
+    ]
+    MOCK_TEXT = "Patient reports headache with pain level 7 out of 10. Duration approximately three days."
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, audio: AudioSource, language: Optional[str] = None,
+                   context: Optional[Dict] = None) -> Dict[str, Any]:
+        if context is not None:
+            chunk_text = f"Audio chunk transcribed at {context.get('timestamp', 0)}"
+            return {
+                "text": chunk_text,
+                "confidence": 0.90,
+                "segments": [{"start_time": 0.0, "end_time": 3.0, "text": chunk_text}],
+                "language": language or "en",
+                "duration": 3.0
+            }
+
+        duration = wav_duration(audio) or self.MOCK_SEGMENTS[-1]["end_time"]
+        # Segments are clipped to the audio, so short windows get a prefix of the script
+        segments = [
+            {**segment, "end_time": min(segment["end_time"], duration)}
+            for segment in self.MOCK_SEGMENTS
+            if segment["start_time"] < duration
+        ]
+        return {
+            "text": self.MOCK_TEXT if len(segments) == len(self.MOCK_SEGMENTS)
+            else " ".join(segment["text"] for segment in segments),
+            "confidence": 0.95,
+            "segments": segments,
+            "language": language or "en",
+            "duration": duration
+        }
+
+
+class WhisperASRBackend(ASRBackend):
+    """OpenAI Whisper backend, loaded lazily in each worker"""
+
+    name = "whisper"
+
+    def __init__(self, model: str = "base", device: str = "cpu", language: Optional[str] = None):
+        self.model_name = model
+        self.device = device
+        self.language = language
+        self.model = None
+
+    def load(self):
+        if self.model is None:
+            import whisper
+            self.model = whisper.load_model(self.model_name, device=self.device)
+            logger.info(f"Loaded Whisper model {self.model_name} on {self.device}")
+
+    def transcribe(self, audio: AudioSource, language: Optional[str] = None,
+                   context: Optional[Dict] = None) -> Dict[str, Any]:
+        self.load()
+        result = self.model.transcribe(
+            self._decode(audio),
+            language=language or self.language,
+            fp16=self.device != "cpu"
+        )
+        raw_segments = result.get("segments", [])
+        # Compact table: cheaper to pickle back from the worker than dicts
+        segments = SegmentTable.from_segments(
+            {"start_time": segment["start"], "end_time": segment["end"], "text": segment["text"].strip()}
+            for segment in raw_segments
+        )
+        # Mean per-token probability across segments
+        log_probs = [segment["avg_logprob"] for segment in raw_segments if "avg_logprob" in segment]
+        return {
+            "text": result["text"].strip(),
+            "confidence": math.exp(sum(log_probs) / len(log_probs)) if log_probs else 0.0,
+            "segments": segments,
+            "language": result.get("language", language or self.language),
+            "duration": segments[-1]["end_time"] if segments else 0.0
+        }
+
+    def _decode(self, audio: AudioSource):
+        """
+        Whisper takes 16kHz float32 samples or a path it decodes via ffmpeg
+
+        Normalized audio (16-bit mono WAV at 16kHz) is read directly from a
+        view of the buffer or file; other files are left to ffmpeg.
+        """
+        import numpy as np
+        import whisper
+        samples = pcm16_mono_view(audio, whisper.audio.SAMPLE_RATE)
+        if samples is None:
+            if isinstance(audio, str):
+                return audio
+            raise ValueError("In-memory audio must be 16-bit mono PCM WAV at 16kHz")
+        return samples.astype(np.float32) / 32768.0
+
+
+ASR_BACKENDS = {
+    StubASRBackend.name: StubASRBackend,
+    WhisperASRBackend.name: WhisperASRBackend
+}
+
+
+def create_asr_backend(backend: Optional[str] = "stub", **options) -> ASRBackend:
+    """Instantiate an ASR backend by name"""
+    try:
+        return ASR_BACKENDS[backend or "stub"](**options)
+    except KeyError:
+        raise ValueError(f"Unknown ASR backend: {backend}")
+
+
+# Backend instance owned by the current worker process
+_worker_backend: Optional[ASRBackend] = None
+
+
+def _init_asr_worker(backend: str, options: Dict):
+    """Build and load the worker-local model once per process"""
+    global _worker_backend
+    _worker_backend = create_asr_backend(backend, **options)
+    _worker_backend.load()
+
+
+def _transcribe_in_worker(audio: AudioSource, language: Optional[str], context: Optional[Dict]):
+    return _worker_backend.transcribe(audio, language, context)
+
+
+def _transcribe_window(backend: ASRBackend, audio: AudioSource,
+                       window: Optional[Tuple[int, int]], language: Optional[str]):
+    """Transcribe frames [start, end) of a WAV recording (all of it if window is None)"""
+    if window is not None:
+        audio = read_wav_window(audio, *window)
+    return backend.transcribe(audio, language)
+
+
+def _transcribe_window_in_worker(audio: AudioSource, window: Optional[Tuple[int, int]],
+                                 language: Optional[str]):
+    return _transcribe_window(_worker_backend, audio, window, language)
+
+
+def _warm_up_asr_worker():
+    return os.getpid()
+
+
+class ASRWorkerPool:
+    """Process pool of warm ASR models behind a bounded job queue"""
+
+    def __init__(self, backend: str = "stub", options: Optional[Dict] = None,
+                 max_workers: int = 1, max_pending: int = 4,
+                 queue_timeout: Optional[float] = None):
+        """
+        Args:
+            backend: ASR backend name
+            options: Backend constructor options (model, device, language)
+            max_workers: Model worker processes; 0 runs the backend on a thread
+                of this process (stub and tests only)
+            max_pending: Jobs allowed to wait for a worker before callers block
+            queue_timeout: Seconds a caller waits for a slot before ASRBusy
+        """
+        self.backend = backend
+        self.options = dict(options or {})
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max(1, max_workers) + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inline: Optional[ASRBackend] = None
+        self.in_flight = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Process pool, created on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_asr_worker,
+                initargs=(self.backend, self.options)
+            )
+            logger.info(f"Started {self.backend} ASR pool with {self.max_workers} processes")
+        return self._executor
+
+    @property
+    def has_idle_worker(self) -> bool:
+        """Whether a job started now would run without queueing (best-effort work)"""
+        return self.in_flight < max(1, self.max_workers)
+
+    async def transcribe(self, audio: AudioSource, language: Optional[str] = None,
+                         context: Optional[Dict] = None) -> Dict[str, Any]:
+        """Queue one transcription job, waiting for a free slot if the queue is full"""
+        await self._acquire_slot()
+        try:
+            if self.max_workers == 0:
+                return await asyncio.to_thread(self._inline_backend().transcribe, audio, language, context)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, _transcribe_in_worker, audio, language, context)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def transcribe_windows(self, audio: AudioSource, windows: Sequence[Tuple[int, int]],
+                                 language: Optional[str] = None,
+                                 completed: Optional[Dict[int, Dict[str, Any]]] = None,
+                                 on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None
+                                 ) -> List[Dict[str, Any]]:
+        """
+        Transcribe frame windows of one WAV recording concurrently across the workers
+
+        The recording takes a single queue slot; its windows then spread over
+        the workers, at most one window per worker at a time, so the
+        executor's own queue never holds more than a worker's worth of them
+        and live jobs do not wait behind the whole recording. Every running
+        window counts in in_flight. Workers read their window straight from a
+        file path, so only in-memory audio is sliced here.
+
+        Args:
+            completed: Results by window index from an earlier attempt; not redone
+            on_result: Awaited with (index, result) as each remaining window finishes
+        """
+        completed = completed or {}
+        remaining = [index for index in range(len(windows)) if index not in completed]
+        await self._acquire_slot()
+        # Inline threads are not a fixed pool; bound them by the queue capacity instead
+        window_slots = asyncio.Semaphore(self.max_workers or (1 + self.max_pending))
+        running = 0
+        try:
+            loop = asyncio.get_running_loop()
+            backend = self._inline_backend() if self.max_workers == 0 else None
+
+            async def run(index: int) -> Dict[str, Any]:
+                nonlocal running
+                async with window_slots:
+                    # The recording's queue slot already counts its first running window
+                    running += 1
+                    if running > 1:
+                        self.in_flight += 1
+                    try:
+                        result = await transcribe(windows[index])
+                    finally:
+                        if running > 1:
+                            self.in_flight -= 1
+                        running -= 1
+                if on_result is not None:
+                    await on_result(index, result)
+                return result
+
+            async def transcribe(window: Tuple[int, int]) -> Dict[str, Any]:
+                if backend is not None:
+                    return await asyncio.to_thread(_transcribe_window, backend, audio, window, language)
+                if isinstance(audio, str):
+                    return await loop.run_in_executor(
+                        self.executor, _transcribe_window_in_worker, audio, window, language
+                    )
+                return await loop.run_in_executor(
+                    self.executor, _transcribe_window_in_worker, read_wav_window(audio, *window), None, language
+                )
+
+            results = dict(zip(remaining, await asyncio.gather(*[run(index) for index in remaining])))
+            return [completed[index] if index in completed else results[index] for index in range(len(windows))]
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _acquire_slot(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ASRBusy(f"ASR queue full ({self.in_flight} jobs in flight)")
+        self.in_flight += 1
+
+    def _inline_backend(self) -> ASRBackend:
+        if self._inline is None:
+            self._inline = create_asr_backend(self.backend, **self.options)
+            self._inline.load()
+        return self._inline
+
+    async def warm_up(self):
+        """Start the workers and load their models before the first request"""
+        if self.max_workers == 0:
+            await asyncio.to_thread(self._inline_backend)
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self.executor, _warm_up_asr_worker)
+            for _ in range(self.max_workers)
+        ])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "capacity": max(1, self.max_workers) + self.max_pending
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,129 @@
+"""
+Streaming Audio Ingest
+
+Reads uploads in fixed-size chunks into a spooled temporary file instead of
+one bytes object. The size limit is checked as chunks arrive, so oversized
+uploads are rejected after at most one extra chunk. Small uploads stay in
+memory and larger ones roll over to disk, so an upload holds at most a few
+MB of memory regardless of its size. Writes that reach the disk run in a
+thread, so a large upload does not block the event loop.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import tempfile
+from typing import BinaryIO, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_MEMORY = 2 * 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Upload exceeded the configured maximum size"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Audio upload exceeds the {max_size // (1024 * 1024)}MB limit")
+        self.max_size = max_size
+
+
+class SpooledAudio:
+    """Uploaded audio held in memory until it outgrows max_memory, then in a temp file"""
+
+    def __init__(self, max_memory: int = SPOOL_MAX_MEMORY):
+        self.max_memory = max_memory
+        self.file: BinaryIO = io.BytesIO()
+        # Set once the upload has rolled over to a named temp file
+        self.path: Optional[str] = None
+        self.size = 0
+
+    def in_memory(self, size: int) -> bool:
+        """True if writing size more bytes stays in memory (no disk I/O)"""
+        return self.path is None and self.size + size <= self.max_memory
+
+    def write(self, data: bytes):
+        if self.path is None and self.size + len(data) > self.max_memory:
+            self._rollover()
+        self.file.write(data)
+        self.size += len(data)
+
+    def _rollover(self):
+        # Named (mode 0600) so worker processes can read it without an IPC copy
+        handle = tempfile.NamedTemporaryFile(prefix='nightingale-audio-', suffix='.upload', delete=False)
+        handle.write(self.file.getbuffer())
+        self.file = handle
+        self.path = handle.name
+
+    def source(self) -> Union[bytes, str]:
+        """Input for another process: the temp file path, or the bytes while still in memory"""
+        if self.path is None:
+            return self.file.getvalue()
+        self.file.flush()
+        return self.path
+
+    def open(self) -> BinaryIO:
+        """Rewound file object for a consumer that reads the whole upload"""
+        self.file.seek(0)
+        return self.file
+
+    def iter_chunks(self, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[memoryview]:
+        """
+        Yield the audio as memoryviews over one reused buffer
+
+        Each view is only valid until the next one is requested.
+        """
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        source = self.open()
+        while True:
+            count = source.readinto(view)
+            if not count:
+                break
+            yield view[:count]
+
+    def close(self):
+        self.file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def spool_upload(upload, max_size: int,
+                       chunk_size: int = UPLOAD_CHUNK_SIZE,
+                       max_memory: int = SPOOL_MAX_MEMORY) -> SpooledAudio:
+    """
+    Copy an upload (anything with an async read(n), e.g. UploadFile) into a spool
+
+    Raises:
+        UploadTooLarge: As soon as more than max_size bytes have arrived
+    """
+    spooled = SpooledAudio(max_memory)
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            if spooled.size + len(chunk) > max_size:
+                raise UploadTooLarge(max_size)
+            if spooled.in_memory(len(chunk)):
+                spooled.write(chunk)
+            else:
+                await asyncio.to_thread(spooled.write, chunk)
+    except BaseException:
+        spooled.close()
+        raise
+
+    logger.debug(f"Spooled {spooled.size} byte audio upload")
+    return spooled
@@ -0,0 +1,227 @@
+"""
+Audio PHI Masking
+
+Masks spoken PHI in recordings. Redacted character spans of the transcript
+are mapped through the transcription timestamps onto sample ranges, and
+those ranges are silenced or replaced by a tone. Audio is processed chunk
+by chunk through NumPy views of each chunk, so memory stays bounded by the
+chunk size and untouched chunks are passed through without copying.
+"""
+
+import logging
+import math
+import wave
+from bisect import bisect_right
+from typing import BinaryIO, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# PCM sample width (bytes) -> little-endian dtype and the value of silence
+PCM_FORMATS = {
+    1: (np.dtype('u1'), 128),
+    2: (np.dtype('<i2'), 0),
+    4: (np.dtype('<i4'), 0)
+}
+
+MASK_MODES = ('zero', 'tone')
+
+
+def locate_segments(text: str, timestamps: List[Dict]) -> List[Tuple[int, int, float, float]]:
+    """
+    Find each timestamped segment in the transcript
+
+    Returns:
+        (char_start, char_end, start_time, end_time) per segment found, in order
+    """
+    located = []
+    cursor = 0
+    lowered = text.lower()
+    for segment in timestamps:
+        segment_text = (segment.get('text') or '').strip().lower()
+        if not segment_text:
+            continue
+        start = lowered.find(segment_text, cursor)
+        if start < 0:
+            continue
+        end = start + len(segment_text)
+        located.append((start, end, float(segment['start_time']), float(segment['end_time'])))
+        cursor = end
+    return located
+
+
+def spans_to_time_ranges(text: str,
+                         timestamps: List[Dict],
+                         char_spans: Sequence[Tuple[int, int]],
+                         padding: float = 0.15) -> List[Tuple[float, float]]:
+    """
+    Map redacted character spans onto merged (start, end) times in seconds
+
+    Times inside a segment are interpolated by character position. A span
+    that cannot be placed inside any segment masks the whole gap between
+    its neighbouring segments, so unplaced PHI is never left audible.
+    """
+    segments = locate_segments(text, timestamps)
+    if not segments:
+        # No usable alignment: mask the full timestamped extent
+        if char_spans and timestamps:
+            return [(0.0, max(float(s['end_time']) for s in timestamps) + padding)]
+        return []
+
+    segment_starts = [segment[0] for segment in segments]
+
+    def time_at(position: int) -> float:
+        index = bisect_right(segment_starts, position) - 1
+        if index < 0:
+            return 0.0
+        char_start, char_end, start_time, end_time = segments[index]
+        if position >= char_end:
+            # Between segments: round outwards to the next segment start
+            return segments[index + 1][2] if index + 1 < len(segments) else end_time
+        fraction = (position - char_start) / max(1, char_end - char_start)
+        return start_time + fraction * (end_time - start_time)
+
+    def time_before(position: int) -> float:
+        # Start of a span that falls in a gap: back up to the previous segment end
+        index = bisect_right(segment_starts, position) - 1
+        if index >= 0 and position >= segments[index][1]:
+            return segments[index][3]
+        return time_at(position)
+
+    ranges = sorted(
+        (max(0.0, time_before(start) - padding), time_at(end) + padding)
+        for start, end in char_spans
+        if end > start
+    )
+
+    merged: List[Tuple[float, float]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def time_ranges_to_samples(time_ranges: Sequence[Tuple[float, float]],
+                           sample_rate: int) -> List[Tuple[int, int]]:
+    """Convert (start, end) seconds to [start, end) frame indices, rounded outwards"""
+    return [
+        (max(0, math.floor(start * sample_rate)), math.ceil(end * sample_rate))
+        for start, end in time_ranges
+    ]
+
+
+class AudioMasker:
+    """Chunked silencing / tone replacement of PCM sample ranges"""
+
+    def __init__(self, mode: str = 'zero', tone_hz: float = 1000.0,
+                 tone_level: float = 0.1, chunk_frames: int = 65536):
+        """
+        Args:
+            mode: 'zero' silences masked ranges, 'tone' replaces them with a beep
+            tone_hz: Frequency of the replacement tone
+            tone_level: Tone amplitude as a fraction of full scale
+            chunk_frames: Frames read, masked and written per step
+        """
+        if mode not in MASK_MODES:
+            raise ValueError(f"Unknown mask mode: {mode}")
+        self.mode = mode
+        self.tone_hz = tone_hz
+        self.tone_level = tone_level
+        self.chunk_frames = chunk_frames
+
+    def mask_chunk(self, chunk: bytes, first_frame: int, sample_ranges: Sequence[Tuple[int, int]],
+                   sample_width: int, channels: int, sample_rate: int) -> bytes:
+        """
+        Mask the parts of one PCM chunk that fall in the sample ranges
+
+        Args:
+            chunk: Interleaved PCM frames
+            first_frame: Absolute index of the chunk's first frame
+            sample_ranges: Sorted, non-overlapping [start, end) frame ranges
+        Returns:
+            The chunk itself if nothing overlaps, otherwise a masked copy
+        """
+        dtype, silence = self._pcm_format(sample_width)
+        frame_count = len(chunk) // (sample_width * channels)
+        last_frame = first_frame + frame_count
+
+        # Ranges overlapping this chunk (ranges are sorted by start)
+        first = bisect_right([end for _, end in sample_ranges], first_frame)
+        overlapping = []
+        for start, end in sample_ranges[first:]:
+            if start >= last_frame:
+                break
+            overlapping.append((max(start, first_frame) - first_frame, min(end, last_frame) - first_frame))
+        if not overlapping:
+            return chunk
+
+        masked = bytearray(chunk)
+        frames = np.frombuffer(masked, dtype=dtype, count=frame_count * channels).reshape(frame_count, channels)
+        for start, end in overlapping:
+            if self.mode == 'zero':
+                frames[start:end] = silence
+            else:
+                frames[start:end] = self._tone(first_frame + start, end - start, dtype, silence, sample_rate)[:, None]
+        return bytes(masked)
+
+    def mask_wav(self, source: BinaryIO, destination: BinaryIO,
+                 time_ranges: Sequence[Tuple[float, float]]) -> Dict[str, float]:
+        """
+        Stream a PCM WAV file from source to destination with ranges masked
+
+        Raises:
+            ValueError: If the input is not uncompressed 8/16/32-bit PCM WAV
+        """
+        try:
+            reader = wave.open(source, 'rb')
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f"Unsupported audio format: {e}")
+
+        with reader:
+            channels = reader.getnchannels()
+            sample_width = reader.getsampwidth()
+            sample_rate = reader.getframerate()
+            total_frames = reader.getnframes()
+            self._pcm_format(sample_width)
+
+            sample_ranges = time_ranges_to_samples(time_ranges, sample_rate)
+
+            writer = wave.open(destination, 'wb')
+            writer.setnchannels(channels)
+            writer.setsampwidth(sample_width)
+            writer.setframerate(sample_rate)
+            writer.setnframes(total_frames)  # header written once, no seek needed
+
+            position = 0
+            with writer:
+                while True:
+                    chunk = reader.readframes(self.chunk_frames)
+                    if not chunk:
+                        break
+                    writer.writeframesraw(self.mask_chunk(
+                        chunk, position, sample_ranges, sample_width, channels, sample_rate
+                    ))
+                    position += len(chunk) // (sample_width * channels)
+
+        masked_frames = sum(min(end, position) - min(start, position) for start, end in sample_ranges)
+        return {
+            "duration": position / sample_rate,
+            "masked_seconds": masked_frames / sample_rate,
+            "masked_ranges": len(sample_ranges)
+        }
+
+    def _tone(self, first_frame: int, count: int, dtype: np.dtype, silence: int, sample_rate: int) -> np.ndarray:
+        """Tone samples for absolute frames [first_frame, first_frame + count), phase-continuous across chunks"""
+        amplitude = self.tone_level * (np.iinfo(dtype).max - silence)
+        phase = (2 * np.pi * self.tone_hz / sample_rate) * np.arange(first_frame, first_frame + count)
+        return (silence + amplitude * np.sin(phase)).astype(dtype)
+
+    @staticmethod
+    def _pcm_format(sample_width: int) -> Tuple[np.dtype, int]:
+        try:
+            return PCM_FORMATS[sample_width]
+        except KeyError:
+            raise ValueError(f"Unsupported PCM sample width: {sample_width * 8} bits")
@@ -0,0 +1,379 @@
+"""
+PCM Normalization and Resampling
+
+Brings incoming WAV audio to the 16-bit mono format at audio_sample_rate
+that ASR expects, once, before any other stage. The RIFF header is parsed
+directly. Samples are wrapped as NumPy views over the upload, memory-mapped
+when it is on disk, so nothing is decoded or copied up front. Audio is then
+processed one chunk at a time: downmixed to mono, resampled with a
+streaming polyphase filter and written out. Intermediate float buffers are
+borrowed from a BufferPool and returned after each chunk, so a long
+recording allocates a handful of buffers in total.
+"""
+
+import io
+import logging
+import math
+import os
+import struct
+import tempfile
+import threading
+import wave
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+AudioSource = Union[bytes, str]
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, sample width) -> little-endian dtype, zero level and full scale
+SAMPLE_FORMATS = {
+    (WAVE_FORMAT_PCM, 1): (np.dtype('u1'), 128.0, 128.0),
+    (WAVE_FORMAT_PCM, 2): (np.dtype('<i2'), 0.0, 32768.0),
+    (WAVE_FORMAT_PCM, 4): (np.dtype('<i4'), 0.0, 2147483648.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 4): (np.dtype('<f4'), 0.0, 1.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 8): (np.dtype('<f8'), 0.0, 1.0),
+}
+
+
+class WavHeader(NamedTuple):
+    format_tag: int
+    channels: int
+    sample_rate: int
+    sample_width: int
+    data_offset: int
+    frames: int
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+
+def parse_wav_header(data) -> Optional[WavHeader]:
+    """
+    Locate the fmt and data chunks of a RIFF/WAVE buffer
+
+    Returns:
+        The header, or None if the buffer is not a WAV file
+    Raises:
+        ValueError: For a WAV file that is malformed
+    """
+    view = memoryview(data)
+    if len(view) < 12 or bytes(view[0:4]) != b'RIFF' or bytes(view[8:12]) != b'WAVE':
+        return None
+
+    fmt = None
+    position = 12
+    while position + 8 <= len(view):
+        chunk_id = bytes(view[position:position + 4])
+        chunk_size, = struct.unpack_from('<I', view, position + 4)
+        body = position + 8
+        if chunk_id == b'fmt ':
+            format_tag, channels, sample_rate, _, block_align, bits = struct.unpack_from('<HHIIHH', view, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # First two bytes of the SubFormat GUID carry the real format tag
+                format_tag, = struct.unpack_from('<H', view, body + 24)
+            fmt = (format_tag, channels, sample_rate, block_align // max(1, channels))
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes its fmt chunk")
+            format_tag, channels, sample_rate, sample_width = fmt
+            # Streamed WAVs may leave the size unset; trust the buffer instead
+            size = min(chunk_size, len(view) - body)
+            return WavHeader(format_tag, channels, sample_rate, sample_width,
+                             body, size // (channels * sample_width))
+        position = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no data chunk")
+
+
+def map_audio(source: AudioSource) -> np.ndarray:
+    """Zero-copy byte view of audio bytes or a file (memory-mapped)"""
+    if isinstance(source, str):
+        if os.path.getsize(source) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(source, dtype=np.uint8, mode='r')
+    return np.frombuffer(source, dtype=np.uint8)
+
+
+def pcm16_mono_view(source: AudioSource, sample_rate: int) -> Optional[np.ndarray]:
+    """int16 view of the samples if the audio is already 16-bit mono PCM WAV at sample_rate"""
+    data = map_audio(source)
+    header = parse_wav_header(data)
+    if header is None or (header.format_tag, header.sample_width, header.channels,
+                          header.sample_rate) != (WAVE_FORMAT_PCM, 2, 1, sample_rate):
+        return None
+    return data[header.data_offset:header.data_offset + header.frames * 2].view('<i2')
+
+
+class BufferPool:
+    """Free lists of reusable NumPy buffers, bucketed by dtype and power-of-two capacity"""
+
+    def __init__(self, max_per_bucket: int = 8):
+        self.max_per_bucket = max_per_bucket
+        self.allocations = 0
+        self._free: Dict[Tuple[str, int], List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, size: int, dtype=np.float32) -> np.ndarray:
+        """A buffer of exactly size elements (contents undefined)"""
+        capacity = 1 << max(0, size - 1).bit_length()
+        key = (np.dtype(dtype).str, capacity)
+        with self._lock:
+            free = self._free.get(key)
+            base = free.pop() if free else None
+            if base is None:
+                self.allocations += 1
+        if base is None:
+            base = np.empty(capacity, dtype=dtype)
+        return base[:size]
+
+    def release(self, buffer: np.ndarray):
+        base = buffer.base if buffer.base is not None else buffer
+        key = (base.dtype.str, len(base))
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_bucket:
+                free.append(base)
+
+    @contextmanager
+    def borrow(self, size: int, dtype=np.float32) -> Iterator[np.ndarray]:
+        buffer = self.acquire(size, dtype)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (windowed-sinc FIR, polyphase form)
+
+    Output sample n sits at input position n * down / up. Its value is one
+    dot product between the taps_per_phase most recent inputs and one of
+    `up` sub-filters. Outputs sharing a sub-filter are evenly spaced
+    windows of the input, so each sub-filter is applied to a whole chunk
+    with a single strided matrix-vector product.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int, taps_per_phase: int = 32,
+                 pool: Optional[BufferPool] = None):
+        divisor = math.gcd(source_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = source_rate // divisor
+        self.taps = taps_per_phase
+        self.pool = pool or BufferPool()
+
+        # Filter group delay, a whole number of output samples, trimmed from the start
+        length = self.taps * self.up
+        self._skip = int(round((length - 1) / 2 / self.down))
+        center = self._skip * self.down
+
+        # Low-pass just under the narrower Nyquist band, gain `up` to offset zero-stuffing
+        cutoff = 0.45 / max(self.up, self.down)
+        n = np.arange(length) - center
+        half_width = max(center, length - 1 - center)
+        window = np.i0(8.0 * np.sqrt(np.clip(1 - (n / half_width) ** 2, 0, 1))) / np.i0(8.0)
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * window * self.up
+        # Sub-filter p, reversed to line up with an ascending input window
+        self.phases = np.ascontiguousarray(
+            prototype.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32
+        )
+
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.consumed = 0
+        self.produced = 0
+        self._emitted = 0
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resample one chunk
+
+        Returns:
+            A pool buffer the caller must release, or the input itself when rates match
+        """
+        if self.passthrough:
+            return samples
+
+        count_in = len(samples)
+        padded = self.pool.acquire(self.taps - 1 + count_in)
+        padded[:self.taps - 1] = self.history
+        padded[self.taps - 1:] = samples
+        windows = sliding_window_view(padded, self.taps)  # window i ends at input consumed + i
+
+        first = self.produced
+        last = ((self.consumed + count_in) * self.up - 1) // self.down
+        count_out = max(0, last - first + 1)
+        output = self.pool.acquire(count_out)
+        for offset in range(min(self.up, count_out)):
+            n = first + offset
+            phase = (n * self.down) % self.up
+            window = (n * self.down) // self.up - self.consumed
+            rows = len(range(offset, count_out, self.up))
+            np.matmul(windows[window:window + rows * self.down:self.down], self.phases[phase],
+                      out=output[offset::self.up])
+
+        self.history[:] = padded[count_in:]
+        self.pool.release(padded)
+        self.consumed += count_in
+        self.produced += count_out
+        return self._trim(output)
+
+    def flush(self) -> np.ndarray:
+        """Drain the filter tail; returns a pool buffer the caller must release"""
+        expected = int(round(self.consumed * self.up / self.down))
+        remaining = max(0, expected - self._emitted)
+        with self.pool.borrow(self.taps) as zeros:
+            zeros[:] = 0
+            output = self.process(zeros)
+        return output[:remaining]
+
+    def _trim(self, output: np.ndarray) -> np.ndarray:
+        if self._skip:
+            skipped = min(self._skip, len(output))
+            self._skip -= skipped
+            output = output[skipped:]
+        self._emitted += len(output)
+        return output
+
+
+class NormalizedAudio:
+    """16-bit mono WAV at the target rate; owns a temp file for on-disk sources"""
+
+    def __init__(self, source: AudioSource, temp_path: Optional[str] = None):
+        self.source = source
+        self._temp_path = temp_path
+
+    def close(self):
+        if self._temp_path is not None:
+            try:
+                os.unlink(self._temp_path)
+            except FileNotFoundError:
+                pass
+            self._temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AudioNormalizer:
+    """Chunked downmix + resample of WAV audio to 16-bit mono at one sample rate"""
+
+    def __init__(self, target_rate: int = 16000, chunk_frames: int = 65536,
+                 pool: Optional[BufferPool] = None):
+        self.target_rate = target_rate
+        self.chunk_frames = chunk_frames
+        self.pool = pool or BufferPool()
+
+    def frames(self, data: np.ndarray, header: WavHeader, start: int, count: int) -> np.ndarray:
+        """(count, channels) view of the samples, without copying"""
+        dtype = self._sample_format(header)[0]
+        offset = header.data_offset + start * header.frame_size
+        return data[offset:offset + count * header.frame_size].view(dtype).reshape(count, header.channels)
+
+    def needs_normalizing(self, header: WavHeader) -> bool:
+        return not (header.format_tag == WAVE_FORMAT_PCM and header.sample_width == 2
+                    and header.channels == 1 and header.sample_rate == self.target_rate)
+
+    def iter_samples(self, source: AudioSource) -> Iterator[np.ndarray]:
+        """
+        Yield the audio as float32 mono chunks at the target rate
+
+        Each chunk is a pool buffer, only valid until the next one is requested.
+        """
+        data = map_audio(source)
+        header = parse_wav_header(data)
+        if header is None:
+            raise ValueError("Not a WAV file")
+        _, zero, full_scale = self._sample_format(header)
+        resampler = PolyphaseResampler(header.sample_rate, self.target_rate, pool=self.pool)
+        gain = 1.0 / (full_scale * header.channels)
+
+        for start in range(0, header.frames, self.chunk_frames):
+            count = min(self.chunk_frames, header.frames - start)
+            mono = self.pool.acquire(count)
+            np.sum(self.frames(data, header, start, count), axis=1, dtype=np.float32, out=mono)
+            if zero:
+                mono -= zero * header.channels
+            mono *= gain
+
+            resampled = resampler.process(mono)
+            try:
+                yield resampled
+            finally:
+                if resampled is not mono:
+                    self.pool.release(resampled)
+                self.pool.release(mono)
+
+        if not resampler.passthrough:
+            tail = resampler.flush()
+            try:
+                yield tail
+            finally:
+                self.pool.release(tail)
+
+    def normalize(self, source: AudioSource) -> Optional[NormalizedAudio]:
+        """
+        16-bit mono copy of a WAV recording at the target rate
+
+        Returns:
+            None if the audio is not WAV or already in the target format
+        Raises:
+            ValueError: For a WAV file in an unsupported sample format
+        """
+        header = parse_wav_header(map_audio(source))
+        if header is None or not self.needs_normalizing(header):
+            return None
+        self._sample_format(header)
+
+        expected = int(round(header.frames * self.target_rate / header.sample_rate))
+        if isinstance(source, str):
+            handle = tempfile.NamedTemporaryFile(prefix='nightingale-pcm-', suffix='.wav', delete=False)
+            with handle:
+                self._write(source, handle, expected)
+            normalized = NormalizedAudio(handle.name, temp_path=handle.name)
+        else:
+            buffer = io.BytesIO()
+            self._write(source, buffer, expected)
+            normalized = NormalizedAudio(buffer.getvalue())
+
+        logger.debug(f"Normalized {header.channels}ch {header.sample_rate}Hz audio to mono {self.target_rate}Hz")
+        return normalized
+
+    def _write(self, source: AudioSource, destination, frames: int):
+        writer = wave.open(destination, 'wb')
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(self.target_rate)
+        writer.setnframes(frames)
+        with writer:
+            for samples in self.iter_samples(source):
+                np.clip(samples, -1.0, 1.0, out=samples)
+                samples *= 32767.0
+                np.rint(samples, out=samples)
+                with self.pool.borrow(len(samples), np.dtype('<i2')) as pcm:
+                    np.copyto(pcm, samples, casting='unsafe')
+                    writer.writeframesraw(pcm.data)
+
+    @staticmethod
+    def _sample_format(header: WavHeader) -> Tuple[np.dtype, float, float]:
+        try:
+            return SAMPLE_FORMATS[(header.format_tag, header.sample_width)]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported WAV sample format: tag {header.format_tag}, {header.sample_width * 8} bits"
+            )
@@ -1,11 +1,28 @@
 """
-Simplified Audio Processor for MVP
-Mock audio processing until we install Whisper
+Audio Processor
+Transcribes recordings and live chunks through a pluggable ASR backend
+running in a warm model-worker pool (see asr_backend)
 """
 
-from typing import Dict, Any, List
-from dataclasses import dataclass
+from typing import Awaitable, BinaryIO, Callable, Dict, Any, List, Optional, Tuple, Union
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 import asyncio
+import hashlib
+import hmac
+import logging
+
+from .asr_backend import AudioSource, ASRWorkerPool
+from .audio_ingest import SpooledAudio
+from .audio_normalizer import AudioNormalizer
+from .stitcher import plan_windows, stitch_transcripts, wav_format
+from .segment_table import SegmentTable
+from .session_registry import SessionRegistry, StreamingSession
+from .stream_segmenter import AudioSegment, StreamSegmenter
+from .transcription_cache import TranscriptionCache, audio_hmac
+from .vad import VoiceActivityDetector
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -13,54 +30,305 @@ class TranscriptionResult:
     """Audio transcription result"""
     text: str
     confidence: float
-    timestamps: List[Dict]
+    timestamps: SegmentTable  # read-only sequence of {start_time, end_time, text} dicts
     metadata: Dict[str, Any]
 
 
+@dataclass
+class WindowCheckpoint:
+    """Windows of a long recording finished by an earlier attempt, and where to record new ones"""
+    completed: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    save: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None
+
+
 class AudioProcessor:
-    """Mock audio processor for development"""
-    
-    def __init__(self):
-        self.sessions = {}
-    
-    async def transcribe_audio(self, audio_data: bytes) -> TranscriptionResult:
-        """Mock transcription - returns demo text"""
-        
-        # Simulate processing delay
-        await asyncio.sleep(0.1)
-        
-        # Mock transcription result
-        mock_text = "Patient reports headache with pain level 7 out of 10. Duration approximately three days."
-        
-        return TranscriptionResult(
-            text=mock_text,
-            confidence=0.95,
-            timestamps=[
-                {"start_time": 0.0, "end_time": 5.2, "text": "Patient reports headache"},
-                {"start_time": 5.3, "end_time": 10.1, "text": "with pain level 7 out of 10"},
-                {"start_time": 10.2, "end_time": 15.8, "text": "Duration approximately three days"}
-            ],
-            metadata={"mock": True, "language": "en"}
+    """Audio processor dispatching transcription to ASR worker processes"""
+
+    def __init__(self, backend: str = "stub", model: str = "base", device: str = "cpu",
+                 language: Optional[str] = "en", max_workers: int = 0,
+                 max_pending: int = 4, queue_timeout: Optional[float] = None,
+                 chunk_duration: Optional[float] = 30.0, chunk_overlap: float = 2.0,
+                 normalizer: Optional[AudioNormalizer] = None,
+                 vad: Optional[VoiceActivityDetector] = None,
+                 stream_segment_seconds: float = 2.0,
+                 max_sessions: int = 256, session_idle_timeout: float = 900.0,
+                 cache: Optional[TranscriptionCache] = None):
+        """
+        Args:
+            backend: ASR backend name (stub or whisper)
+            model, device, language: Backend model options
+            max_workers: Model worker processes, 0 = a thread in this process
+            max_pending: Queued jobs before callers wait for a slot
+            queue_timeout: Seconds to wait for a slot before ASRBusy
+            chunk_duration: Window length for splitting long WAV recordings, None = never split
+            chunk_overlap: Seconds shared by consecutive windows
+            normalizer: Converts WAV input to the ASR format, None = pass audio through
+            vad: Detector used to cut silence before ASR, None = transcribe everything
+            stream_segment_seconds: Length of the segments cut from live streams
+            max_sessions: Live sessions kept before the least recently used is evicted
+            session_idle_timeout: Seconds without audio before a live session is evicted
+            cache: Store of finished transcriptions for repeated uploads, None = no caching
+        """
+        self.sessions = SessionRegistry(max_sessions, session_idle_timeout)
+        self.backend = backend
+        self.language = language
+        self.chunk_duration = chunk_duration
+        self.chunk_overlap = chunk_overlap
+        self.normalizer = normalizer
+        self.vad = vad
+        self.stream_segment_seconds = stream_segment_seconds
+        options = {"model": model, "device": device, "language": language} if backend != "stub" else {}
+        self.pool = ASRWorkerPool(backend, options, max_workers, max_pending, queue_timeout)
+        self.cache = cache
+        # Everything that changes the transcript of a recording, for cache keys
+        self.config_fingerprint = repr((
+            backend, model, device, language, chunk_duration, chunk_overlap,
+            normalizer.target_rate if normalizer else None,
+            vars(vad) if vad else None
+        ))
+
+    async def transcribe_audio(self, audio_data: Union[bytes, SpooledAudio, BinaryIO],
+                               checkpoint: Optional[WindowCheckpoint] = None,
+                               digest: Optional[str] = None) -> TranscriptionResult:
+        """Transcribe a complete recording
+
+        A spooled upload that has rolled over to disk is passed to the
+        worker by path, so large recordings are not copied between processes.
+        WAV audio is first normalized to 16-bit mono at the ASR sample rate.
+        Silence is then cut out when a VAD is configured; timestamps are
+        mapped back so they still refer to the original recording.
+        WAV recordings longer than chunk_duration are split into overlapping
+        windows transcribed in parallel and stitched back together.
+        With a cache configured, a repeated upload of the same audio returns
+        the stored result (metadata["cached"] = True) without running ASR.
+        With a checkpoint, windows finished by an earlier attempt are reused
+        and each newly finished window is saved, so a retry only transcribes
+        the remaining audio. A digest from recording_digest() is used as the
+        cache key instead of hashing the audio again.
+        """
+        source = self._source(audio_data)
+
+        if self.cache is None:
+            return await self._transcribe_recording(source, checkpoint)
+
+        try:
+            cache_key = digest or await asyncio.to_thread(self.cache.key, source, self.config_fingerprint)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+        except OSError as e:
+            logger.warning(f"Transcription cache unavailable: {e}")
+            return await self._transcribe_recording(source, checkpoint)
+        if cached is not None:
+            result = TranscriptionResult(**{**cached, "timestamps": SegmentTable.from_columns(cached["timestamps"])})
+            result.metadata["cached"] = True
+            return result
+
+        result = await self._transcribe_recording(source, checkpoint)
+        entry = {
+            "text": result.text,
+            "confidence": result.confidence,
+            "timestamps": result.timestamps.to_columns(),
+            "metadata": result.metadata
+        }
+        try:
+            await asyncio.to_thread(self.cache.put, cache_key, entry)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Transcription not cached: {e}")
+        return result
+
+    async def recording_digest(self, audio_data: Union[bytes, SpooledAudio], secret_key: str) -> str:
+        """
+        Keyed hash of a recording and this transcription config
+
+        With a cache configured this is the recording's cache key, so passing
+        it to transcribe_audio() hashes the audio only once per request.
+        """
+        source = self._source(audio_data)
+        if self.cache is not None:
+            return await asyncio.to_thread(self.cache.key, source, self.config_fingerprint)
+        return await asyncio.to_thread(audio_hmac, secret_key.encode(), source, self.config_fingerprint)
+
+    @staticmethod
+    def recording_key(digest: str, secret_key: str, scope: str) -> str:
+        """
+        Job id of a recording digest within a scope (e.g. the patient)
+
+        Stable across retries of the same upload, for resuming checkpoints.
+        """
+        return hmac.new(secret_key.encode(), f"{scope}\0{digest}".encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _source(audio_data: Union[bytes, SpooledAudio, BinaryIO]) -> AudioSource:
+        if isinstance(audio_data, SpooledAudio):
+            return audio_data.source()
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            return bytes(audio_data)
+        return audio_data.read()
+
+    async def _transcribe_recording(self, source: AudioSource,
+                                    checkpoint: Optional[WindowCheckpoint] = None) -> TranscriptionResult:
+        """Normalize, cut silence, transcribe and stitch one recording"""
+        with ExitStack() as stack:
+            if self.normalizer is not None:
+                normalized = await self._run_stage(self.normalizer.normalize, source, "Audio normalization")
+                if normalized is not None:
+                    source = stack.enter_context(normalized).source
+
+            compacted = None
+            if self.vad is not None and wav_format(source) is not None:
+                compacted = await self._run_stage(self.vad.compact, source, "Voice activity detection")
+
+            if compacted is None:
+                result, metadata = await self._transcribe_source(source, checkpoint)
+                return self._to_result(result, metadata)
+
+            with compacted:
+                if compacted.speech_seconds == 0:
+                    # Nothing but silence: no ASR call at all
+                    result = {"text": "", "confidence": 0.0, "segments": [], "language": self.language}
+                    metadata = {"backend": self.backend}
+                else:
+                    result, metadata = await self._transcribe_source(compacted.source, checkpoint)
+                    result["segments"] = compacted.time_map.remap_segments(result["segments"])
+
+        result["duration"] = compacted.original_duration
+        metadata["speech_seconds"] = compacted.speech_seconds
+        metadata["silence_removed_seconds"] = compacted.original_duration - compacted.speech_seconds
+        return self._to_result(result, metadata)
+
+    @staticmethod
+    async def _run_stage(stage: Callable[[AudioSource], Any], source: AudioSource, name: str):
+        """Run a NumPy audio stage off the event loop; unsupported audio skips it"""
+        try:
+            return await asyncio.to_thread(stage, source)
+        except ValueError as e:
+            logger.warning(f"{name} skipped: {e}")
+            return None
+
+    async def _transcribe_source(self, source: AudioSource,
+                                 checkpoint: Optional[WindowCheckpoint] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """ASR result and metadata for raw audio, split into windows when long"""
+        audio_format = wav_format(source) if self.chunk_duration else None
+        if audio_format is None or audio_format.duration <= self.chunk_duration + self.chunk_overlap:
+            return await self.pool.transcribe(source, self.language), {"backend": self.backend}
+
+        windows = plan_windows(audio_format.frames, audio_format.sample_rate,
+                               self.chunk_duration, self.chunk_overlap)
+        checkpoint = checkpoint or WindowCheckpoint()
+        resumed = sum(1 for index in checkpoint.completed if index < len(windows))
+        if resumed:
+            logger.info(f"Resuming transcription: {resumed} of {len(windows)} windows already done")
+        results = await self.pool.transcribe_windows(
+            source, windows, self.language, checkpoint.completed, checkpoint.save
+        )
+        result = stitch_transcripts(
+            results,
+            [(start / audio_format.sample_rate, end / audio_format.sample_rate) for start, end in windows],
+            audio_format.duration
+        )
+        metadata = {"backend": self.backend, "windows": len(windows)}
+        if resumed:
+            metadata["resumed_windows"] = resumed
+        return result, metadata
+
+    async def start_streaming_session(self, session_id: str, sample_rate: Optional[int] = None,
+                                      channels: int = 1) -> Dict:
+        """Start streaming session, ready for raw 16-bit PCM via feed_stream()"""
+        segmenter = StreamSegmenter(
+            sample_rate or (self.normalizer.target_rate if self.normalizer else 16000),
+            channels,
+            segment_seconds=self.stream_segment_seconds
         )
-    
-    async def start_streaming_session(self, session_id: str) -> Dict:
-        """Start mock streaming session"""
-        self.sessions[session_id] = {"status": "active", "chunks": []}
-        return {"session_id": session_id, "status": "started"}
-    
+        self.sessions.create(session_id, segmenter)
+        return {
+            "session_id": session_id,
+            "status": "started",
+            "sample_rate": segmenter.sample_rate,
+            "segment_seconds": self.stream_segment_seconds
+        }
+
+    async def streaming_session(self, session_id: str) -> StreamingSession:
+        """Active session by id, started if it does not exist or has been evicted"""
+        try:
+            return self.sessions.get(session_id)
+        except KeyError:
+            await self.start_streaming_session(session_id)
+            return self.sessions.get(session_id)
+
+    def feed_stream(self, session_id: str, data: bytes) -> List[AudioSegment]:
+        """
+        Buffer streamed PCM and return the segments completed by it
+
+        Raises:
+            KeyError: If the session has ended or was evicted
+        """
+        return self.sessions.get(session_id).segmenter.feed(data)
+
+    def pending_segment(self, session_id: str) -> Optional[AudioSegment]:
+        """
+        Audio of the segment still accumulating, for an interim transcription
+
+        Raises:
+            KeyError: If the session has ended or was evicted
+        """
+        return self.sessions.get(session_id).segmenter.pending()
+
+    def finish_streaming_session(self, session_id: str) -> Optional[AudioSegment]:
+        """End a streaming session, returning its last partial segment"""
+        session = self.sessions.finalize(session_id)
+        return session.segmenter.flush() if session else None
+
+    def abort_streaming_session(self, session_id: str):
+        """End a streaming session, discarding any buffered audio"""
+        self.sessions.abort(session_id)
+
+    async def transcribe_segment(self, segment: AudioSegment, metadata: Dict) -> TranscriptionResult:
+        """
+        Transcribe one live-stream segment, with timestamps on the stream timeline
+
+        metadata["is_final"] = False marks an interim hypothesis of a segment
+        still accumulating; it is carried into the result metadata.
+        """
+        metadata = {"is_final": True, **metadata, "timestamp": segment.start_time, "sequence": segment.sequence}
+        audio = segment.audio
+        if self.normalizer is not None:
+            normalized = await self._run_stage(self.normalizer.normalize, audio, "Audio normalization")
+            if normalized is not None:
+                audio = normalized.source
+
+        result = await self.transcribe_chunk(audio, metadata)
+        result.timestamps = result.timestamps.shifted(segment.start_time)
+        return result
+
     async def transcribe_chunk(self, chunk_data: bytes, metadata: Dict) -> TranscriptionResult:
-        """Mock chunk transcription"""
-        await asyncio.sleep(0.05)
-        
-        chunk_text = f"Audio chunk transcribed at {metadata.get('timestamp', 0)}"
-        
+        """Transcribe one chunk of a live recording"""
+        result = await self.pool.transcribe(chunk_data, self.language, dict(metadata))
+        return self._to_result(result, dict(metadata))
+
+    def _to_result(self, result: Dict[str, Any], metadata: Dict[str, Any]) -> TranscriptionResult:
+        metadata.setdefault("language", result.get("language"))
+        metadata.setdefault("duration", result.get("duration"))
+        if self.backend == "stub":
+            metadata.setdefault("mock", True)
         return TranscriptionResult(
-            text=chunk_text,
-            confidence=0.90,
-            timestamps=[{"start_time": 0.0, "end_time": 3.0, "text": chunk_text}],
+            text=result["text"],
+            confidence=result.get("confidence", 0.0),
+            timestamps=SegmentTable.from_segments(result["segments"]),
             metadata=metadata
         )
-    
-    def health_check(self) -> Dict[str, str]:
+
+    async def warm_up(self):
+        """Load the ASR model in every worker ahead of the first request"""
+        await self.pool.warm_up()
+
+    def shutdown(self):
+        """Stop the ASR workers"""
+        self.pool.shutdown()
+
+    def health_check(self) -> Dict[str, Any]:
         """Health check"""
-        return {"status": "healthy", "type": "mock_processor"}
\ No newline at end of file
+        return {
+            "status": "healthy",
+            "type": f"{self.backend}_processor",
+            "asr_pool": self.pool.stats(),
+            "streaming_sessions": self.sessions.stats()
+        }
@@ -0,0 +1,133 @@
+"""
+Compact Segment Table
+
+Transcript segments (or words) stored column-wise: start and end times
+in two float arrays, and the texts joined into one string with an offset
+array marking where each ends. A long consult then costs a few dozen
+bytes per segment instead of a dict, two floats and a string object
+each, and pickles as three buffers plus one string. The table is a
+read-only Sequence whose items are the familiar
+{"start_time", "end_time", "text"} dicts, built on access, so code
+written against List[Dict] timestamps keeps working.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Sequence, Union, overload
+
+import numpy as np
+
+
+class SegmentTable(Sequence):
+    """Read-only sequence of timed text segments backed by parallel arrays"""
+
+    __slots__ = ('starts', 'ends', 'offsets', 'text')
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, offsets: np.ndarray, text: str):
+        """
+        Args:
+            starts, ends: Segment times in seconds (float64, one per segment)
+            offsets: Text boundaries (int32, one more than there are segments);
+                segment i is text[offsets[i]:offsets[i + 1]]
+            text: Every segment's text, concatenated
+        """
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+        for array in (starts, ends, offsets):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Mapping[str, Any]]) -> "SegmentTable":
+        """Table from {"start_time", "end_time", "text"} dicts (a table is returned as is)"""
+        if isinstance(segments, SegmentTable):
+            return segments
+        starts, ends, texts = [], [], []
+        for segment in segments:
+            starts.append(segment["start_time"])
+            ends.append(segment["end_time"])
+            texts.append(segment.get("text", ""))
+        offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        return cls(np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64),
+                   offsets, "".join(texts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "SegmentTable": ...
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return SegmentTable.from_segments([self[i] for i in range(start, stop, step)])
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop + 1]
+            return SegmentTable(
+                self.starts[start:stop].copy(),
+                self.ends[start:stop].copy(),
+                offsets - offsets[0],
+                self.text[offsets[0]:offsets[-1]]
+            )
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return {
+            "start_time": float(self.starts[index]),
+            "end_time": float(self.ends[index]),
+            "text": self.text[self.offsets[index]:self.offsets[index + 1]]
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        starts, ends, offsets = self.starts.tolist(), self.ends.tolist(), self.offsets.tolist()
+        for index, (start, end) in enumerate(zip(starts, ends)):
+            yield {"start_time": start, "end_time": end, "text": self.text[offsets[index]:offsets[index + 1]]}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SegmentTable):
+            return (self.text == other.text and np.array_equal(self.offsets, other.offsets)
+                    and np.array_equal(self.starts, other.starts) and np.array_equal(self.ends, other.ends))
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SegmentTable({len(self)} segments)"
+
+    def __reduce__(self):
+        return SegmentTable, (self.starts, self.ends, self.offsets, self.text)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def to_columns(self) -> Dict[str, Any]:
+        """JSON-friendly column form (see from_columns)"""
+        return {
+            "start_time": self.starts.tolist(),
+            "end_time": self.ends.tolist(),
+            "offsets": self.offsets.tolist(),
+            "text": self.text
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Any]) -> "SegmentTable":
+        return cls(np.array(columns["start_time"], dtype=np.float64),
+                   np.array(columns["end_time"], dtype=np.float64),
+                   np.array(columns["offsets"], dtype=np.int32),
+                   columns["text"])
+
+    def shifted(self, seconds: float) -> "SegmentTable":
+        """Same segments with every time moved by seconds"""
+        return SegmentTable(self.starts + seconds, self.ends + seconds, self.offsets, self.text)
+
+    def map_times(self, mapping: Callable[[np.ndarray], np.ndarray]) -> "SegmentTable":
+        """Same segments with start and end times passed through a vectorized mapping"""
+        return SegmentTable(mapping(self.starts), mapping(self.ends), self.offsets, self.text)
@@ -0,0 +1,166 @@
+"""
+Streaming Session Registry
+
+Tracks live recording sessions for the lifetime of a worker process.
+Sessions end explicitly (finalize on a clean stop, abort on a dropped
+connection) or are evicted: when idle longer than idle_timeout, and
+least-recently-used first when the registry is over max_sessions or its
+buffered-audio memory budget. Each session's audio waits in the
+segmenter's fixed-capacity ring buffer, so memory is bounded by
+max_sessions and does not creep with uptime.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from .stream_segmenter import StreamSegmenter
+
+logger = logging.getLogger(__name__)
+
+SESSION_ACTIVE = "active"
+SESSION_FINALIZED = "finalized"
+SESSION_ABORTED = "aborted"
+SESSION_EVICTED = "evicted"
+
+
+class StreamingSession:
+    """One live recording: its segmenter plus per-session state owned by callers"""
+
+    def __init__(self, session_id: str, segmenter: StreamSegmenter, now: float):
+        self.session_id = session_id
+        self.segmenter = segmenter
+        self.status = SESSION_ACTIVE
+        self.created_at = now
+        self.last_active = now
+        # Per-session objects kept by callers (e.g. the streaming redactor);
+        # dropped with the session so they cannot outlive it
+        self.attachments: Dict[str, Any] = {}
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.segmenter.memory_bytes
+
+    def close(self, status: str):
+        self.status = status
+        if status != SESSION_FINALIZED:
+            # A finalized session's remaining audio is still to be flushed
+            self.segmenter.release()
+        self.attachments.clear()
+
+
+class SessionRegistry:
+    """Bounded map of active streaming sessions with idle and LRU eviction"""
+
+    def __init__(self, max_sessions: int = 256, idle_timeout: float = 900.0,
+                 max_memory_bytes: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_close: Optional[Callable[[StreamingSession], None]] = None):
+        """
+        Args:
+            max_sessions: Active sessions kept before the least recently used is evicted
+            idle_timeout: Seconds without activity before a session is evicted
+            max_memory_bytes: Budget for all sessions' audio buffers, None = max_sessions only
+            clock: Monotonic time source
+            on_close: Called with each session as it ends, before its attachments
+                are dropped (e.g. to flush held-back transcript)
+        """
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.max_memory_bytes = max_memory_bytes
+        self.clock = clock
+        self.on_close = on_close
+        # Least recently used first
+        self._sessions: "OrderedDict[str, StreamingSession]" = OrderedDict()
+        self._memory_bytes = 0
+        self.counters = {SESSION_FINALIZED: 0, SESSION_ABORTED: 0, SESSION_EVICTED: 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def create(self, session_id: str, segmenter: StreamSegmenter) -> StreamingSession:
+        """Register a new session, replacing (aborting) any with the same id"""
+        self.abort(session_id)
+        now = self.clock()
+        self.evict_idle(now)
+
+        session = StreamingSession(session_id, segmenter, now)
+        self._sessions[session_id] = session
+        self._memory_bytes += session.memory_bytes
+        while len(self._sessions) > self.max_sessions or self._over_budget():
+            oldest = next(iter(self._sessions))
+            if oldest == session_id:
+                break
+            logger.warning(f"Session registry full, evicting least recently used session: {oldest}")
+            self._remove(oldest, SESSION_EVICTED)
+        return session
+
+    def get(self, session_id: str) -> StreamingSession:
+        """
+        Active session by id, marked as used
+
+        Raises:
+            KeyError: If the session does not exist, has ended or was evicted
+        """
+        now = self.clock()
+        self.evict_idle(now)
+        session = self._sessions[session_id]
+        session.last_active = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def finalize(self, session_id: str) -> Optional[StreamingSession]:
+        """End a session cleanly; its segmenter keeps buffered audio for a final flush"""
+        return self._remove(session_id, SESSION_FINALIZED)
+
+    def abort(self, session_id: str) -> Optional[StreamingSession]:
+        """End a session and discard its buffered audio"""
+        return self._remove(session_id, SESSION_ABORTED)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Evict sessions idle longer than idle_timeout, returning how many"""
+        now = self.clock() if now is None else now
+        evicted = 0
+        # Ordered by last use, so only the front can be idle
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_active <= self.idle_timeout:
+                break
+            logger.info(f"Evicting idle streaming session: {session.session_id}")
+            self._remove(session.session_id, SESSION_EVICTED)
+            evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "memory_bytes": self._memory_bytes,
+            **self.counters
+        }
+
+    def _over_budget(self) -> bool:
+        return self.max_memory_bytes is not None and self._memory_bytes > self.max_memory_bytes
+
+    def _remove(self, session_id: str, status: str) -> Optional[StreamingSession]:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return None
+        self._memory_bytes -= session.memory_bytes
+        session.status = status
+        if self.on_close is not None:
+            try:
+                self.on_close(session)
+            except Exception as e:
+                logger.error(f"Session close hook failed for {session_id}: {e}")
+        session.close(status)
+        self.counters[status] += 1
+        return session
@@ -0,0 +1,154 @@
+"""
+Split-and-Stitch Transcription
+
+Long recordings are cut into fixed-length windows that overlap slightly,
+transcribed concurrently, and stitched back together. Each window's
+timestamps are shifted by its start time. Duplicates in an overlap are
+removed by keeping each segment only in the window whose half of the
+overlap contains its midpoint. Words repeated where a sentence was cut at
+a window edge are then dropped.
+"""
+
+import io
+import logging
+import re
+import wave
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Longest repeated word run searched for at a window boundary
+MAX_BOUNDARY_WORDS = 12
+
+_WORD_NORMALIZE = re.compile(r'[^\w]+')
+
+
+class WavFormat(NamedTuple):
+    channels: int
+    sample_width: int
+    sample_rate: int
+    frames: int
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+
+def wav_format(source: Union[bytes, str]) -> Optional[WavFormat]:
+    """Format of PCM WAV audio (bytes or path), None if it is not WAV"""
+    try:
+        with wave.open(source if isinstance(source, str) else io.BytesIO(source), 'rb') as reader:
+            return WavFormat(reader.getnchannels(), reader.getsampwidth(),
+                             reader.getframerate(), reader.getnframes())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+def plan_windows(total_frames: int, sample_rate: int, window_seconds: float,
+                 overlap_seconds: float) -> List[Tuple[int, int]]:
+    """
+    [start, end) frame windows covering the audio
+
+    Consecutive windows share overlap_seconds of audio. A short tail is
+    folded into the last window rather than transcribed on its own.
+    """
+    window = int(window_seconds * sample_rate)
+    overlap = min(int(overlap_seconds * sample_rate), window // 2)
+    if window <= 0 or total_frames <= window + overlap:
+        return [(0, total_frames)]
+
+    stride = window - overlap
+    windows = []
+    start = 0
+    while start + window < total_frames:
+        windows.append((start, start + window))
+        start += stride
+    # Tail shorter than the overlap adds nothing new: extend the last window instead
+    if total_frames - start <= overlap:
+        windows[-1] = (windows[-1][0], total_frames)
+    else:
+        windows.append((start, total_frames))
+    return windows
+
+
+def read_wav_window(source: Union[bytes, str], start_frame: int, end_frame: int) -> bytes:
+    """Frames [start_frame, end_frame) of a WAV file as a standalone WAV"""
+    with wave.open(source if isinstance(source, str) else io.BytesIO(source), 'rb') as reader:
+        reader.setpos(start_frame)
+        frames = reader.readframes(end_frame - start_frame)
+        params = reader.getparams()
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setparams(params)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+
+def _normalize(word: str) -> str:
+    return _WORD_NORMALIZE.sub('', word.lower())
+
+
+def _boundary_overlap(previous: Sequence[str], following: Sequence[str]) -> int:
+    """Length of the longest (>= 2) word run ending previous and starting following"""
+    previous = [_normalize(word) for word in previous[-MAX_BOUNDARY_WORDS:]]
+    following = [_normalize(word) for word in following[:MAX_BOUNDARY_WORDS]]
+    for size in range(min(len(previous), len(following)), 1, -1):
+        if previous[-size:] == following[:size]:
+            return size
+    return 0
+
+
+def stitch_transcripts(results: Sequence[Dict[str, Any]],
+                       windows: Sequence[Tuple[float, float]],
+                       duration: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Merge per-window transcripts into one transcript on the recording timeline
+
+    Args:
+        results: Backend results (text, confidence, segments, language), one per window
+        windows: (start, end) of each window in seconds, in order
+        duration: Total recording length, defaults to the last window end
+    Returns:
+        Result dict in the backend format, with global timestamps
+    """
+    segments: List[Dict[str, Any]] = []
+    weighted_confidence = 0.0
+    covered = 0.0
+
+    for index, (result, (window_start, window_end)) in enumerate(zip(results, windows)):
+        # This window owns [keep_from, keep_until) of the timeline
+        keep_from = (window_start + windows[index - 1][1]) / 2 if index > 0 else float('-inf')
+        keep_until = (windows[index + 1][0] + window_end) / 2 if index + 1 < len(windows) else float('inf')
+
+        kept = []
+        for segment in result.get("segments", []):
+            start = segment["start_time"] + window_start
+            end = segment["end_time"] + window_start
+            if keep_from <= (start + end) / 2 < keep_until:
+                kept.append({**segment, "start_time": start, "end_time": end})
+
+        # A sentence cut at the previous window's edge reappears whole in this one
+        if segments and kept and kept[0]["start_time"] < windows[index - 1][1]:
+            repeated = _boundary_overlap(segments[-1]["text"].split(), kept[0]["text"].split())
+            if repeated:
+                remainder = kept[0]["text"].split()[repeated:]
+                if remainder:
+                    kept[0] = {**kept[0], "text": " ".join(remainder),
+                               "start_time": max(kept[0]["start_time"], segments[-1]["end_time"])}
+                else:
+                    kept.pop(0)
+
+        segments.extend(kept)
+        owned = min(keep_until, window_end) - max(keep_from, window_start)
+        weighted_confidence += result.get("confidence", 0.0) * owned
+        covered += owned
+
+    languages = [result.get("language") for result in results if result.get("language")]
+    return {
+        "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+        "confidence": weighted_confidence / covered if covered else 0.0,
+        "segments": segments,
+        "language": max(set(languages), key=languages.count) if languages else None,
+        "duration": duration if duration is not None else (windows[-1][1] if windows else 0.0)
+    }
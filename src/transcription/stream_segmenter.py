@@ -0,0 +1,198 @@
+"""
+Live Audio Segmentation
+
+Turns a continuous stream of raw PCM frames (e.g. from a WebSocket) into
+short WAV segments for transcription. A segment is emitted as soon as
+segment_seconds of audio have arrived, so text is available seconds after
+it is spoken rather than after a fixed upload interval. Each cut is moved
+to the quietest short frame near the target length, so words are rarely
+split between segments. Audio waits in a fixed-capacity ring buffer, so
+a session's memory is allocated once and never grows.
+"""
+
+import io
+import logging
+import wave
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from .audio_masker import PCM_FORMATS
+
+logger = logging.getLogger(__name__)
+
+
+class AudioSegment(NamedTuple):
+    """One transcribable piece of a live stream"""
+    sequence: int
+    start_time: float
+    end_time: float
+    audio: bytes  # standalone WAV
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO byte buffer; storage is allocated once"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def write(self, data: bytes):
+        """
+        Append data
+
+        Raises:
+            ValueError: If data does not fit in the free space
+        """
+        count = len(data)
+        if count > self.free:
+            raise ValueError(f"Ring buffer overflow: {count} bytes written, {self.free} free")
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        self._data[end:end + first] = data[:first]
+        self._data[:count - first] = data[first:]
+        self._size += count
+
+    def peek(self, count: int, offset: int = 0) -> bytes:
+        """Copy of count bytes starting offset bytes into the buffered data"""
+        count = max(0, min(count, self._size - offset))
+        start = (self._start + offset) % self.capacity
+        first = min(count, self.capacity - start)
+        return bytes(self._data[start:start + first]) + bytes(self._data[:count - first])
+
+    def consume(self, count: int):
+        """Drop count bytes from the front"""
+        count = min(count, self._size)
+        self._start = (self._start + count) % self.capacity if self.capacity else 0
+        self._size -= count
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+
+class StreamSegmenter:
+    """Buffers streamed PCM and cuts it into WAV segments at quiet points"""
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, sample_width: int = 2,
+                 segment_seconds: float = 2.0, search_seconds: float = 0.5,
+                 max_buffer_seconds: float = 10.0):
+        """
+        Args:
+            sample_rate, channels, sample_width: Format of the incoming PCM
+            segment_seconds: Target segment length
+            search_seconds: How far before the target a quieter cut may be placed
+            max_buffer_seconds: Ring buffer capacity; feed() refuses more (slow consumer)
+        """
+        if sample_width not in PCM_FORMATS:
+            raise ValueError(f"Unsupported PCM sample width: {sample_width * 8} bits")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_size = channels * sample_width
+        self.segment_frames = max(1, int(segment_seconds * sample_rate))
+        self.search_frames = min(int(search_seconds * sample_rate), self.segment_frames // 2)
+        max_buffer_frames = max(int(max_buffer_seconds * sample_rate), self.segment_frames)
+
+        self._buffer = RingBuffer(max_buffer_frames * self.frame_size)
+        self._position = 0  # absolute frame index of the buffer start
+        self._sequence = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        return len(self._buffer) / self.frame_size / self.sample_rate
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._buffer.capacity
+
+    def feed(self, data: bytes) -> List[AudioSegment]:
+        """
+        Add raw PCM and return every segment that is now complete
+
+        Raises:
+            ValueError: If the buffered audio would exceed max_buffer_seconds
+        """
+        if len(data) > self._buffer.free:
+            raise ValueError("Streamed audio is arriving faster than it can be segmented")
+        self._buffer.write(data)
+
+        segments = []
+        while len(self._buffer) // self.frame_size >= self.segment_frames:
+            segments.append(self._emit(self._quiet_cut()))
+        return segments
+
+    def flush(self) -> Optional[AudioSegment]:
+        """Emit whatever audio remains (end of stream)"""
+        frames = len(self._buffer) // self.frame_size
+        if frames == 0:
+            self._buffer.clear()
+            return None
+        return self._emit(frames)
+
+    def pending(self) -> Optional[AudioSegment]:
+        """
+        Audio buffered toward the next segment, without consuming it
+
+        For interim transcription: carries the sequence number the segment
+        will have once emitted.
+        """
+        frames = len(self._buffer) // self.frame_size
+        if frames == 0:
+            return None
+        return self._segment(frames)
+
+    def release(self):
+        """Discard buffered audio (aborted or evicted session)"""
+        self._buffer.clear()
+
+    def _quiet_cut(self) -> int:
+        """Frame count of the next segment: the quietest 10ms step before the target length"""
+        if self.search_frames < 2:
+            return self.segment_frames
+
+        dtype, silence = PCM_FORMATS[self.sample_width]
+        start = self.segment_frames - self.search_frames
+        region = self._buffer.peek(self.search_frames * self.frame_size, start * self.frame_size)
+        window = np.frombuffer(region, dtype=dtype)
+        step = max(1, self.sample_rate // 100)
+        steps = len(window) // self.channels // step
+        if steps < 2:
+            return self.segment_frames
+
+        blocks = window[:steps * step * self.channels].reshape(steps, step * self.channels)
+        energy = np.abs(blocks.astype(np.int32) - silence).mean(axis=1)
+        # Prefer the latest of equally quiet steps, keeping segments near full length
+        quietest = steps - 1 - int(np.argmin(energy[::-1]))
+        return start + quietest * step + step // 2
+
+    def _segment(self, frames: int) -> AudioSegment:
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as writer:
+            writer.setnchannels(self.channels)
+            writer.setsampwidth(self.sample_width)
+            writer.setframerate(self.sample_rate)
+            writer.writeframes(self._buffer.peek(frames * self.frame_size))
+
+        return AudioSegment(
+            sequence=self._sequence,
+            start_time=self._position / self.sample_rate,
+            end_time=(self._position + frames) / self.sample_rate,
+            audio=buffer.getvalue()
+        )
+
+    def _emit(self, frames: int) -> AudioSegment:
+        segment = self._segment(frames)
+        self._buffer.consume(frames * self.frame_size)
+        self._position += frames
+        self._sequence += 1
+        return segment
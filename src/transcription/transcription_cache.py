@@ -0,0 +1,168 @@
+"""
+Transcription Cache
+
+Remembers finished transcriptions so a retried upload of the same audio
+is answered without running ASR again. Entries are keyed by an HMAC of
+the audio bytes plus the transcription configuration (backend, model,
+pipeline settings and a manual version). Without the secret the keys
+cannot be derived from the audio. The cached result is an unredacted
+transcript, so each entry is one JSON file holding only that result
+encrypted with AES-GCM under a key derived from the secret (the tag also
+authenticates it); files are written with an atomic rename, so several
+worker processes can share the directory.
+Entries expire after ttl seconds, and the least recently used are
+removed once the directory exceeds max_bytes.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .asr_backend import AudioSource
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+ENTRY_SUFFIX = '.json'
+STALE_TEMP_SECONDS = 3600
+NONCE_SIZE = 12
+
+
+def audio_hmac(secret_key: bytes, source: AudioSource, context: str) -> str:
+    """HMAC-SHA256 of a context string and the audio (bytes, or a file path read in chunks)"""
+    digest = hmac.new(secret_key, digestmod=hashlib.sha256)
+    digest.update(f"{context}\0".encode())
+    if isinstance(source, str):
+        with open(source, 'rb') as audio:
+            while chunk := audio.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    else:
+        digest.update(source)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Content-addressed on-disk store of transcription results"""
+
+    def __init__(self, directory: str, secret_key: str, ttl: float = 86400.0,
+                 max_bytes: int = 512 * 1024 * 1024, version: str = "1"):
+        """
+        Args:
+            directory: Cache directory, shared by every worker on the host
+            secret_key: Key for the audio HMAC; the entry encryption key is derived from it
+            ttl: Seconds an entry stays valid
+            max_bytes: Total entry size before least recently used entries are removed
+            version: Bump to invalidate every entry (e.g. after a model update)
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.version = version
+        self._secret = secret_key.encode()
+        self._cipher = AESGCM(HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=b"nightingale transcription cache"
+        ).derive(self._secret))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def key(self, source: AudioSource, config: str) -> str:
+        """Keyed hash of the audio (bytes or a file path) and the transcription config"""
+        return audio_hmac(self._secret, source, f"{self.version}\0{config}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for key, None if missing, expired or failing decryption"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                entry = json.loads(handle.read())
+            payload = self._cipher.decrypt(
+                base64.b64decode(entry["nonce"]), base64.b64decode(entry["ciphertext"]), key.encode()
+            )
+        except FileNotFoundError:
+            return None
+        except InvalidTag:
+            logger.warning("Discarding transcription cache entry that fails authentication")
+            self._remove(path)
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding unreadable transcription cache entry: {e}")
+            self._remove(path)
+            return None
+
+        data = json.loads(payload)
+        if time.time() - data["created"] > self.ttl:
+            self._remove(path)
+            return None
+
+        try:
+            # Mark as recently used for size eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return data["result"]
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result (JSON-serializable dict) encrypted, then evict if over max_bytes"""
+        payload = json.dumps({"created": time.time(), "result": result}).encode()
+        # The cache key is bound in as associated data, so an entry cannot be moved to another key
+        nonce = os.urandom(NONCE_SIZE)
+        entry = json.dumps({
+            "nonce": base64.b64encode(nonce).decode(),
+            "ciphertext": base64.b64encode(self._cipher.encrypt(nonce, payload, key.encode())).decode()
+        }).encode()
+
+        handle = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.tmp-', delete=False)
+        try:
+            with handle:
+                handle.write(entry)
+            os.replace(handle.name, self._path(key))
+        except BaseException:
+            self._remove(handle.name)
+            raise
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones down to max_bytes"""
+        now = time.time()
+        entries = []
+        with os.scandir(self.directory) as listing:
+            for item in listing:
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                if item.name.endswith(ENTRY_SUFFIX):
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+                elif item.name.startswith('.tmp-') and now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    # Left behind by a worker that died mid-write
+                    self._remove(item.path)
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for modified, size, path in sorted(entries):
+            if total <= self.max_bytes and now - modified <= self.ttl:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,315 @@
+"""
+Energy-based Voice Activity Detection
+
+Finds the speech in a PCM WAV recording so silence is never sent to ASR.
+Audio is read block by block and cut into short analysis frames. The
+energy and zero-crossing rate of every frame in a block are computed in
+one NumPy pass. A frame is speech if it is loud enough above the
+recording's noise floor, or somewhat loud with a high zero-crossing rate
+(unvoiced consonants). The speech mask is padded and short pauses are
+bridged. The speech is then compacted into a shorter WAV, and a TimeMap
+translates times in it back to the original recording.
+"""
+
+import io
+import logging
+import os
+import tempfile
+import wave
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .audio_masker import PCM_FORMATS
+from .segment_table import SegmentTable
+
+logger = logging.getLogger(__name__)
+
+AudioSource = Union[bytes, str]
+
+
+class TimeMap:
+    """Piecewise mapping from compacted-audio time to original-audio time"""
+
+    def __init__(self, regions: Sequence[Tuple[float, float]]):
+        """
+        Args:
+            regions: Kept (start, end) ranges of the original audio in seconds, in order
+        """
+        self.regions = list(regions)
+        self.compact_starts: List[float] = []
+        position = 0.0
+        for start, end in self.regions:
+            self.compact_starts.append(position)
+            position += end - start
+        self.compact_duration = position
+
+    def to_original(self, seconds: float) -> float:
+        if not self.regions:
+            return seconds
+        index = max(0, bisect_right(self.compact_starts, seconds) - 1)
+        start, end = self.regions[index]
+        return min(start + (seconds - self.compact_starts[index]), end)
+
+    def to_original_array(self, seconds: np.ndarray) -> np.ndarray:
+        """to_original for an array of times"""
+        if not self.regions:
+            return seconds
+        regions = np.asarray(self.regions, dtype=np.float64)
+        compact_starts = np.asarray(self.compact_starts)
+        index = np.maximum(np.searchsorted(compact_starts, seconds, side='right') - 1, 0)
+        return np.minimum(regions[index, 0] + (seconds - compact_starts[index]), regions[index, 1])
+
+    def remap_segments(self, segments: Union[List[dict], SegmentTable]) -> Union[List[dict], SegmentTable]:
+        """
+        Segments with start_time/end_time moved onto the original timeline
+
+        A segment spanning a cut is split at it, its text divided between
+        the pieces by duration, so times interpolated inside a piece never
+        fall in the removed silence.
+        """
+        if not self.regions:
+            return segments
+        if isinstance(segments, SegmentTable):
+            first = self._regions_of(segments.starts, 'right')
+            last = self._regions_of(segments.ends, 'left')
+            if np.array_equal(first, last):
+                # Nothing spans a cut: move every time within its own region
+                regions = np.asarray(self.regions, dtype=np.float64)
+                compact_starts = np.asarray(self.compact_starts)
+                return SegmentTable(
+                    np.minimum(regions[first, 0] + segments.starts - compact_starts[first], regions[first, 1]),
+                    np.minimum(regions[last, 0] + segments.ends - compact_starts[last], regions[last, 1]),
+                    segments.offsets, segments.text
+                )
+            return SegmentTable.from_segments(piece for segment in segments for piece in self._split(segment))
+        return [piece for segment in segments for piece in self._split(segment)]
+
+    def _regions_of(self, seconds: np.ndarray, side: str) -> np.ndarray:
+        """Region index of each time; side='left' assigns a time on a cut to the region ending there"""
+        return np.maximum(np.searchsorted(np.asarray(self.compact_starts), seconds, side=side) - 1, 0)
+
+    def _in_region(self, index: int, seconds: float) -> float:
+        start, end = self.regions[index]
+        return min(start + (seconds - self.compact_starts[index]), end)
+
+    def _split(self, segment: dict) -> List[dict]:
+        """One segment as pieces lying within single kept regions"""
+        start, end = float(segment["start_time"]), float(segment["end_time"])
+        first = max(0, bisect_right(self.compact_starts, start) - 1)
+        last = max(0, bisect_left(self.compact_starts, end) - 1, first)
+        if first == last:
+            return [{**segment,
+                     "start_time": self._in_region(first, start),
+                     "end_time": self._in_region(first, end)}]
+
+        text = segment.get("text", "")
+        duration = end - start
+        pieces = []
+        for index in range(first, last + 1):
+            region_start, region_end = self.regions[index]
+            piece_start = max(start, self.compact_starts[index])
+            piece_end = min(end, self.compact_starts[index] + region_end - region_start)
+            if piece_end <= piece_start:
+                continue
+            pieces.append({
+                **segment,
+                "start_time": self._in_region(index, piece_start),
+                "end_time": self._in_region(index, piece_end),
+                "text": text[round(len(text) * (piece_start - start) / duration):
+                             round(len(text) * (piece_end - start) / duration)]
+            })
+        return pieces
+
+
+class CompactedAudio:
+    """Speech-only audio plus its time map; owns a temp file for on-disk sources"""
+
+    def __init__(self, source: AudioSource, time_map: TimeMap, original_duration: float,
+                 temp_path: Optional[str] = None):
+        self.source = source
+        self.time_map = time_map
+        self.original_duration = original_duration
+        self._temp_path = temp_path
+
+    @property
+    def speech_seconds(self) -> float:
+        return self.time_map.compact_duration
+
+    def close(self):
+        if self._temp_path is not None:
+            try:
+                os.unlink(self._temp_path)
+            except FileNotFoundError:
+                pass
+            self._temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _open(source: AudioSource) -> wave.Wave_read:
+    return wave.open(source if isinstance(source, str) else io.BytesIO(source), 'rb')
+
+
+class VoiceActivityDetector:
+    """Vectorized frame energy / zero-crossing speech detector"""
+
+    def __init__(self, frame_ms: float = 30.0, margin_db: float = 12.0,
+                 min_energy_db: float = -55.0, zcr_threshold: float = 0.25,
+                 padding: float = 0.2, min_silence: float = 0.6,
+                 max_speech_ratio: float = 0.9, block_seconds: float = 30.0):
+        """
+        Args:
+            frame_ms: Analysis frame length
+            margin_db: Energy above the noise floor that counts as speech
+            min_energy_db: Energy (dBFS) below which a frame is never speech
+            zcr_threshold: Zero-crossing rate marking quieter unvoiced speech
+            padding: Seconds kept on either side of detected speech
+            min_silence: Shorter pauses are kept rather than cut
+            max_speech_ratio: Above this speech fraction the audio is left as is
+            block_seconds: Audio decoded per step, bounding memory use
+        """
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.zcr_threshold = zcr_threshold
+        self.padding = padding
+        self.min_silence = min_silence
+        self.max_speech_ratio = max_speech_ratio
+        self.block_seconds = block_seconds
+
+    def frame_features(self, source: AudioSource) -> Tuple[np.ndarray, np.ndarray, int, int, int]:
+        """
+        Per-frame energy (dBFS) and zero-crossing rate
+
+        Returns:
+            (energy_db, zcr, frame_length, sample_rate, total_frames)
+        """
+        with _open(source) as reader:
+            channels = reader.getnchannels()
+            sample_width = reader.getsampwidth()
+            sample_rate = reader.getframerate()
+            total_frames = reader.getnframes()
+            try:
+                dtype, silence = PCM_FORMATS[sample_width]
+            except KeyError:
+                raise ValueError(f"Unsupported PCM sample width: {sample_width * 8} bits")
+            scale = float(np.iinfo(dtype).max - silence)
+
+            frame_length = max(1, int(sample_rate * self.frame_ms / 1000))
+            block_length = frame_length * max(1, int(self.block_seconds * 1000 / self.frame_ms))
+
+            energies, crossings = [], []
+            while True:
+                data = reader.readframes(block_length)
+                if not data:
+                    break
+                samples = np.frombuffer(data, dtype=dtype)
+                count = len(samples) // channels // frame_length * frame_length
+                if count == 0:
+                    # Partial trailing frame: treated like the frame before it
+                    break
+                mono = samples[:count * channels].reshape(count, channels).mean(axis=1, dtype=np.float32)
+                frames = ((mono - silence) / scale).reshape(-1, frame_length)
+
+                energies.append(10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10))
+                signs = np.signbit(frames)
+                crossings.append(np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length)
+
+        if not energies:
+            return np.zeros(0), np.zeros(0), frame_length, sample_rate, total_frames
+        return np.concatenate(energies), np.concatenate(crossings), frame_length, sample_rate, total_frames
+
+    def speech_mask(self, energy_db: np.ndarray, zcr: np.ndarray, frames_per_second: float) -> np.ndarray:
+        """Boolean speech flag per analysis frame"""
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+
+        noise_floor = np.percentile(energy_db, 10)
+        threshold = max(noise_floor + self.margin_db, self.min_energy_db)
+        mask = (energy_db > threshold) | (
+            (energy_db > threshold - self.margin_db / 2) & (zcr > self.zcr_threshold)
+        )
+
+        # Pad speech on both sides; the full convolution is sliced back to one
+        # value per frame, since mode='same' grows to the kernel on short clips
+        pad = int(round(self.padding * frames_per_second))
+        if pad and mask.any():
+            mask = np.convolve(mask, np.ones(2 * pad + 1))[pad:pad + len(mask)] > 0
+
+        # Bridge pauses shorter than min_silence
+        edges = np.flatnonzero(np.diff(np.concatenate(([1], mask.astype(np.int8), [1]))))
+        min_gap = int(round(self.min_silence * frames_per_second))
+        for start, end in zip(edges[::2], edges[1::2]):
+            if 0 < start and end < len(mask) and end - start < min_gap:
+                mask[start:end] = True
+        return mask
+
+    def detect(self, source: AudioSource) -> Tuple[List[Tuple[int, int]], int, int]:
+        """
+        Speech regions of a WAV recording
+
+        Returns:
+            ([start, end) sample-frame ranges of speech, sample_rate, total_frames)
+        """
+        energy_db, zcr, frame_length, sample_rate, total_frames = self.frame_features(source)
+        mask = self.speech_mask(energy_db, zcr, sample_rate / frame_length)
+
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+        regions = [
+            (int(start) * frame_length, min(int(end) * frame_length, total_frames))
+            for start, end in zip(edges[::2], edges[1::2])
+        ]
+        # Speech reaching the last full frame also keeps the partial frame after it
+        if regions and regions[-1][1] == len(mask) * frame_length:
+            regions[-1] = (regions[-1][0], total_frames)
+        return regions, sample_rate, total_frames
+
+    def compact(self, source: AudioSource) -> Optional[CompactedAudio]:
+        """
+        Speech-only copy of a WAV recording, None if removing silence is not worth it
+
+        On-disk sources are compacted into a temp file (removed by close()),
+        in-memory ones into bytes.
+        """
+        regions, sample_rate, total_frames = self.detect(source)
+        speech_frames = sum(end - start for start, end in regions)
+        if total_frames == 0 or speech_frames > self.max_speech_ratio * total_frames:
+            return None
+
+        time_map = TimeMap([(start / sample_rate, end / sample_rate) for start, end in regions])
+        duration = total_frames / sample_rate
+
+        if isinstance(source, str):
+            handle = tempfile.NamedTemporaryFile(prefix='nightingale-speech-', suffix='.wav', delete=False)
+            with handle:
+                self._write_regions(source, regions, handle)
+            compacted = CompactedAudio(handle.name, time_map, duration, temp_path=handle.name)
+        else:
+            buffer = io.BytesIO()
+            self._write_regions(source, regions, buffer)
+            compacted = CompactedAudio(buffer.getvalue(), time_map, duration)
+
+        logger.debug(f"VAD kept {compacted.speech_seconds:.1f}s of {duration:.1f}s in {len(regions)} regions")
+        return compacted
+
+    def _write_regions(self, source: AudioSource, regions: Sequence[Tuple[int, int]], destination):
+        with _open(source) as reader:
+            params = reader.getparams()
+            block = max(1, int(self.block_seconds * params.framerate))
+            writer = wave.open(destination, 'wb')
+            writer.setparams(params)
+            writer.setnframes(sum(end - start for start, end in regions))
+            with writer:
+                for start, end in regions:
+                    reader.setpos(start)
+                    position = start
+                    while position < end:
+                        count = min(block, end - position)
+                        writer.writeframesraw(reader.readframes(count))
+                        position += count
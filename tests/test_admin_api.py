@@ -0,0 +1,96 @@
+"""
+Test module for the admin API endpoints
+
+Validates that operator-only endpoints accept the configured operator
+token and refuse patient tokens. Runs against the FastAPI app, so it is
+skipped when the API dependencies (FastAPI, httpx, PyJWT) are missing.
+"""
+
+import pytest
+import asyncio
+import json
+import os
+import sys
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("jwt")
+
+from fastapi.testclient import TestClient
+
+# main.py imports its packages relative to src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+import main  # noqa: E402
+
+OPERATOR_TOKEN = "operator-test-token"
+FULL_CONSENT = {"audio_recording": True, "transcription": True, "ai_processing": True}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main.settings, "operator_api_token", OPERATOR_TOKEN)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def patient_token():
+    return asyncio.run(main.consent_manager.authenticate_patient("patient-admin-test", FULL_CONSENT))
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestRulePackReload:
+    """Test the rule pack hot-reload endpoint"""
+
+    def test_patient_token_is_forbidden(self, client, patient_token, monkeypatch, tmp_path):
+        """Test that a valid patient token cannot reload rule packs"""
+
+        pack_file = tmp_path / "packs.json"
+        pack_file.write_text(json.dumps({"phi": main.RULE_PACKS.dump("phi")}))
+        monkeypatch.setattr(main.settings, "phi_rule_pack_file", str(pack_file))
+
+        response = client.post("/api/v1/admin/rule-packs/reload", headers=bearer(patient_token))
+
+        assert response.status_code == 403
+
+    def test_operator_token_reloads(self, client, monkeypatch, tmp_path):
+        """Test that the operator token reloads the configured rule packs"""
+
+        pack_file = tmp_path / "packs.json"
+        pack_file.write_text(json.dumps({"phi": main.RULE_PACKS.dump("phi")}))
+        monkeypatch.setattr(main.settings, "phi_rule_pack_file", str(pack_file))
+
+        response = client.post("/api/v1/admin/rule-packs/reload", headers=bearer(OPERATOR_TOKEN))
+
+        assert response.status_code == 200
+        assert response.json()["rule_packs"] == ["phi"]
+
+    def test_unconfigured_operator_token_disables_endpoint(self, client, monkeypatch):
+        """Test that no token is accepted when none is configured"""
+
+        monkeypatch.setattr(main.settings, "operator_api_token", None)
+
+        response = client.post("/api/v1/admin/rule-packs/reload", headers=bearer(OPERATOR_TOKEN))
+
+        assert response.status_code == 403
+
+
+class TestRedactionMetricsEndpoint:
+    """Test the redaction metrics endpoint"""
+
+    def test_patient_token_is_forbidden(self, client, patient_token):
+        """Test that a patient token cannot read redaction metrics"""
+
+        response = client.get("/api/v1/metrics/redaction", headers=bearer(patient_token))
+
+        assert response.status_code == 403
+
+    def test_operator_token_reads_metrics(self, client):
+        """Test that the operator token gets the metrics snapshot"""
+
+        response = client.get("/api/v1/metrics/redaction", headers=bearer(OPERATOR_TOKEN))
+
+        assert response.status_code == 200
+        assert "rules" in response.json()
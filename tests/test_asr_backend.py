@@ -0,0 +1,380 @@
+"""
+Test module for ASR backends and the model-worker pool
+
+Validates the deterministic stub engine, off-loop transcription in warm
+worker processes, queue backpressure, split-and-stitch transcription
+of long recordings and resuming them from window checkpoints.
+"""
+
+import pytest
+import asyncio
+import io
+import struct
+import time
+import wave
+
+from src.database.db_manager import DatabaseManager, JobInProgress
+from src.transcription.asr_backend import (
+    ASR_BACKENDS, ASRBackend, ASRBusy, ASRWorkerPool, create_asr_backend
+)
+from src.transcription.audio_ingest import SpooledAudio
+from src.transcription.audio_processor import AudioProcessor, WindowCheckpoint
+from src.transcription.stitcher import plan_windows, stitch_transcripts
+from src.transcription.transcription_cache import TranscriptionCache
+
+
+def make_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(b'\x00\x00' * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+class SlowASRBackend(ASRBackend):
+    """Backend that blocks its thread like a long decode"""
+
+    name = "slow"
+
+    def __init__(self, delay: float = 0.3, **options):
+        self.delay = delay
+
+    def transcribe(self, audio, language=None, context=None):
+        time.sleep(self.delay)
+        return {"text": "slow", "confidence": 1.0, "segments": [], "language": "en", "duration": 0.0}
+
+
+class ClockASRBackend(ASRBackend):
+    """Backend that reads a per-second label encoded in the samples"""
+
+    name = "clock"
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, audio, language=None, context=None):
+        with wave.open(io.BytesIO(audio), 'rb') as reader:
+            rate = reader.getframerate()
+            samples = reader.readframes(reader.getnframes())
+        segments = [
+            {"start_time": float(second), "end_time": second + 1.0,
+             "text": f"tick{struct.unpack_from('<h', samples, (second * rate + rate // 2) * 2)[0]}"}
+            for second in range(len(samples) // 2 // rate)
+        ]
+        return {"text": " ".join(s["text"] for s in segments), "confidence": 0.9,
+                "segments": segments, "language": "en", "duration": len(samples) / 2 / rate}
+
+
+def make_clock_wav(seconds: int, sample_rate: int = 1000) -> bytes:
+    """Mono WAV whose samples in second N all hold the value N"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        for second in range(seconds):
+            writer.writeframes(struct.pack('<h', second) * sample_rate)
+    return buffer.getvalue()
+
+
+class FlakyClockASRBackend(ClockASRBackend):
+    """Clock backend that fails windows from failing_from seconds on, counting windows run"""
+
+    name = "flaky_clock"
+    failing_from = None
+    windows_run = 0
+
+    def transcribe(self, audio, language=None, context=None):
+        with wave.open(io.BytesIO(audio), 'rb') as reader:
+            first_second = struct.unpack('<h', reader.readframes(1))[0]
+        type(self).windows_run += 1
+        if self.failing_from is not None and first_second >= self.failing_from:
+            # Let the healthy windows finish first, like a crash 20 minutes in
+            time.sleep(0.1)
+            raise RuntimeError("ASR worker crashed")
+        return super().transcribe(audio, language, context)
+
+
+@pytest.fixture
+def slow_backend():
+    ASR_BACKENDS[SlowASRBackend.name] = SlowASRBackend
+    yield SlowASRBackend.name
+    ASR_BACKENDS.pop(SlowASRBackend.name, None)
+
+
+@pytest.fixture
+def clock_backend():
+    ASR_BACKENDS[ClockASRBackend.name] = ClockASRBackend
+    yield ClockASRBackend.name
+    ASR_BACKENDS.pop(ClockASRBackend.name, None)
+
+
+class TestStubBackend:
+    """Test the offline stand-in engine"""
+
+    def test_stub_is_deterministic(self):
+        """Test that repeated transcriptions are identical"""
+
+        backend = create_asr_backend("stub")
+        audio = make_wav(20)
+
+        first = backend.transcribe(audio, "en")
+        assert first == backend.transcribe(audio, "en")
+        assert first["duration"] == pytest.approx(20)
+        assert [s["text"] for s in first["segments"]] == [
+            "Patient reports headache", "with pain level 7 out of 10", "Duration approximately three days"
+        ]
+
+        short = backend.transcribe(make_wav(2.5), "en")
+        assert short["text"] == "Patient reports headache"
+        assert short["segments"][-1]["end_time"] == pytest.approx(2.5)
+
+        chunk = backend.transcribe(b"", "en", {"timestamp": 42})
+        assert chunk["text"] == "Audio chunk transcribed at 42"
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected"""
+
+        with pytest.raises(ValueError):
+            create_asr_backend("nonexistent")
+
+
+class TestASRWorkerPool:
+    """Test dispatch through the model-worker pool"""
+
+    @pytest.mark.asyncio
+    async def test_worker_process_reads_spooled_path(self):
+        """Test that a rolled-over upload is transcribed from its path in a worker"""
+
+        processor = AudioProcessor(backend="stub", max_workers=1)
+        try:
+            await processor.warm_up()
+            with SpooledAudio(max_memory=1024) as spooled:
+                spooled.write(make_wav(4.0))
+                assert spooled.path is not None
+
+                result = await processor.transcribe_audio(spooled)
+
+            assert result.text.startswith("Patient reports headache")
+            assert result.metadata["duration"] == pytest.approx(4.0)
+            assert result.confidence == 0.95
+        finally:
+            processor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self, slow_backend):
+        """Test that a blocking decode does not stall the event loop"""
+
+        pool = ASRWorkerPool(slow_backend, max_workers=0)
+        job = asyncio.create_task(pool.transcribe(b"audio"))
+
+        ticks = 0
+        while not job.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+        assert (await job)["text"] == "slow"
+        assert ticks >= 10, f"Event loop only ran {ticks} times during a 0.3s decode"
+
+    @pytest.mark.asyncio
+    async def test_backpressure_when_queue_full(self, slow_backend):
+        """Test that callers beyond the queue capacity wait and then get ASRBusy"""
+
+        pool = ASRWorkerPool(slow_backend, max_workers=0, max_pending=1, queue_timeout=0.05)
+        jobs = [asyncio.create_task(pool.transcribe(b"audio")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()["in_flight"] == 2
+
+        with pytest.raises(ASRBusy):
+            await pool.transcribe(b"audio")
+
+        await asyncio.gather(*jobs)
+        assert pool.stats()["in_flight"] == 0
+        assert (await pool.transcribe(b"audio"))["text"] == "slow"
+
+
+class TestSplitAndStitch:
+    """Test parallel transcription of long recordings"""
+
+    def test_windows_cover_audio_with_overlap(self):
+        """Test that windows overlap and cover every frame"""
+
+        windows = plan_windows(45000, 1000, window_seconds=10, overlap_seconds=2)
+        assert windows[0] == (0, 10000)
+        assert windows[-1][1] == 45000
+        for (_, end), (start, _) in zip(windows, windows[1:]):
+            assert end - start == 2000
+
+        assert plan_windows(11000, 1000, 10, 2) == [(0, 11000)], "Short audio is not split"
+
+    @pytest.mark.asyncio
+    async def test_stitched_timestamps_are_global(self, clock_backend):
+        """Test that each second appears once, at its position in the recording"""
+
+        processor = AudioProcessor(backend=clock_backend, max_workers=0, max_pending=1,
+                                   chunk_duration=10, chunk_overlap=2)
+        result = await processor.transcribe_audio(make_clock_wav(45))
+
+        assert result.metadata["windows"] > 1
+        assert result.text.split() == [f"tick{n}" for n in range(45)]
+        for n, segment in enumerate(result.timestamps):
+            assert segment["start_time"] == pytest.approx(n)
+            assert segment["end_time"] == pytest.approx(n + 1)
+        assert result.metadata["duration"] == pytest.approx(45)
+
+    def test_sentence_cut_at_window_edge_is_not_repeated(self):
+        """Test that words repeated across a window boundary are dropped"""
+
+        first = {"confidence": 0.9, "segments": [
+            {"start_time": 0.0, "end_time": 8.0, "text": "Patient reports headache"},
+            {"start_time": 7.0, "end_time": 8.9, "text": "for three"},
+        ]}
+        second = {"confidence": 0.8, "segments": [
+            {"start_time": 0.6, "end_time": 4.0, "text": "for three days now."},
+            {"start_time": 4.5, "end_time": 7.0, "text": "No fever."},
+        ]}
+
+        result = stitch_transcripts([first, second], [(0.0, 10.0), (8.0, 15.0)], 15.0)
+
+        assert result["text"] == "Patient reports headache for three days now. No fever."
+        assert result["segments"][2]["text"] == "days now."
+        assert result["segments"][2]["start_time"] == pytest.approx(8.9)
+        assert 0.8 < result["confidence"] < 0.9
+
+    @pytest.mark.asyncio
+    async def test_windows_are_transcribed_concurrently(self, slow_backend):
+        """Test that wall-clock time shrinks with the number of concurrent workers"""
+
+        processor = AudioProcessor(backend=slow_backend, max_workers=0, max_pending=6,
+                                   chunk_duration=10, chunk_overlap=1)
+        processor.pool.options = {"delay": 0.1}
+
+        start = time.perf_counter()
+        result = await processor.transcribe_audio(make_wav(60, sample_rate=1000))
+        elapsed = time.perf_counter() - start
+
+        assert result.metadata["windows"] == 7
+        assert elapsed < 0.5, f"7 windows of 0.1s took {elapsed:.2f}s, expected them to overlap"
+
+    @pytest.mark.asyncio
+    async def test_window_submissions_are_capped_at_workers(self, slow_backend, monkeypatch):
+        """Test that a long recording never queues more windows than workers, and counts them in flight"""
+
+        from concurrent.futures import ThreadPoolExecutor
+        import src.transcription.asr_backend as asr_backend
+
+        class CountingExecutor(ThreadPoolExecutor):
+            """Stands in for the process pool, tracking jobs submitted but not finished"""
+            outstanding = 0
+            peak = 0
+
+            def submit(self, *args, **kwargs):
+                type(self).outstanding += 1
+                type(self).peak = max(self.peak, self.outstanding)
+                future = super().submit(*args, **kwargs)
+                future.add_done_callback(lambda _: setattr(type(self), 'outstanding', type(self).outstanding - 1))
+                return future
+
+        monkeypatch.setattr(asr_backend, "_worker_backend", SlowASRBackend(delay=0.05))
+        pool = ASRWorkerPool(slow_backend, max_workers=2, max_pending=4)
+        pool._executor = CountingExecutor(max_workers=8)
+        try:
+            job = asyncio.create_task(pool.transcribe_windows(make_wav(1.0), [(0, 1000)] * 12))
+            await asyncio.sleep(0.02)
+            assert pool.in_flight == 2
+            assert not pool.has_idle_worker
+
+            results = await job
+        finally:
+            pool._executor.shutdown()
+
+        assert len(results) == 12
+        assert CountingExecutor.peak == 2
+        assert pool.in_flight == 0
+
+
+class TestCheckpointResume:
+    """Test resuming long recordings from completed windows"""
+
+    @pytest.fixture
+    def flaky_backend(self):
+        ASR_BACKENDS[FlakyClockASRBackend.name] = FlakyClockASRBackend
+        FlakyClockASRBackend.windows_run = 0
+        yield FlakyClockASRBackend.name
+        FlakyClockASRBackend.failing_from = None
+        ASR_BACKENDS.pop(FlakyClockASRBackend.name, None)
+
+    @pytest.mark.asyncio
+    async def test_retry_only_transcribes_remaining_windows(self, flaky_backend):
+        """Test that a retry reuses checkpointed windows and matches an uninterrupted run"""
+
+        db = DatabaseManager()
+        processor = AudioProcessor(backend=flaky_backend, max_workers=0, max_pending=8,
+                                   chunk_duration=10, chunk_overlap=2)
+        audio = make_clock_wav(80)
+        digest = await processor.recording_digest(audio, "secret")
+        job_id = processor.recording_key(digest, "secret", "patient")
+        checkpoint = await db.claim_processing_checkpoint(job_id)
+        await db.store_checkpoint_session(job_id, "session-1")
+
+        def window_checkpoint():
+            return WindowCheckpoint(
+                completed=dict(checkpoint["chunks"]),
+                save=lambda index, result: db.store_chunk_checkpoint(job_id, index, result)
+            )
+
+        FlakyClockASRBackend.failing_from = 50
+        with pytest.raises(RuntimeError):
+            await processor.transcribe_audio(audio, window_checkpoint())
+        total_windows = FlakyClockASRBackend.windows_run
+        saved = len(checkpoint["chunks"])
+        assert 0 < saved < total_windows
+
+        FlakyClockASRBackend.failing_from = None
+        FlakyClockASRBackend.windows_run = 0
+        resumed = await processor.transcribe_audio(audio, window_checkpoint())
+
+        assert FlakyClockASRBackend.windows_run == total_windows - saved
+        assert resumed.metadata["resumed_windows"] == saved
+        assert resumed.text.split() == [f"tick{n}" for n in range(80)]
+        assert processor.recording_key(await processor.recording_digest(audio, "secret"), "secret", "patient") == job_id
+
+        await db.clear_processing_checkpoint(job_id)
+        assert await db.get_processing_checkpoint(job_id) is None
+
+    @pytest.mark.asyncio
+    async def test_running_job_cannot_be_claimed_twice(self):
+        """Test that a concurrent identical upload does not resume a job still running"""
+
+        db = DatabaseManager()
+        checkpoint = await db.claim_processing_checkpoint("job")
+        assert checkpoint["session_id"] is None
+        await db.store_checkpoint_session("job", "session-1")
+
+        with pytest.raises(JobInProgress):
+            await db.claim_processing_checkpoint("job")
+
+        await db.store_chunk_checkpoint("job", 0, {"text": "window"})
+        await db.store_stage_checkpoint("job", "redaction", {"redacted_text": "[NAME_REDACTED] reports pain"})
+        await db.release_processing_checkpoint("job")
+        retry = await db.claim_processing_checkpoint("job")
+
+        assert retry["session_id"] == "session-1"
+        assert retry["stages"]["redaction"]["redacted_text"] == "[NAME_REDACTED] reports pain"
+        assert retry["chunks"] == {}, "Window transcripts are dropped once a stage is stored"
+
+    @pytest.mark.asyncio
+    async def test_recording_digest_is_the_cache_key(self, tmp_path):
+        """Test that the job digest is reused as the cache key so the audio is hashed once"""
+
+        cache = TranscriptionCache(str(tmp_path), "secret")
+        processor = AudioProcessor(backend="stub", max_workers=0, cache=cache)
+        audio = make_wav(1.0)
+
+        digest = await processor.recording_digest(audio, "secret")
+
+        assert digest == cache.key(audio, processor.config_fingerprint)
+        assert processor.recording_key(digest, "secret", "patient-a") != \
+            processor.recording_key(digest, "secret", "patient-b")
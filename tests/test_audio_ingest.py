@@ -0,0 +1,98 @@
+"""
+Test module for streaming audio ingest
+
+Validates chunked spooling of uploads, incremental size enforcement,
+bounded memory use per upload and disk writes kept off the event loop.
+"""
+
+import pytest
+import hashlib
+import threading
+import tracemalloc
+
+from src.transcription.audio_ingest import SpooledAudio, UploadTooLarge, spool_upload
+
+
+class FakeUpload:
+    """Async upload stand-in producing deterministic bytes on demand"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.sent = 0
+        self.digest = hashlib.sha256()
+
+    async def read(self, n: int = -1) -> bytes:
+        n = min(n, self.size - self.sent)
+        chunk = bytes([self.sent % 251]) * n
+        self.sent += n
+        self.digest.update(chunk)
+        return chunk
+
+
+MB = 1024 * 1024
+
+
+class TestSpoolUpload:
+    """Test spooling of uploads into bounded memory"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_through_chunks(self):
+        """Test that the chunk iterator yields exactly the uploaded bytes"""
+
+        upload = FakeUpload(5 * MB + 123)
+        with await spool_upload(upload, max_size=50 * MB) as spooled:
+            assert spooled.size == upload.size
+
+            digest = hashlib.sha256()
+            for view in spooled.iter_chunks(64 * 1024):
+                digest.update(view)
+            assert digest.hexdigest() == upload.digest.hexdigest()
+
+            assert len(spooled.open().read(10)) == 10, "open() rewinds the spool"
+
+    @pytest.mark.asyncio
+    async def test_size_limit_is_checked_incrementally(self):
+        """Test that an oversized upload stops being read right after the limit"""
+
+        upload = FakeUpload(200 * MB)
+
+        with pytest.raises(UploadTooLarge):
+            await spool_upload(upload, max_size=10 * MB)
+
+        assert upload.sent <= 10 * MB + 1 * MB, "Upload should not be drained past the limit"
+
+    @pytest.mark.asyncio
+    async def test_peak_memory_is_bounded(self):
+        """Test that spooling a large upload keeps only a few MB in memory"""
+
+        tracemalloc.start()
+        try:
+            spooled = await spool_upload(FakeUpload(40 * MB), max_size=50 * MB)
+            for _ in spooled.iter_chunks():
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        spooled.close()
+
+        print(f"\n  Peak traced memory for a 40MB upload: {peak / MB:.1f}MB")
+        assert peak < 8 * MB, f"Spooling held {peak / MB:.1f}MB in memory"
+
+    @pytest.mark.asyncio
+    async def test_disk_writes_leave_the_event_loop(self, monkeypatch):
+        """Test that only in-memory writes run on the event loop thread"""
+
+        loop_thread = threading.get_ident()
+        writes = []
+        write = SpooledAudio.write
+
+        def recording_write(self, data):
+            writes.append((self.in_memory(len(data)), threading.get_ident() == loop_thread))
+            write(self, data)
+
+        monkeypatch.setattr(SpooledAudio, "write", recording_write)
+        with await spool_upload(FakeUpload(6 * MB), max_size=50 * MB, max_memory=2 * MB):
+            pass
+
+        assert writes[:2] == [(True, True), (True, True)]
+        assert writes[2:] and all(not in_memory and not on_loop for in_memory, on_loop in writes[2:])
@@ -0,0 +1,140 @@
+"""
+Test module for audio PHI masking
+
+Validates that redacted transcript spans are mapped through timestamps
+onto sample ranges and masked chunk by chunk without touching other audio.
+"""
+
+import pytest
+import io
+import time
+import wave
+
+import numpy as np
+
+from src.transcription.audio_masker import (
+    AudioMasker, locate_segments, spans_to_time_ranges, time_ranges_to_samples
+)
+
+
+SAMPLE_RATE = 16000
+
+
+def _wav_bytes(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(samples.dtype.itemsize)
+        writer.setframerate(sample_rate)
+        writer.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def _read_samples(data: bytes, dtype: str = '<i2') -> np.ndarray:
+    with wave.open(io.BytesIO(data), 'rb') as reader:
+        return np.frombuffer(reader.readframes(reader.getnframes()), dtype=dtype)
+
+
+def _speech_like(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE))
+    return (8000 * np.sin(2 * np.pi * 220 * t / SAMPLE_RATE)).astype('<i2')
+
+
+class TestSpanAlignment:
+    """Test mapping of character spans to audio time ranges"""
+
+    TEXT = "Patient John Smith reports headache. Call 555-123-4567 tomorrow."
+    TIMESTAMPS = [
+        {"start_time": 0.0, "end_time": 3.5, "text": "Patient John Smith reports headache."},
+        {"start_time": 4.0, "end_time": 7.0, "text": "Call 555-123-4567 tomorrow."},
+    ]
+
+    def test_segments_are_located_in_order(self):
+        """Test that each timestamped segment is found in the transcript"""
+
+        segments = locate_segments(self.TEXT, self.TIMESTAMPS)
+
+        assert [(start, end) for start, end, _, _ in segments] == [(0, 36), (37, 64)]
+
+    def test_spans_map_inside_their_segments(self):
+        """Test interpolation within a segment and merging of nearby ranges"""
+
+        name = (self.TEXT.index("John"), self.TEXT.index(" reports"))
+        phone = (self.TEXT.index("555"), self.TEXT.index(" tomorrow"))
+
+        ranges = spans_to_time_ranges(self.TEXT, self.TIMESTAMPS, [name, phone], padding=0.0)
+
+        assert len(ranges) == 2
+        (name_start, name_end), (phone_start, phone_end) = ranges
+        assert 0.5 < name_start < name_end < 2.0
+        assert 4.0 < phone_start < phone_end < 7.0
+
+    def test_unaligned_transcript_masks_everything(self):
+        """Test that PHI which cannot be placed is not left audible"""
+
+        ranges = spans_to_time_ranges("different text", self.TIMESTAMPS, [(0, 9)])
+
+        assert ranges and ranges[0][0] == 0.0 and ranges[0][1] >= 7.0
+
+    def test_sample_ranges_round_outwards(self):
+        """Test conversion of seconds to frame indices"""
+
+        assert time_ranges_to_samples([(0.10001, 0.2)], SAMPLE_RATE) == [(1600, 3200)]
+
+
+class TestAudioMasker:
+    """Test chunked masking of PCM WAV audio"""
+
+    @pytest.mark.parametrize("mode", ["zero", "tone"])
+    def test_only_masked_ranges_change(self, mode):
+        """Test masking across chunk boundaries leaves other samples untouched"""
+
+        original = _speech_like(2.0)
+        masker = AudioMasker(mode=mode, chunk_frames=997)
+        output = io.BytesIO()
+
+        stats = masker.mask_wav(io.BytesIO(_wav_bytes(original)), output, [(0.5, 0.75), (1.2, 1.3)])
+        masked = _read_samples(output.getvalue())
+
+        assert len(masked) == len(original)
+        assert stats["masked_ranges"] == 2
+        assert stats["masked_seconds"] == pytest.approx(0.35)
+
+        inside = np.zeros(len(original), dtype=bool)
+        inside[8000:12000] = True
+        inside[19200:20800] = True
+        assert np.array_equal(masked[~inside], original[~inside])
+        assert not np.array_equal(masked[inside], original[inside])
+        if mode == "zero":
+            assert not masked[inside].any()
+
+    def test_tone_is_continuous_across_chunks(self):
+        """Test that chunk size does not change the output"""
+
+        data = _wav_bytes(_speech_like(1.0))
+        outputs = []
+        for chunk_frames in (333, 65536):
+            output = io.BytesIO()
+            AudioMasker(mode="tone", chunk_frames=chunk_frames).mask_wav(io.BytesIO(data), output, [(0.1, 0.9)])
+            outputs.append(output.getvalue())
+
+        assert outputs[0] == outputs[1]
+
+    def test_rejects_unsupported_audio(self):
+        """Test that non-WAV input raises instead of passing audio through"""
+
+        with pytest.raises(ValueError):
+            AudioMasker().mask_wav(io.BytesIO(b"ID3 not a wav file"), io.BytesIO(), [(0.0, 1.0)])
+
+    def test_masking_is_faster_than_real_time(self):
+        """Test throughput on a 10-minute recording (50MB uploads are ~26 minutes)"""
+
+        data = _wav_bytes(_speech_like(600.0))
+        ranges = [(second, second + 1.5) for second in range(0, 600, 10)]
+
+        start = time.perf_counter()
+        AudioMasker(mode="tone").mask_wav(io.BytesIO(data), io.BytesIO(), ranges)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n  Masked 600s of audio in {elapsed * 1000:.1f}ms ({600 / elapsed:.0f}x real time)")
+        assert elapsed < 6.0, f"Masking slower than 100x real time: {elapsed:.2f}s"
@@ -0,0 +1,177 @@
+"""
+Test module for PCM normalization and resampling
+
+Validates header parsing, zero-copy sample views, polyphase resampling
+accuracy, buffer reuse and the normalization stage in front of ASR.
+"""
+
+import pytest
+import io
+import struct
+import wave
+
+import numpy as np
+
+from src.transcription.asr_backend import ASR_BACKENDS, ASRBackend
+from src.transcription.audio_normalizer import (
+    AudioNormalizer, BufferPool, PolyphaseResampler, WAVE_FORMAT_IEEE_FLOAT, parse_wav_header
+)
+from src.transcription.audio_processor import AudioProcessor
+
+
+def make_tone(seconds: float, sample_rate: int, channels: int = 1, frequency: float = 440.0) -> bytes:
+    """16-bit PCM WAV of a half-scale sine on every channel"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = np.repeat((0.5 * np.sin(2 * np.pi * frequency * t))[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes((samples * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def make_float_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Mono IEEE float WAV (not writable with the wave module)"""
+    data = samples.astype('<f4').tobytes()
+    fmt = struct.pack('<HHIIHH', WAVE_FORMAT_IEEE_FLOAT, 1, sample_rate, sample_rate * 4, 4, 32)
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', len(data)) + data
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def decode(audio: bytes):
+    with wave.open(io.BytesIO(audio), 'rb') as reader:
+        return reader.getparams(), np.frombuffer(reader.readframes(reader.getnframes()), dtype='<i2') / 32767
+
+
+class FormatRecordingBackend(ASRBackend):
+    """Backend recording the format of the audio it receives"""
+
+    name = "format_recorder"
+    received = []
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, audio, language=None, context=None):
+        params, _ = decode(audio)
+        self.received.append((params.nchannels, params.sampwidth, params.framerate))
+        return {"text": "ok", "confidence": 1.0, "segments": [], "language": "en",
+                "duration": params.nframes / params.framerate}
+
+
+class TestWavParsing:
+    """Test header parsing and zero-copy views"""
+
+    def test_parse_pcm_and_float_headers(self):
+        """Test that PCM and IEEE float headers are located"""
+
+        header = parse_wav_header(make_tone(1.0, 44100, channels=2))
+        assert (header.channels, header.sample_rate, header.sample_width, header.frames) == (2, 44100, 2, 44100)
+
+        header = parse_wav_header(make_float_wav(np.zeros(800), 8000))
+        assert (header.format_tag, header.sample_width, header.frames) == (WAVE_FORMAT_IEEE_FLOAT, 4, 800)
+
+        assert parse_wav_header(b"ID3\x03not a wav file") is None
+
+    def test_frames_are_views_of_the_upload(self):
+        """Test that sample access does not copy the audio"""
+
+        audio = make_tone(1.0, 48000, channels=2)
+        normalizer = AudioNormalizer()
+        data = np.frombuffer(audio, dtype=np.uint8)
+        frames = normalizer.frames(data, parse_wav_header(data), 1000, 512)
+
+        assert frames.shape == (512, 2)
+        assert np.shares_memory(frames, data)
+
+
+class TestPolyphaseResampler:
+    """Test resampling accuracy"""
+
+    @pytest.mark.parametrize("source_rate", [8000, 22050, 44100, 48000])
+    def test_sine_is_preserved(self, source_rate):
+        """Test that a tone survives resampling in chunks with its timing intact"""
+
+        t = np.arange(source_rate * 2) / source_rate
+        signal = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+        resampler = PolyphaseResampler(source_rate, 16000)
+
+        chunks = []
+        for start in range(0, len(signal), 4096):
+            chunks.append(resampler.process(signal[start:start + 4096]).copy())
+        chunks.append(resampler.flush().copy())
+        output = np.concatenate(chunks)
+
+        assert len(output) == 32000
+        expected = np.sin(2 * np.pi * 440 * np.arange(len(output)) / 16000)
+        assert np.abs(output[100:-100] - expected[100:-100]).max() < 1e-3
+
+    def test_content_above_nyquist_is_filtered(self):
+        """Test that a tone above the target Nyquist frequency is attenuated"""
+
+        t = np.arange(48000) / 48000
+        resampler = PolyphaseResampler(48000, 16000)
+        output = resampler.process(np.sin(2 * np.pi * 10000 * t).astype(np.float32))
+
+        assert np.sqrt(np.mean(output[100:-100] ** 2)) < 0.02
+
+
+class TestAudioNormalizer:
+    """Test normalization to 16kHz mono"""
+
+    def test_stereo_downmix_and_resample(self):
+        """Test that stereo 44.1kHz audio becomes mono 16kHz of the same length"""
+
+        with AudioNormalizer(16000).normalize(make_tone(3.0, 44100, channels=2)) as normalized:
+            params, samples = decode(normalized.source)
+
+        assert (params.nchannels, params.sampwidth, params.framerate) == (1, 2, 16000)
+        assert params.nframes == 48000
+        expected = 0.5 * np.sin(2 * np.pi * 440 * np.arange(48000) / 16000)
+        assert np.abs(samples[100:-100] - expected[100:-100]).max() < 1e-3
+
+    def test_float_wav_is_converted(self):
+        """Test that IEEE float input is normalized like PCM"""
+
+        signal = 0.25 * np.sin(2 * np.pi * 300 * np.arange(16000) / 16000)
+        normalized = AudioNormalizer(16000).normalize(make_float_wav(signal, 16000))
+
+        _, samples = decode(normalized.source)
+        assert np.abs(samples - signal).max() < 1e-3
+
+    def test_already_normalized_audio_is_untouched(self):
+        """Test that 16kHz mono PCM and non-WAV input pass through"""
+
+        normalizer = AudioNormalizer(16000)
+        assert normalizer.normalize(make_tone(1.0, 16000)) is None
+        assert normalizer.normalize(b"ID3\x03mp3 data") is None
+
+    def test_buffer_allocations_do_not_grow_with_length(self):
+        """Test that steady-state processing reuses pooled buffers"""
+
+        def allocations(seconds: float) -> int:
+            pool = BufferPool()
+            AudioNormalizer(16000, chunk_frames=8192, pool=pool).normalize(make_tone(seconds, 44100, channels=2))
+            return pool.allocations
+
+        short, long = allocations(2.0), allocations(30.0)
+        print(f"\n  Pool allocations: {short} for 2s, {long} for 30s (162 chunks)")
+        # Only the final partial chunk may land in a new size bucket
+        assert long <= short + 2
+
+    @pytest.mark.asyncio
+    async def test_asr_receives_normalized_audio(self):
+        """Test that the processor hands 16kHz mono audio to the backend"""
+
+        ASR_BACKENDS[FormatRecordingBackend.name] = FormatRecordingBackend
+        FormatRecordingBackend.received = []
+        try:
+            processor = AudioProcessor(backend=FormatRecordingBackend.name, normalizer=AudioNormalizer(16000))
+            result = await processor.transcribe_audio(make_tone(2.0, 48000, channels=2))
+        finally:
+            ASR_BACKENDS.pop(FormatRecordingBackend.name, None)
+
+        assert FormatRecordingBackend.received == [(1, 2, 16000)]
+        assert result.metadata["duration"] == pytest.approx(2.0)
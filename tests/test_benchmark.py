@@ -0,0 +1,360 @@
+"""
+Test module for redaction throughput benchmarks
+
+Generates seeded synthetic consultations with planted PHI and reports
+MB/s, detections/s and P50/P95/P99 latency per redaction engine across
+input sizes. Results can be written as a JSON baseline that later runs
+are compared against to catch throughput regressions.
+
+Environment:
+    NIGHTINGALE_BENCH_FULL=1        also run the 1MB and 5MB sizes
+    NIGHTINGALE_BENCH_BASELINE=path compare against this baseline (written if missing)
+    NIGHTINGALE_BENCH_UPDATE=1      overwrite the baseline with this run
+    NIGHTINGALE_BENCH_TOLERANCE=0.3 allowed fractional throughput drop
+"""
+
+import pytest
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Tuple
+
+from src.redaction.phi_redactor import PHIRedactor
+from src.redaction.simple_phi_redactor import SimplePHIRedactor
+
+
+KB = 1024
+MB = 1024 * KB
+
+QUICK_SIZES = [1 * KB, 16 * KB, 128 * KB]
+FULL_SIZES = QUICK_SIZES + [1 * MB, 5 * MB]
+
+BASELINE_VERSION = 1
+
+
+def _size_label(size: int) -> str:
+    return f"{size // MB}MB" if size >= MB else f"{size // KB}KB"
+
+
+@dataclass
+class SyntheticConsultation:
+    """Generated consultation text and the PHI values planted in it"""
+    text: str
+    planted: List[Tuple[str, str]] = field(default_factory=list)
+
+    def planted_of(self, phi_type: str) -> List[str]:
+        return [value for kind, value in self.planted if kind == phi_type]
+
+
+class SyntheticConsultationGenerator:
+    """Seeded generator of consultation transcripts with planted PHI"""
+
+    # Planted occurrences per KB of generated text
+    DEFAULT_DENSITIES = {
+        'person_name': 1.0,
+        'ssn': 0.25,
+        'phone': 0.5,
+        'email': 0.25,
+        'mrn': 0.25,
+        'date_birth': 0.25,
+        'address': 0.25
+    }
+
+    FIRST_NAMES = ['John', 'Sarah', 'Maria', 'Michael', 'David', 'Linda', 'James', 'Emily']
+    LAST_NAMES = ['Smith', 'Johnson', 'Garcia', 'Chen', 'Brown', 'Miller', 'Davis', 'Wilson']
+    STREETS = ['Oak', 'Maple', 'Cedar', 'Elm', 'Pine', 'Washington', 'Lake', 'Hill']
+    STREET_SUFFIXES = ['Street', 'Avenue', 'Road', 'Lane', 'Drive']
+
+    CLINICAL_SENTENCES = [
+        "Patient reports recurring headaches over the past two weeks.",
+        "Pain is described as throbbing and primarily frontal.",
+        "Associated symptoms include nausea and sensitivity to light.",
+        "No relief with over-the-counter medications such as ibuprofen.",
+        "Medical history is significant for hypertension and type 2 diabetes.",
+        "Current medications include metformin 1000mg and lisinopril 20mg.",
+        "Blood pressure today is 128/82 with a heart rate of 74.",
+        "Neurological examination is unremarkable with intact cranial nerves.",
+        "Assessment is most consistent with migraine without aura.",
+        "Plan to start topiramate 25mg daily and follow up in four weeks.",
+        "Patient denies fever, chills or recent weight loss.",
+        "Sleep has been disrupted and work stress has increased.",
+        "Discussed lifestyle modifications including regular sleep and hydration.",
+        "Return precautions were reviewed in detail with the patient."
+    ]
+
+    def __init__(self, seed: int = 1234, densities: Optional[Dict[str, float]] = None):
+        self.seed = seed
+        self.densities = dict(self.DEFAULT_DENSITIES if densities is None else densities)
+
+    def generate(self, size: int) -> SyntheticConsultation:
+        """Generate roughly `size` characters of consultation text"""
+        rng = random.Random(f"{self.seed}:{size}")
+        planters = {
+            'person_name': self._name,
+            'ssn': self._ssn,
+            'phone': self._phone,
+            'email': self._email,
+            'mrn': self._mrn,
+            'date_birth': self._date_of_birth,
+            'address': self._address
+        }
+
+        # Exact planted counts for the size, shuffled among the filler sentences
+        plants = []
+        for phi_type, density in self.densities.items():
+            plants.extend([phi_type] * round(density * size / KB))
+        rng.shuffle(plants)
+
+        # Plant at evenly spaced offsets so every plant lands before the cut-off
+        spacing = size / (len(plants) + 1)
+        parts: List[str] = []
+        planted: List[Tuple[str, str]] = []
+        length = 0
+
+        while length < size:
+            sentence = rng.choice(self.CLINICAL_SENTENCES)
+
+            if plants and length >= spacing * (len(planted) + 1):
+                phi_type = plants.pop()
+                phrase, value = planters[phi_type](rng)
+                planted.append((phi_type, value))
+                sentence = f"{phrase} {sentence}"
+
+            parts.append(sentence)
+            length += len(sentence) + 1
+
+        return SyntheticConsultation(text=" ".join(parts)[:size], planted=planted)
+
+    def _name(self, rng: random.Random) -> Tuple[str, str]:
+        name = f"{rng.choice(self.FIRST_NAMES)} {rng.choice(self.LAST_NAMES)}"
+        return f"Seen with {name} today.", name
+
+    def _ssn(self, rng: random.Random) -> Tuple[str, str]:
+        ssn = f"{rng.randint(100, 899):03d}-{rng.randint(10, 99):02d}-{rng.randint(1000, 9999):04d}"
+        return f"SSN {ssn} on file.", ssn
+
+    def _phone(self, rng: random.Random) -> Tuple[str, str]:
+        phone = f"({rng.randint(200, 989)}) {rng.randint(200, 989)}-{rng.randint(1000, 9999)}"
+        return f"Callback number {phone} confirmed.", phone
+
+    def _email(self, rng: random.Random) -> Tuple[str, str]:
+        email = (f"{rng.choice(self.FIRST_NAMES).lower()}.{rng.choice(self.LAST_NAMES).lower()}"
+                 f"{rng.randint(1, 99)}@example.org")
+        return f"Email {email} for portal access.", email
+
+    def _mrn(self, rng: random.Random) -> Tuple[str, str]:
+        mrn = str(rng.randint(10 ** 7, 10 ** 8 - 1))
+        return f"MRN: {mrn} verified.", mrn
+
+    def _date_of_birth(self, rng: random.Random) -> Tuple[str, str]:
+        dob = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(1940, 2005)}"
+        return f"DOB {dob} confirmed.", dob
+
+    def _address(self, rng: random.Random) -> Tuple[str, str]:
+        address = f"{rng.randint(10, 9999)} {rng.choice(self.STREETS)} {rng.choice(self.STREET_SUFFIXES)}"
+        return f"Lives at {address} with family.", address
+
+
+@dataclass
+class BenchmarkResult:
+    """Throughput and latency of one engine on one input size"""
+    engine: str
+    size: int
+    iterations: int
+    detections: int
+    mb_per_s: float
+    detections_per_s: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _iterations_for(size: int) -> int:
+    """Plenty of samples for small inputs, a few for multi-megabyte ones"""
+    return max(3, min(30, (256 * KB) // size))
+
+
+async def run_engine_benchmark(engine: str, redactor, text: str,
+                               iterations: int) -> BenchmarkResult:
+    """Time redact_phi over repeated runs of one text"""
+    await redactor.redact_phi(text)  # warm-up
+
+    latencies = []
+    detections = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = await redactor.redact_phi(text)
+        latencies.append(time.perf_counter() - start)
+        # Several detectors can report the same span; count each span once
+        detections = len({(phi.start_pos, phi.end_pos) for phi in result.detected_phi})
+
+    latencies.sort()
+    p50 = _percentile(latencies, 0.5)
+
+    return BenchmarkResult(
+        engine=engine,
+        size=len(text),
+        iterations=iterations,
+        detections=detections,
+        mb_per_s=len(text) / MB / p50,
+        detections_per_s=detections / p50,
+        p50_ms=p50 * 1000,
+        p95_ms=_percentile(latencies, 0.95) * 1000,
+        p99_ms=_percentile(latencies, 0.99) * 1000
+    )
+
+
+def compare_to_baseline(results: List[BenchmarkResult], baseline: Dict,
+                        tolerance: float) -> List[str]:
+    """Describe every engine/size whose throughput fell below the baseline"""
+    recorded = {(entry['engine'], entry['size']): entry for entry in baseline.get('results', [])}
+
+    regressions = []
+    for result in results:
+        previous = recorded.get((result.engine, result.size))
+        if previous is None:
+            continue
+        floor = previous['mb_per_s'] * (1 - tolerance)
+        if result.mb_per_s < floor:
+            regressions.append(
+                f"{result.engine} {_size_label(result.size)}: {result.mb_per_s:.2f} MB/s "
+                f"< {floor:.2f} MB/s (baseline {previous['mb_per_s']:.2f} MB/s)"
+            )
+    return regressions
+
+
+def _engines() -> Dict[str, object]:
+    # Inline PHIRedactor so the engine is measured rather than process-pool IPC
+    return {
+        'PHIRedactor': PHIRedactor(max_workers=0),
+        'SimplePHIRedactor': SimplePHIRedactor()
+    }
+
+
+class TestSyntheticCorpus:
+    """Test the synthetic consultation generator"""
+
+    def test_generator_is_deterministic(self):
+        """Same seed and size produce the same text and planted PHI"""
+
+        first = SyntheticConsultationGenerator(seed=7).generate(8 * KB)
+        second = SyntheticConsultationGenerator(seed=7).generate(8 * KB)
+        other = SyntheticConsultationGenerator(seed=8).generate(8 * KB)
+
+        assert first.text == second.text
+        assert first.planted == second.planted
+        assert first.text != other.text
+        assert len(first.text) == 8 * KB
+
+    def test_densities_control_planted_phi(self):
+        """Planted counts follow the configured per-KB densities"""
+
+        generator = SyntheticConsultationGenerator(densities={'ssn': 2.0, 'phone': 0.0})
+        consultation = generator.generate(16 * KB)
+
+        assert len(consultation.planted_of('ssn')) == 32
+        assert not consultation.planted_of('phone')
+        for ssn in consultation.planted_of('ssn'):
+            assert ssn in consultation.text
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("engine", ['PHIRedactor', 'SimplePHIRedactor'])
+    async def test_planted_phi_is_redacted(self, engine):
+        """Every planted identifier, names and addresses included, is removed by each engine"""
+
+        redactor = _engines()[engine]
+        consultation = SyntheticConsultationGenerator(seed=42).generate(16 * KB)
+        result = await redactor.redact_phi(consultation.text)
+
+        assert result.redacted_text != "[TEXT_REDACTION_FAILED]"
+        for phi_type in SyntheticConsultationGenerator.DEFAULT_DENSITIES:
+            assert consultation.planted_of(phi_type), f"no {phi_type} planted"
+            for value in consultation.planted_of(phi_type):
+                assert value not in result.redacted_text, f"{engine} leaked planted {phi_type}"
+
+        if hasattr(redactor, 'close'):
+            redactor.close()
+
+
+class TestRedactionBenchmark:
+    """Throughput benchmark across engines and input sizes"""
+
+    def test_compare_to_baseline_flags_regressions(self):
+        """Only throughput drops beyond the tolerance are reported"""
+
+        baseline = {'results': [
+            {'engine': 'PHIRedactor', 'size': KB, 'mb_per_s': 10.0},
+            {'engine': 'SimplePHIRedactor', 'size': KB, 'mb_per_s': 10.0}
+        ]}
+        results = [
+            BenchmarkResult('PHIRedactor', KB, 3, 5, 8.0, 0, 0, 0, 0),
+            BenchmarkResult('SimplePHIRedactor', KB, 3, 5, 5.0, 0, 0, 0, 0),
+            BenchmarkResult('SimplePHIRedactor', MB, 3, 5, 1.0, 0, 0, 0, 0)
+        ]
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.3)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("SimplePHIRedactor 1KB")
+
+    @pytest.mark.asyncio
+    async def test_redaction_throughput_benchmark(self):
+        """Report MB/s, detections/s and latency percentiles per engine"""
+
+        sizes = FULL_SIZES if os.environ.get('NIGHTINGALE_BENCH_FULL') == '1' else QUICK_SIZES
+        generator = SyntheticConsultationGenerator()
+        engines = _engines()
+        results: List[BenchmarkResult] = []
+
+        print(f"\n  {'engine':<18} {'size':>6} {'MB/s':>8} {'det/s':>10} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for size in sizes:
+            text = generator.generate(size).text
+            for engine, redactor in engines.items():
+                result = await run_engine_benchmark(engine, redactor, text, _iterations_for(size))
+                results.append(result)
+
+                print(f"  {engine:<18} {_size_label(size):>6} {result.mb_per_s:>8.2f} "
+                      f"{result.detections_per_s:>10.0f} {result.p50_ms:>9.2f} "
+                      f"{result.p95_ms:>9.2f} {result.p99_ms:>9.2f}")
+
+                assert result.detections > 0, f"{engine} found no PHI in {_size_label(size)} corpus"
+
+        for redactor in engines.values():
+            if hasattr(redactor, 'close'):
+                redactor.close()
+
+        baseline_path = os.environ.get('NIGHTINGALE_BENCH_BASELINE')
+        if not baseline_path:
+            return
+
+        if os.path.exists(baseline_path) and os.environ.get('NIGHTINGALE_BENCH_UPDATE') != '1':
+            with open(baseline_path) as handle:
+                baseline = json.load(handle)
+            tolerance = float(os.environ.get('NIGHTINGALE_BENCH_TOLERANCE', '0.3'))
+            regressions = compare_to_baseline(results, baseline, tolerance)
+            assert not regressions, "Throughput regressions:\n  " + "\n  ".join(regressions)
+        else:
+            with open(baseline_path, 'w') as handle:
+                json.dump({
+                    'version': BASELINE_VERSION,
+                    'seed': generator.seed,
+                    'densities': generator.densities,
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'results': [asdict(result) for result in results]
+                }, handle, indent=2)
+            print(f"  Wrote benchmark baseline to {baseline_path}")
+
+
+if __name__ == "__main__":
+    # Run the benchmark report directly
+    asyncio.run(TestRedactionBenchmark().test_redaction_throughput_benchmark())
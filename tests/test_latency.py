@@ -13,6 +13,7 @@ from typing import List, Dict, Tuple
 from dataclasses import dataclass
 
 from src.redaction.phi_redactor import PHIRedactor
+from src.redaction.simple_phi_redactor import SimplePHIRedactor
 from src.provenance.provenance_engine import ProvenanceEngine
 from src.transcription.audio_processor import AudioProcessor
 
@@ -36,7 +37,9 @@ class TestLatencyProfile:
     @pytest.fixture
     def phi_redactor(self):
         """Initialize PHI redactor for testing"""
-        return PHIRedactor()
+        redactor = PHIRedactor()
+        yield redactor
+        redactor.close()
 
     @pytest.fixture
     def provenance_engine(self):
@@ -354,6 +357,45 @@ class TestLatencyProfile:
         assert max_response_time <= 2000, "Voice response must be under 2s"
 
 
+# Pathological-input benchmark
+@pytest.mark.parametrize("redactor_cls", [PHIRedactor, SimplePHIRedactor])
+def test_pathological_input_scales_linearly(redactor_cls):
+    """Worst-case inputs for the address/email/phone patterns must scale linearly"""
+    
+    redactor = redactor_cls(max_workers=0) if redactor_cls is PHIRedactor else redactor_cls()
+    
+    # Digit/word runs that made the old unbounded patterns backtrack quadratically
+    pathological_units = ["1 ", "a.", "1 a ", "555 ", "MRN "]
+    
+    def worst_time(repeats: int) -> float:
+        timings = []
+        for unit in pathological_units:
+            text = unit * repeats
+            best = min(
+                _time_call(redactor.detect_phi, text) for _ in range(3)
+            )
+            timings.append(best)
+        return max(timings)
+    
+    small, large = 2000, 16000
+    small_time = worst_time(small)
+    large_time = worst_time(large)
+    growth = large_time / max(small_time, 1e-6)
+    
+    print(f"\n  {redactor_cls.__name__}: {small_time * 1000:.2f}ms -> {large_time * 1000:.2f}ms "
+          f"for {large // small}x input ({growth:.1f}x time)")
+    
+    # Linear growth is ~8x here; quadratic backtracking would be ~64x
+    assert growth < 20, f"Redaction time grew {growth:.1f}x for {large // small}x input"
+    assert large_time < 2.0, f"Pathological input took {large_time:.2f}s"
+
+
+def _time_call(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
 # Comprehensive latency report
 @pytest.mark.asyncio
 async def test_generate_latency_report():
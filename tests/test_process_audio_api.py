@@ -0,0 +1,144 @@
+"""
+Test module for resuming the process-audio endpoint
+
+Validates that a retried upload resumes its checkpointed session without
+transcribing again, that raw window transcripts do not outlive redaction,
+and that an upload identical to one still running is refused. Runs against the FastAPI app, so it is skipped when the API
+dependencies (FastAPI, httpx, PyJWT) are missing.
+"""
+
+import pytest
+import asyncio
+import io
+import os
+import sys
+import wave
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("jwt")
+
+from fastapi.testclient import TestClient
+
+# main.py imports its packages relative to src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+import main  # noqa: E402
+
+PATIENT_ID = "patient-audio-test"
+FULL_CONSENT = {"audio_recording": True, "transcription": True, "ai_processing": True}
+REDACTED_TEXT = "[NAME_REDACTED] reports chest pain since Monday"
+
+
+def make_wav(seconds: float = 1.0, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main.settings, "masked_audio_dir", None)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def patient_token():
+    return asyncio.run(main.consent_manager.authenticate_patient(PATIENT_ID, FULL_CONSENT))
+
+
+def job_id_for(audio: bytes) -> str:
+    """Job id the endpoint derives for this upload"""
+    digest = asyncio.run(main.audio_processor.recording_digest(audio, main.settings.secret_key))
+    return main.audio_processor.recording_key(
+        digest, main.settings.secret_key, main.consent_manager._hash_patient_id(PATIENT_ID)
+    )
+
+
+def post_audio(client: TestClient, token: str, audio: bytes):
+    return client.post(
+        "/api/v1/during-care/process-audio",
+        headers={"Authorization": f"Bearer {token}"},
+        files={"audio": ("visit.wav", audio, "audio/wav")},
+        data={"patient_id": PATIENT_ID}
+    )
+
+
+class TestProcessAudioResume:
+    """Test checkpoint resume in the process-audio endpoint"""
+
+    def test_retry_skips_checkpointed_stages(self, client, patient_token, monkeypatch):
+        """Test that a retry reuses the checkpointed redaction and never transcribes again"""
+
+        audio = make_wav()
+        job_id = job_id_for(audio)
+        db = main.db_manager
+        asyncio.run(db.claim_processing_checkpoint(job_id))
+        asyncio.run(db.store_checkpoint_session(job_id, "session-resumed"))
+        asyncio.run(db.store_stage_checkpoint(job_id, "redaction", {
+            "redacted_text": REDACTED_TEXT,
+            "confidence": 0.9,
+            "segment_times": [(0.0, 1.0)],
+            "metadata": {"duration": 1.0},
+            "masked_audio_path": None
+        }))
+        asyncio.run(db.release_processing_checkpoint(job_id))
+
+        async def no_transcription(*args, **kwargs):
+            raise AssertionError("A checkpointed recording must not be transcribed again")
+
+        monkeypatch.setattr(main.audio_processor, "transcribe_audio", no_transcription)
+
+        response = post_audio(client, patient_token, audio)
+
+        assert response.status_code == 200
+        assert response.json()["session_id"] == "session-resumed"
+        assert response.json()["transcription"] == REDACTED_TEXT
+        assert asyncio.run(db.get_processing_checkpoint(job_id)) is None
+
+    def test_raw_windows_are_dropped_after_redaction(self, client, patient_token, monkeypatch):
+        """Test that a failure after redaction leaves no raw window transcript in the checkpoint"""
+
+        audio = make_wav(0.75)
+        job_id = job_id_for(audio)
+        raw_window = {"text": "John Smith reports chest pain since Monday", "timestamps": []}
+
+        async def windowed_transcription(source, checkpoint, digest=None):
+            await checkpoint.save(0, raw_window)
+            return main.TranscriptionResult(
+                text=raw_window["text"], confidence=0.9,
+                timestamps=main.SegmentTable.from_segments([]), metadata={"duration": 0.75}
+            )
+
+        def failing_masker(*args, **kwargs):
+            raise OSError("masked audio volume unavailable")
+
+        monkeypatch.setattr(main.audio_processor, "transcribe_audio", windowed_transcription)
+        monkeypatch.setattr(main.settings, "masked_audio_dir", "/unused")
+        monkeypatch.setattr(main, "store_masked_audio", failing_masker)
+
+        try:
+            response = post_audio(client, patient_token, audio)
+            checkpoint = asyncio.run(main.db_manager.get_processing_checkpoint(job_id))
+        finally:
+            asyncio.run(main.db_manager.clear_processing_checkpoint(job_id))
+
+        assert response.status_code == 500
+        assert checkpoint["chunks"] == {}
+
+    def test_running_job_is_not_resumed(self, client, patient_token):
+        """Test that an upload identical to one still running is refused"""
+
+        audio = make_wav(0.5)
+        job_id = job_id_for(audio)
+        asyncio.run(main.db_manager.claim_processing_checkpoint(job_id))
+
+        try:
+            response = post_audio(client, patient_token, audio)
+        finally:
+            asyncio.run(main.db_manager.clear_processing_checkpoint(job_id))
+
+        assert response.status_code == 409
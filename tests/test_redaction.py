@@ -7,9 +7,21 @@ into LLM systems or logs, maintaining HIPAA compliance.
 
 import pytest
 import asyncio
+import os
+import json
+import re
+import time
+from dataclasses import asdict
 from typing import List, Dict, Tuple
 
 from src.redaction.phi_redactor import PHIRedactor, RedactionResult
+from src.redaction.detection import PHIDetection
+from src.redaction.entity_detector import RuleEntityDetector
+from src.redaction.gazetteer import DATA_DIR, LAST_NAME, build_gazetteer, get_default_gazetteer
+from src.redaction.rule_pack import DEFAULT_RULES, RULE_PACKS, Rule, get_rule_pack
+from src.redaction.simple_phi_redactor import SimplePHIRedactor
+from src.redaction.span_rewriter import rewrite_spans
+from src.redaction.streaming_redactor import StreamingRedactor
 
 
 class TestPHIRedaction:
@@ -18,7 +30,9 @@ class TestPHIRedaction:
     @pytest.fixture
     def phi_redactor(self):
         """Initialize PHI redactor"""
-        return PHIRedactor()
+        redactor = PHIRedactor()
+        yield redactor
+        redactor.close()
 
     @pytest.fixture 
     def synthetic_phi_samples(self):
@@ -132,6 +146,7 @@ class TestPHIRedaction:
         pattern_tests = [
             ("SSN: 123-45-6789", "123-45-6789", "ssn"),
             ("Call me at (555) 123-4567", "(555) 123-4567", "phone"),
+            ("call(555)123-4567", "(555)123-4567", "phone"),
             ("Email: patient@example.com", "patient@example.com", "email"),
             ("DOB: 01/15/1985", "01/15/1985", "date_birth"),
             ("MRN 9876543210", "9876543210", "mrn"),
@@ -150,6 +165,117 @@ class TestPHIRedaction:
             assert expected_phi not in result.redacted_text, \
                 f"{phi_type} not properly redacted"
 
+    def test_scanner_reports_every_pattern(self, phi_redactor):
+        """Test that the scanner reports every pattern type in text order"""
+
+        text = "SSN 123-45-6789, email a.b@example.org, DOB 02/29/1980, MRN 12345678, 12 Elm Street"
+        detections = list(phi_redactor.scanner.scan(text))
+
+        detected_types = [phi_type for phi_type, _, _ in detections]
+        assert detected_types == ["ssn", "email", "date_birth", "mrn", "address"]
+
+        # Offsets must point at the matched text
+        starts = [start for _, start, _ in detections]
+        assert starts == sorted(starts), "Scanner should emit matches left to right"
+        assert text[detections[0][1]:detections[0][2]] == "123-45-6789"
+
+    def test_scanner_keeps_overlapping_matches(self, phi_redactor):
+        """Test that a match inside another pattern's match is still reported"""
+
+        text = "Lives at 555 123 4567 Oak Dr, call 555-123-4567"
+        detections = list(phi_redactor.scanner.scan(text))
+
+        # The phone and the address spanning it both start at position 9
+        assert ("phone", 9, 21) in detections
+        assert ("address", 9, 28) in detections
+        assert ("phone", 35, 47) in detections
+        for name, pattern in phi_redactor.scanner.compiled.items():
+            expected = [(name, m.start(), m.end()) for m in pattern.finditer(text)]
+            assert [d for d in detections if d[0] == name] == expected
+
+    def test_span_rewriter_merges_overlaps_by_priority(self):
+        """Test that overlapping spans merge and the higher-priority token wins"""
+
+        text = "ID 123-45-6789 noted"
+        detections = [
+            PHIDetection("phone", 3, 14, "regex", "[PHONE_REDACTED]", text),
+            PHIDetection("ssn", 3, 14, "regex", "[SSN_REDACTED]", text),
+            PHIDetection("number", 7, 9, "nlp", "[NUMBER_REDACTED]", text),
+        ]
+
+        redacted, offset_map = rewrite_spans(text, detections)
+
+        assert redacted == "ID [SSN_REDACTED] noted"
+        assert offset_map.spans == [(3, 14, 3, 17)]
+        assert offset_map.to_redacted(0) == 0
+        assert offset_map.to_redacted(8) == 3, "Offsets inside a span map to its token"
+        assert offset_map.to_redacted(15) == 18
+        assert offset_map.to_original(18) == 15
+
+    def test_compact_detection_records(self, phi_redactor):
+        """Test slot-based detections: lazy substring, dict-style access, small footprint"""
+
+        import sys
+
+        text = "Patient SSN 123-45-6789, phone 555-123-4567"
+        detections = phi_redactor.detect_phi(text)
+        ssn = detections[0]
+
+        assert not hasattr(ssn, "__dict__")
+        assert ssn["type"] == "ssn" and ssn["original"] == "123-45-6789"
+        assert ssn.get("start_pos") == 12 and ssn.get("unknown") is None
+        assert "123-45-6789" not in repr(ssn), "Reprs must not leak PHI"
+
+        legacy = ssn.to_dict()
+        assert sys.getsizeof(ssn) < sys.getsizeof(legacy) / 2
+
+    def test_results_do_not_retain_source_text(self, phi_redactor):
+        """Test that results, in process or sent between processes, hold no reference to the input"""
+
+        import pickle
+
+        text = "Patient SSN 123-45-6789. " + "Reports mild headache and nausea. " * 3000
+        result = phi_redactor.redact_text(text)
+
+        assert not hasattr(result, "original_text")
+        assert not hasattr(result.detected_phi[0], "__dict__")
+        assert result.detected_phi[0].original == "123-45-6789"
+        assert result.detected_phi[0]["original"] == "123-45-6789"
+        assert all(len(detection._source) == detection.end_pos - detection.start_pos
+                   for detection in result.detected_phi), "Detections must not keep the input"
+
+        pickled = pickle.dumps(result.detected_phi)
+        assert len(pickled) < 1000
+        restored = pickle.loads(pickled)
+        assert [d.to_dict() for d in restored] == [d.to_dict() for d in result.detected_phi]
+
+    @pytest.mark.asyncio
+    async def test_offset_map_returned(self, phi_redactor):
+        """Test that redaction exposes the original-to-redacted offset map"""
+
+        text = "Reach me at j.doe@example.com today"
+        result = await phi_redactor.redact_phi(text)
+
+        assert result.offset_map is not None
+        today = text.index("today")
+        assert result.redacted_text[result.offset_map.to_redacted(today):] == "today"
+
+    @pytest.mark.asyncio
+    async def test_batch_redaction_preserves_order(self, phi_redactor):
+        """Test that batch redaction in the worker pool returns results in input order"""
+
+        texts = [f"Call 555-{i:03d}-4567 about visit {i}" for i in range(40)]
+        results = await phi_redactor.redact_batch(texts)
+
+        assert len(results) == len(texts)
+        for i, result in enumerate(results):
+            assert result.redacted_text == f"Call [PHONE_REDACTED] about visit {i}"
+
+        # Inline mode must produce identical output
+        inline = PHIRedactor(max_workers=0)
+        assert [r.redacted_text for r in await inline.redact_batch(texts)] == \
+            [r.redacted_text for r in results]
+
     @pytest.mark.asyncio
     async def test_nlp_entity_detection(self, phi_redactor):
         """Test NLP-based entity detection for PHI"""
@@ -169,6 +295,53 @@ class TestPHIRedaction:
                 assert len(result.detected_phi) > 0, \
                     f"No PHI detected in text with entities: {text}"
 
+    def test_names_are_detected_once(self, phi_redactor):
+        """Test that the rule entity backend does not repeat the gazetteer's name hits"""
+
+        text = "Patient Sarah Johnson was seen at Lakeside Medical Center"
+        detections = phi_redactor.detect_phi(text)
+
+        names = [(d.start_pos, d.end_pos) for d in detections if d.type == "person_name"]
+        assert names == [(8, 21)]
+        assert [d.method for d in detections if d.type == "person_name"] == ["dictionary"]
+
+    def test_rule_entities_are_ones_the_policy_redacts(self, phi_redactor):
+        """Test that the rule entity backend only reports labels that can pass _is_likely_phi"""
+
+        text = "Seen at Lakeside Medical Center on March 3, 2024, member number 98765432"
+        entities = RuleEntityDetector().detect(text)
+
+        assert [(entity.label, text[entity.start:entity.end]) for entity in entities] == \
+            [("CARDINAL", "98765432")]
+        assert [d.method for d in phi_redactor.detect_phi(text) if d.method == "nlp"] == ["nlp"]
+
+    def test_entity_detection_is_batched(self):
+        """Test that batch redaction makes one detector call for all texts"""
+
+        redactor = PHIRedactor(max_workers=0)
+        batch_sizes = []
+        detect_batch = redactor.entity_detector.detect_batch
+
+        def counting_detect_batch(texts):
+            batch_sizes.append(len(texts))
+            return detect_batch(texts)
+
+        redactor.entity_detector.detect_batch = counting_detect_batch
+
+        texts = [
+            "Member number 98765432 on file",
+            "Insurance ID ABC123456789 verified",
+            "Patient reports mild nausea",
+        ]
+        results = redactor.redact_texts(texts)
+
+        assert batch_sizes == [3]
+        assert results[0].redacted_text == "Member number [NUMBER_REDACTED] on file"
+        assert results[1].redacted_text == "Insurance ID [NUMBER_REDACTED] verified"
+        assert results[2].redacted_text == texts[2]
+        assert [r.redacted_text for r in results] == \
+            [redactor.redact_text(text).redacted_text for text in texts]
+
     @pytest.mark.asyncio
     async def test_redaction_validation(self, phi_redactor):
         """Test redaction validation functionality"""
@@ -180,6 +353,24 @@ class TestPHIRedaction:
         is_valid = await phi_redactor.validate_redaction(original_text, result.redacted_text)
         assert is_valid, "Redaction validation should pass for properly redacted text"
 
+    def test_contains_phi_fast_path(self, phi_redactor):
+        """Test the verify-only scan used as a redaction post-condition"""
+
+        assert phi_redactor.contains_phi("Reached patient at 555-123-4567")
+        assert phi_redactor.contains_phi("Seen today by Dr. Nguyen")
+        assert not phi_redactor.contains_phi("Patient reports chronic headache, pain level 7/10")
+        assert not phi_redactor.contains_phi("Patient [NAME_REDACTED], SSN [SSN_REDACTED], reports pain.")
+
+    def test_post_condition_fails_closed(self):
+        """Test that redaction rejects output when a detector misses PHI"""
+
+        redactor = PHIRedactor(max_workers=0)
+        redactor._detect_patterns = lambda text: []
+
+        result = redactor.redact_text("SSN 123-45-6789 on file")
+        assert result.redacted_text == "[TEXT_REDACTION_FAILED]"
+        assert result.confidence_score == 0.0
+
     @pytest.mark.asyncio
     async def test_multiple_phi_types_in_single_text(self, phi_redactor):
         """Test handling multiple types of PHI in one text block"""
@@ -232,6 +423,572 @@ class TestPHIRedaction:
             assert len(result.detected_phi) >= expected_min_phi
 
 
+class TestGazetteer:
+    """Test dictionary-based name matching and the medical allowlist"""
+
+    def test_names_and_allowlist(self):
+        """Test that known names are found and medical phrases are not"""
+
+        gazetteer = get_default_gazetteer()
+        text = "Dr. Patel reviewed blood pressure with Maria Elena Garcia and Parkinson disease notes"
+        names = [text[start:end] for start, end in gazetteer.find_names(text)]
+
+        assert names == ["Dr. Patel", "Maria Elena Garcia"]
+        assert gazetteer.is_allowlisted("Blood Pressure")
+        assert gazetteer.is_allowlisted("Parkinson disease")
+        assert not gazetteer.is_allowlisted("Maria Garcia")
+
+    def test_spoken_titles_and_lone_first_names(self):
+        """Test that a surname after a spoken title and a lone mid-sentence first name are found"""
+
+        gazetteer = get_default_gazetteer()
+        cases = [
+            ("Doctor Smith will call back", ["Doctor Smith"]),
+            ("Seen by Nurse Okafor today", ["Nurse Okafor"]),
+            ("Blood Pressure John", ["John"]),
+            ("Spoke with Maria about her results", ["Maria"]),
+            # Sentence-initial capitals and titles before lowercase words are not names
+            ("John reports pain. Mary is here", []),
+            ("The doctor will see you. Doctor said rest", []),
+        ]
+
+        for text, expected in cases:
+            assert [text[start:end] for start, end in gazetteer.find_names(text)] == expected, text
+
+    def test_name_after_numbers_or_tags_is_not_sentence_initial(self):
+        """Test that digits, symbols or redaction tags before a name do not make it open a sentence"""
+
+        gazetteer = get_default_gazetteer()
+        cases = [
+            ("01/15/1985 Mary reports pain", ["Mary"]),
+            ("555-123-4567 Mary will call back", ["Mary"]),
+            ("[PHONE_REDACTED] Mary will call back", ["Mary"]),
+            ("Mary reports pain", []),
+            ("Seen today. Mary reports pain", []),
+        ]
+
+        for text, expected in cases:
+            assert [text[start:end] for start, end in gazetteer.find_names(text)] == expected, text
+            assert gazetteer.has_name(text) == bool(expected), text
+
+    def test_redacted_output_does_not_fail_closed(self):
+        """Test that names following structured PHI are redacted instead of failing the post-condition"""
+
+        import random
+
+        redactor = PHIRedactor(max_workers=0)
+        vocabulary = ["Mary", "John", "Smith", "Elena", "Dr.", "Doctor", "patient", "reports", "pain",
+                      "Blood", "Pressure", "01/15/1985", "555-123-4567", "123-45-6789", "MRN: 1234567",
+                      "the", "and", ".", ",", "headache", "seen", "today", "Nurse", "Okafor", "Maria"]
+        rng = random.Random(5)
+        texts = ["01/15/1985 Mary reports pain", "Callback 555-123-4567 Mary will confirm"]
+        texts += [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 25))) for _ in range(2000)]
+
+        for text in texts:
+            assert redactor.redact_text(text).redacted_text != "[TEXT_REDACTION_FAILED]", text
+        assert "Mary" not in redactor.redact_text(texts[1]).redacted_text
+
+    def test_has_name_agrees_with_find_names(self):
+        """Test that the verify-only check matches find_names on random and known texts"""
+
+        import random
+
+        gazetteer = get_default_gazetteer()
+        vocabulary = ["Mary", "St", "Oak", "Dr", "Dr.", "Mr", "+1", "Clinic", "Headache", "pressure",
+                      "Blood", "Pressure", "John", "Smith", "Doctor", "Elena", "Garcia", "the", ".", "said",
+                      "doctor", "nurse", "dr.", "Brown", "Patel"]
+        rng = random.Random(11)
+        texts = ["Mary St Oak Dr. Clinic Headache pressure Dr Mr +1 Mr Headache"]
+        texts += [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 40))) for _ in range(2000)]
+        # Long gaps between a candidate and the word completing the name
+        texts += ["Mary" + " " * gap + "Smith" for gap in (1, 2, 3, 4, 70)]
+        # Spoken titles are lowercase
+        texts += ["I saw doctor Smith today", "call nurse Brown", "Seen by dr. Patel"]
+
+        for text in texts:
+            assert gazetteer.has_name(text) == bool(gazetteer.find_names(text)), text
+
+    def test_match_cost_independent_of_dictionary_size(self):
+        """Test that scanning cost does not grow with the number of entries"""
+
+        import time
+
+        text = "Patient Emily Chen reports chronic pain and fatigue. " * 2000
+        small = build_gazetteer(DATA_DIR)
+        large = build_gazetteer(DATA_DIR)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        for i in range(50000):
+            large.add("Zz" + "".join(letters[(i // 26 ** k) % 26] for k in range(4)), LAST_NAME)
+
+        def best_time(gazetteer):
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                gazetteer.find_names(text)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        assert large.entries >= small.entries + 50000
+        assert small.find_names(text) == large.find_names(text)
+        assert best_time(large) < best_time(small) * 2 + 0.01
+
+
+class TestStreamingRedaction:
+    """Test incremental redaction of chunked transcripts"""
+
+    @pytest.fixture
+    def inline_redactor(self):
+        """PHI redactor without a worker pool"""
+        return PHIRedactor(max_workers=0)
+
+    def test_phi_split_across_chunks(self, inline_redactor):
+        """Test that PHI spoken across a chunk boundary is still redacted"""
+
+        streaming = StreamingRedactor(inline_redactor, window=64)
+        chunks = [
+            "Patient reports dizziness since Monday. Best callback number is 555-",
+            "123-4567 and the email on file is jane.",
+            "doe@example.com for the portal. " + "Vitals were stable today. " * 6,
+        ]
+
+        output = "".join(streaming.feed(chunk) for chunk in chunks) + streaming.flush()
+
+        assert "555" not in output and "4567" not in output
+        assert "jane" not in output and "example.com" not in output
+        assert output.count("[PHONE_REDACTED]") == 1
+        assert output.count("[EMAIL_REDACTED]") == 1
+        assert output == inline_redactor.redact_text("".join(chunks)).redacted_text
+
+    def test_chunking_does_not_change_redaction(self, inline_redactor):
+        """Test that names at the start of the carry-over window are redacted at any step size"""
+
+        import random
+
+        rng = random.Random(3)
+        sentences = [
+            f"Please call {rng.choice(['Mary', 'John', 'Maria', 'Sarah'])} tomorrow about the results."
+            if rng.random() < 0.4 else "Vitals were stable and the patient reports mild headache."
+            for _ in range(400)
+        ]
+        text = " ".join(sentences) + " "
+        words = re.findall(r'\S+\s*', text)
+        expected = inline_redactor.redact_text(text).redacted_text
+
+        for step in (3, 5, 8, 13, 21):
+            streaming = StreamingRedactor(inline_redactor)
+            output = "".join(
+                streaming.feed("".join(words[i:i + step])) for i in range(0, len(words), step)
+            ) + streaming.flush()
+
+            assert output == expected, f"step {step}"
+
+    def test_chunking_does_not_split_name_runs(self, inline_redactor):
+        """Test that runs of names longer than the left context are grouped as in the whole text"""
+
+        import random
+
+        rng = random.Random(5)
+        names = ['Mary', 'John', 'Maria', 'Sarah', 'Smith', 'Brown', 'Patel', 'Garcia', 'Dr.']
+        sentences = [
+            "Present were " + " ".join(rng.choice(names) for _ in range(rng.randint(4, 16)))
+            + " and the patient."
+            for _ in range(150)
+        ]
+        text = " ".join(sentences) + " "
+        words = re.findall(r'\S+\s*', text)
+        expected = inline_redactor.redact_text(text).redacted_text
+
+        for step in (1, 2, 3, 5, 8):
+            streaming = StreamingRedactor(inline_redactor)
+            output = "".join(
+                streaming.feed("".join(words[i:i + step])) for i in range(0, len(words), step)
+            ) + streaming.flush()
+
+            assert output == expected, f"step {step}"
+
+    @pytest.mark.asyncio
+    async def test_pooled_streaming_matches_inline(self, inline_redactor):
+        """Test that the async variants, scanning in the worker pool, emit what feed() does"""
+
+        chunks = ["Dr. Smith reviewed the chart. Callback is 555-", "123-4567 and MRN 8675309 "] * 8
+        inline = StreamingRedactor(inline_redactor, window=64)
+        expected = "".join(inline.feed(chunk) for chunk in chunks) + inline.flush()
+
+        redactor = PHIRedactor(max_workers=1)
+        try:
+            pooled = StreamingRedactor(redactor, window=64)
+            output = ""
+            for chunk in chunks:
+                output += (await pooled.feed_async(chunk))[0]
+            preview = await pooled.preview_async()
+            output += (await pooled.flush_async())[0]
+        finally:
+            redactor.close()
+
+        assert output == expected
+        assert preview and expected.endswith(preview)
+
+    def test_finalized_text_is_not_rescanned(self, inline_redactor):
+        """Test that each scan covers only the carry-over window plus new text"""
+
+        scanned_lengths = []
+        detect_phi = inline_redactor.detect_phi
+
+        def recording_detect(text):
+            scanned_lengths.append(len(text))
+            return detect_phi(text)
+
+        inline_redactor.detect_phi = recording_detect
+        streaming = StreamingRedactor(inline_redactor, window=64)
+
+        chunk = "Follow-up in two weeks, SSN 123-45-6789 verified by front desk. "
+        emitted = [streaming.feed(chunk) for _ in range(200)]
+
+        assert max(scanned_lengths) <= 2 * 64 + len(chunk)
+        assert streaming.pending_chars <= 2 * 64
+        assert any(emitted), "Finalized text should be emitted incrementally"
+        assert "123-45-6789" not in "".join(emitted)
+
+    def test_preview_is_redacted_and_leaves_state(self, inline_redactor):
+        """Test that interim previews are redacted without finalizing anything"""
+
+        streaming = StreamingRedactor(inline_redactor, window=64)
+        streaming.feed("Patient states her number is 555-123-4567 ")
+
+        preview = streaming.preview("and she lives at 12")
+
+        assert "[PHONE_REDACTED]" in preview and "4567" not in preview
+        assert not preview.endswith("12"), "A word still being spoken is withheld"
+        assert streaming.finalized_chars == 0
+        assert streaming.flush() == inline_redactor.redact_text(
+            "Patient states her number is 555-123-4567 ").redacted_text
+
+    def test_concurrent_calls_on_one_session(self, inline_redactor):
+        """Test that feeds and previews from several threads lose or repeat no text"""
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        streaming = StreamingRedactor(inline_redactor, window=64)
+        words = [f"note{i} " for i in range(400)]
+
+        def feed(word):
+            streaming.preview("interim ")
+            return streaming.feed(word)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            output = "".join(pool.map(feed, words)) + streaming.flush()
+
+        assert sorted(output.split()) == sorted(word.strip() for word in words)
+        assert streaming.finalized_chars == sum(len(word) for word in words)
+
+    def test_held_text_keeps_its_timestamps(self, inline_redactor):
+        """Test that timestamps are released with the finalized text they belong to"""
+
+        streaming = StreamingRedactor(inline_redactor, window=64)
+        emitted = []
+        for i in range(12):
+            text = f"Vitals were stable at check number {i}."
+            segment = {"start_time": float(i), "end_time": i + 1.0, "text": text}
+            emitted.append(streaming.feed_timed(text + " ", [segment]))
+        emitted.append(streaming.flush_timed())
+
+        released = [segment for _, segments in emitted for segment in segments]
+        assert [segment["start_time"] for segment in released] == [float(i) for i in range(12)]
+        for text, segments in emitted:
+            assert len(segments) == text.count("Vitals")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_feed_keeps_its_text(self, inline_redactor):
+        """Test that a feed cancelled mid-scan leaves its text for the flush, and sync feeds are refused meanwhile"""
+
+        started = asyncio.Event()
+
+        async def stalled_window(*args):
+            started.set()
+            await asyncio.sleep(60)
+
+        text = "Best callback number is 555-123-4567 for the patient today. "
+        streaming = StreamingRedactor(inline_redactor, window=16)
+        inline_redactor.redact_stream_window = stalled_window
+        task = asyncio.create_task(streaming.feed_async(text))
+        await started.wait()
+
+        with pytest.raises(RuntimeError):
+            streaming.feed("more text ")
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        del inline_redactor.redact_stream_window
+        flushed, _ = await streaming.flush_async()
+        assert flushed == inline_redactor.redact_text(text).redacted_text
+        assert streaming.finalized_chars == len(text)
+
+
+
+class TestRulePacks:
+    """Test shared, hot-swappable rule packs"""
+
+    INSURANCE_RULE = Rule('insurance_id', 'insurance_id', '[INSURANCE_REDACTED]', 85, r'\bINS-\d{6}\b')
+
+    @pytest.fixture
+    def restore_packs(self):
+        """Put the built-in packs back after a swap"""
+        yield
+        for name, rules in DEFAULT_RULES.items():
+            RULE_PACKS.swap(name, rules)
+
+    def test_profiles_share_one_compiled_pack(self):
+        """Test that redactor instances hold no per-instance pattern state"""
+
+        first, second = PHIRedactor(max_workers=0), PHIRedactor(max_workers=0)
+        simple = SimplePHIRedactor()
+
+        assert first.rule_pack is second.rule_pack is get_rule_pack("phi")
+        assert first.scanner.compiled is second.scanner.compiled
+        assert simple.rule_pack is get_rule_pack("simple")
+        assert "phi_patterns" not in vars(first) and "replacements" not in vars(simple)
+
+        # Both profiles share the structured rules declared once
+        assert first.rule_pack.replacements["ssn"] == simple.rule_pack.replacements["ssn"]
+
+    @pytest.mark.asyncio
+    async def test_hot_swap_applies_without_restart(self, restore_packs):
+        """Test that a swapped pack reaches inline redactors and recycled workers"""
+
+        text = "Insurance INS-123456 on file"
+        pooled = PHIRedactor(max_workers=1)
+        inline = PHIRedactor(max_workers=0)
+        try:
+            before = await pooled.redact_phi(text)
+            assert "[INSURANCE_REDACTED]" not in before.redacted_text
+
+            RULE_PACKS.swap("phi", DEFAULT_RULES["phi"] + (self.INSURANCE_RULE,))
+
+            assert "[INSURANCE_REDACTED]" in inline.redact_text(text).redacted_text
+            after = await pooled.redact_phi(text)
+            assert after.redacted_text == "Insurance [INSURANCE_REDACTED] on file"
+        finally:
+            pooled.close()
+
+    def test_invalid_pack_file_changes_nothing(self, tmp_path, restore_packs):
+        """Test that packs from a file are compiled before any is swapped in"""
+
+        good = RULE_PACKS.dump("phi") + [asdict(self.INSURANCE_RULE)]
+        bad = [{"name": "broken", "phi_type": "ssn", "replacement": "[X]", "priority": 1, "pattern": "(unclosed"}]
+        path = tmp_path / "packs.json"
+        path.write_text(json.dumps({"phi": good, "simple": bad}))
+
+        original = get_rule_pack("phi")
+        with pytest.raises(re.error):
+            RULE_PACKS.load_file(str(path))
+        assert get_rule_pack("phi") is original
+
+        path.write_text(json.dumps({"phi": good}))
+        assert RULE_PACKS.load_file(str(path)) == ["phi"]
+        assert get_rule_pack("phi").replacement_for("insurance_id") == "[INSURANCE_REDACTED]"
+
+
+
+class TestRedactionMetrics:
+    """Test per-rule instrumentation and worker aggregation"""
+
+    TEXTS = [
+        "SSN 123-45-6789 and phone 555-123-4567",
+        "Email jane.doe@example.com, SSN 987-65-4321",
+    ]
+
+    @pytest.mark.asyncio
+    async def test_rule_counters_and_latency(self, caplog):
+        """Test hits, bytes scanned, match time and the latency histogram"""
+
+        redactor = PHIRedactor(max_workers=0)
+
+        with caplog.at_level("INFO", logger="src.redaction"):
+            for text in self.TEXTS:
+                await redactor.redact_phi(text)
+
+        snapshot = redactor.metrics_snapshot()
+        assert snapshot["texts"] == 2 and snapshot["failures"] == 0
+        assert snapshot["rules"]["ssn"]["hits"] == 2
+        assert snapshot["rules"]["email"]["hits"] == 1
+        assert snapshot["rules"]["mrn"]["hits"] == 0
+        assert snapshot["rules"]["ssn"]["bytes_scanned"] == sum(len(text) for text in self.TEXTS)
+        assert snapshot["rules"]["ssn"]["match_seconds"] > 0
+        assert snapshot["stages"]["patterns"]["calls"] == 2
+        assert snapshot["latency_ms"]["count"] == 2
+        assert "123-45-6789" not in json.dumps(snapshot), "Metrics must not carry PHI"
+
+        # Per-call audit lines are debug-only
+        assert not [r for r in caplog.records if "redaction completed" in r.getMessage()]
+
+    @pytest.mark.asyncio
+    async def test_worker_metrics_are_aggregated(self):
+        """Test that counters from pool workers are merged into the parent snapshot"""
+
+        redactor = PHIRedactor(max_workers=2)
+        try:
+            await redactor.redact_batch(self.TEXTS * 4)
+            await redactor.redact_phi(self.TEXTS[0])
+        finally:
+            redactor.close()
+
+        snapshot = redactor.metrics_snapshot()
+        assert snapshot["texts"] == 9
+        assert snapshot["rules"]["ssn"]["hits"] == 9
+        assert snapshot["latency_ms"]["count"] == 1, "Only redact_phi calls feed the histogram"
+
+    def test_scan_times_each_rule_once(self, monkeypatch):
+        """Test that rule timings come from the scan itself, not a second pass"""
+
+        redactor = PHIRedactor(max_workers=0)
+        text = "SSN 123-45-6789. " + "Reports mild headache and nausea. " * 50
+        calls = []
+        scanner = redactor.scanner
+        for name, pattern in scanner.compiled.items():
+            monkeypatch.setitem(scanner.compiled, name, _CountingPattern(pattern, name, calls))
+
+        redactor.detect_phi(text)
+
+        assert sorted(calls) == sorted(scanner.patterns)
+        snapshot = redactor.metrics_snapshot()
+        assert snapshot["scans"] == 1
+        assert set(snapshot["rules"]) >= set(scanner.patterns)
+        assert snapshot["rules"]["ssn"]["bytes_scanned"] == len(text)
+        assert snapshot["rules"]["ssn"]["us_per_kb"] is not None
+
+
+class _CountingPattern:
+    """Compiled pattern wrapper recording each finditer call"""
+
+    def __init__(self, pattern, name, calls):
+        self.pattern, self.name, self.calls = pattern, name, calls
+
+    def finditer(self, text):
+        self.calls.append(self.name)
+        return self.pattern.finditer(text)
+
+    def search(self, text):
+        return self.pattern.search(text)
+
+
+class _StalledRedactor:
+    """Worker-side redactor that never finishes (simulates a pathological text)"""
+
+    metrics = None
+
+    def redact_text(self, text):
+        time.sleep(60)
+
+    def detect_phi(self, text):
+        time.sleep(60)
+
+
+class _SelectivelyStalledRedactor:
+    """Worker-side redactor that stalls only on texts marked 'stall'"""
+
+    metrics = None
+
+    def redact_text(self, text):
+        time.sleep(60 if "stall" in text else 0.8)
+        return os.getpid()
+
+
+class TestRedactionDeadline:
+    """Test that phi_redaction_timeout is enforced on pooled redaction"""
+
+    @pytest.mark.asyncio
+    async def test_overrunning_job_fails_closed_and_is_killed(self):
+        """Test the deadline path: failed result, timeout metric, fresh workers afterwards"""
+
+        redactor = PHIRedactor(max_workers=1, timeout=0.5)
+        try:
+            await redactor.pool.warm_up()
+            redactor.pool.recycle(_StalledRedactor)
+
+            start = time.perf_counter()
+            result = await redactor.redact_phi("SSN 123-45-6789")
+            elapsed = time.perf_counter() - start
+
+            assert result.redacted_text == "[TEXT_REDACTION_FAILED]"
+            assert result.confidence_score == 0.0
+            assert elapsed < 5, f"Deadline not enforced: {elapsed:.1f}s"
+            assert redactor.metrics_snapshot()["timeouts"] == 1
+
+            # The stuck worker was killed and replaced; swap the real redactor back in
+            redactor.pool.recycle(redactor._worker_factory(redactor.rule_pack))
+            result = await redactor.redact_phi("SSN 123-45-6789")
+            assert result.redacted_text == "SSN [SSN_REDACTED]"
+        finally:
+            redactor.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_job_survives_another_timeout(self):
+        """Test that only the overrunning job's worker is killed"""
+
+        redactor = PHIRedactor(max_workers=2, timeout=1.0)
+        try:
+            redactor.pool.recycle(_SelectivelyStalledRedactor)
+
+            async def concurrent_job():
+                # Still running on the other worker when the stalled job hits its deadline
+                await asyncio.sleep(0.5)
+                return await redactor.redact_phi("routine note")
+
+            stalled, survivor = await asyncio.gather(redactor.redact_phi("stall here"), concurrent_job())
+
+            assert stalled.redacted_text == "[TEXT_REDACTION_FAILED]"
+            assert redactor.metrics_snapshot()["timeouts"] == 1
+            assert redactor.metrics_snapshot()["failures"] == 1
+            # The survivor's worker kept running and serves the next job too
+            workers = {await redactor.redact_phi("next note") for _ in range(2)}
+            assert survivor in workers and len(workers) == 2
+        finally:
+            redactor.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_keeps_its_worker(self):
+        """Test that cancelling a caller (e.g. a disconnect) does not kill the worker"""
+
+        redactor = PHIRedactor(max_workers=1, timeout=5.0)
+        try:
+            redactor.pool.recycle(_SelectivelyStalledRedactor)
+            worker = await redactor.redact_phi("first note")
+
+            task = asyncio.create_task(redactor.redact_phi("cancelled note"))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert await redactor.redact_phi("next note") == worker
+            assert redactor.metrics_snapshot()["timeouts"] == 0
+        finally:
+            redactor.close()
+
+    @pytest.mark.asyncio
+    async def test_streaming_scan_fails_closed(self):
+        """Test that live redaction runs under the deadline and rejects the overrunning text"""
+
+        redactor = PHIRedactor(max_workers=1, timeout=0.5)
+        try:
+            await redactor.pool.warm_up()
+            redactor.pool.recycle(_StalledRedactor)
+            streaming = StreamingRedactor(redactor, window=32)
+
+            start = time.perf_counter()
+            fed, _ = await streaming.feed_async("Callback number is 555-123-4567 today. " * 3)
+            flushed, _ = await streaming.flush_async()
+            elapsed = time.perf_counter() - start
+
+            assert fed == flushed == "[TEXT_REDACTION_FAILED]"
+            assert streaming.pending_chars == 0
+            assert elapsed < 5, f"Deadline not enforced: {elapsed:.1f}s"
+            assert redactor.metrics_snapshot()["timeouts"] == 2
+        finally:
+            redactor.close()
+
+
 # Stress test
 @pytest.mark.asyncio
 async def test_phi_redaction_performance():
@@ -0,0 +1,110 @@
+"""
+Test module for the compact segment table
+
+Validates compatibility with List[Dict] timestamps, time remapping, and
+the memory and pickle size saved on word-level timestamps.
+"""
+
+import pytest
+import pickle
+import tracemalloc
+
+import numpy as np
+
+from src.transcription.segment_table import SegmentTable
+from src.transcription.vad import TimeMap
+
+SEGMENTS = [
+    {"start_time": 0.0, "end_time": 5.2, "text": "Patient reports headache"},
+    {"start_time": 5.3, "end_time": 10.1, "text": "with pain level 7 out of 10"},
+    {"start_time": 10.2, "end_time": 15.8, "text": "Duration approximately three days"},
+]
+
+
+def make_words(count: int):
+    """Word-level timestamps for a long consult, each text its own string as decoded by ASR"""
+    words = ["patient", "reports", "mild", "headache", "since", "monday", "no", "fever"]
+    return [
+        {"start_time": n * 0.4, "end_time": n * 0.4 + 0.35, "text": "".join(list(words[n % len(words)]))}
+        for n in range(count)
+    ]
+
+
+class TestSegmentTable:
+    """Test the dict-compatible sequence view"""
+
+    def test_behaves_like_list_of_dicts(self):
+        """Test indexing, iteration and dict access match the list it was built from"""
+
+        table = SegmentTable.from_segments(SEGMENTS)
+
+        assert len(table) == 3
+        assert table == SEGMENTS
+        assert list(table) == SEGMENTS
+        assert table[-1] == SEGMENTS[-1]
+        assert table[1].get("start_time", 0.0) == 5.3
+        assert {**table[0], "text": "x"}["end_time"] == 5.2
+        assert max(s["end_time"] for s in table) == 15.8
+        assert table[1:] == SEGMENTS[1:]
+        assert not SegmentTable.from_segments([])
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_is_read_only(self):
+        """Test that edits to returned rows or the arrays do not change the table"""
+
+        table = SegmentTable.from_segments(SEGMENTS)
+        table[0]["text"] = "changed"
+
+        assert table[0]["text"] == "Patient reports headache"
+        with pytest.raises(ValueError):
+            table.starts[0] = 1.0
+        with pytest.raises(TypeError):
+            table[0] = SEGMENTS[1]
+
+    def test_shift_and_remap(self):
+        """Test that vectorized time moves match the per-dict versions"""
+
+        table = SegmentTable.from_segments(SEGMENTS)
+        time_map = TimeMap([(2.0, 9.0), (12.0, 30.0)])
+
+        assert table.shifted(4.0)[2]["start_time"] == pytest.approx(14.2)
+        remapped = time_map.remap_segments(table)
+        for row, expected in zip(remapped, time_map.remap_segments(SEGMENTS)):
+            assert row["start_time"] == pytest.approx(expected["start_time"])
+            assert row["end_time"] == pytest.approx(expected["end_time"])
+
+    def test_pickle_and_columns_round_trip(self):
+        """Test that the table survives pickling and the JSON column form"""
+
+        table = SegmentTable.from_segments(make_words(100))
+
+        assert pickle.loads(pickle.dumps(table)) == table
+        assert SegmentTable.from_columns(table.to_columns()) == table
+
+
+class TestCompactness:
+    """Test the memory and serialization savings"""
+
+    def test_word_level_memory_and_pickle_size(self):
+        """Test that an hour of word timestamps is several times smaller as a table"""
+
+        count = 9000  # about an hour of speech
+
+        tracemalloc.start()
+        words = make_words(count)
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        table = SegmentTable.from_segments(make_words(count))
+        table_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        dict_pickle = len(pickle.dumps(words))
+        table_pickle = len(pickle.dumps(table))
+        print(f"\n  {count} words: {dict_bytes / 1024:.0f} KiB as dicts, {table_bytes / 1024:.0f} KiB as a table; "
+              f"pickled {dict_pickle / 1024:.0f} KiB vs {table_pickle / 1024:.0f} KiB")
+        assert table_bytes * 4 < dict_bytes
+        assert table_pickle < 0.75 * dict_pickle
+        assert np.array_equal(table.starts, [w["start_time"] for w in words])
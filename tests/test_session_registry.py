@@ -0,0 +1,157 @@
+"""
+Test module for the streaming session registry
+
+Validates ring buffer wrap-around, session end transitions, idle and
+LRU eviction, and that memory stays flat over a long simulated uptime.
+"""
+
+import pytest
+
+from src.transcription.audio_processor import AudioProcessor
+from src.transcription.session_registry import (
+    SESSION_ABORTED, SESSION_EVICTED, SESSION_FINALIZED, SessionRegistry
+)
+from src.transcription.stream_segmenter import RingBuffer, StreamSegmenter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_segmenter() -> StreamSegmenter:
+    return StreamSegmenter(16000, segment_seconds=2.0, max_buffer_seconds=4.0)
+
+
+class TestRingBuffer:
+    """Test the fixed-capacity buffer"""
+
+    def test_wraps_around(self):
+        """Test that data written across the end is read back in order"""
+
+        ring = RingBuffer(8)
+        ring.write(b"abcdef")
+        ring.consume(4)
+        ring.write(b"ghijkl")
+
+        assert len(ring) == 8
+        assert ring.peek(8) == b"efghijkl"
+        assert ring.peek(3, offset=4) == b"ijk"
+
+    def test_overflow_is_refused(self):
+        """Test that a write larger than the free space fails without changing the buffer"""
+
+        ring = RingBuffer(8)
+        ring.write(b"abcde")
+        with pytest.raises(ValueError):
+            ring.write(b"fghi")
+        assert ring.peek(8) == b"abcde"
+
+
+class TestSessionRegistry:
+    """Test session lifecycle and eviction"""
+
+    def test_finalize_keeps_audio_and_abort_discards_it(self):
+        """Test that only a finalized session can still flush its audio"""
+
+        registry = SessionRegistry()
+        for session_id in ("clean", "dropped"):
+            registry.create(session_id, make_segmenter()).segmenter.feed(b"\x01\x00" * 8000)
+
+        finalized = registry.finalize("clean")
+        aborted = registry.abort("dropped")
+
+        assert finalized.status == SESSION_FINALIZED
+        assert finalized.segmenter.flush().end_time == pytest.approx(0.5)
+        assert aborted.status == SESSION_ABORTED
+        assert aborted.segmenter.flush() is None
+        assert len(registry) == 0 and registry.memory_bytes == 0
+
+    def test_idle_sessions_are_evicted(self):
+        """Test that sessions without activity past the timeout are dropped"""
+
+        clock = FakeClock()
+        registry = SessionRegistry(idle_timeout=60.0, clock=clock)
+        registry.create("idle", make_segmenter()).attachments["redactor"] = object()
+        registry.create("busy", make_segmenter())
+
+        clock.now = 50.0
+        registry.get("busy")
+        clock.now = 100.0
+
+        with pytest.raises(KeyError):
+            registry.get("idle")
+        assert registry.get("busy").status == "active"
+        assert registry.counters[SESSION_EVICTED] == 1
+
+    def test_close_hook_sees_attachments(self):
+        """Test that the close hook runs before a session's attachments are dropped"""
+
+        closed = []
+        clock = FakeClock()
+        registry = SessionRegistry(idle_timeout=60.0, clock=clock,
+                                   on_close=lambda s: closed.append((s.session_id, s.status, dict(s.attachments))))
+        registry.create("idle", make_segmenter()).attachments["redactor"] = "held"
+        registry.create("dropped", make_segmenter()).attachments["redactor"] = "held"
+
+        registry.abort("dropped")
+        clock.now = 100.0
+        registry.evict_idle()
+
+        assert closed == [("dropped", SESSION_ABORTED, {"redactor": "held"}),
+                          ("idle", SESSION_EVICTED, {"redactor": "held"})]
+
+    def test_least_recently_used_is_evicted_when_full(self):
+        """Test that max_sessions bounds the registry"""
+
+        registry = SessionRegistry(max_sessions=2)
+        first = registry.create("a", make_segmenter())
+        registry.create("b", make_segmenter())
+        registry.get("a")
+        registry.create("c", make_segmenter())
+
+        assert "b" not in registry
+        assert "a" in registry and "c" in registry
+        assert first.status == "active"
+
+    def test_memory_is_flat_over_days(self):
+        """Test that sessions never finalized do not accumulate"""
+
+        clock = FakeClock()
+        registry = SessionRegistry(max_sessions=32, idle_timeout=900.0, clock=clock)
+        peak = 0
+        # A week of consults every 2 minutes, one in four never explicitly ended
+        for n in range(7 * 24 * 30):
+            clock.now = n * 120.0
+            session = registry.create(f"consult-{n}", make_segmenter())
+            session.segmenter.feed(b"\x00\x00" * 16000)
+            if n % 4:
+                registry.finalize(f"consult-{n}")
+            peak = max(peak, registry.memory_bytes)
+
+        per_session = make_segmenter().memory_bytes
+        print(f"\n  Peak buffered-audio memory: {peak / 1024:.0f} KiB over {n + 1} sessions")
+        assert len(registry) <= 3
+        assert peak <= 3 * per_session
+
+
+class TestProcessorSessions:
+    """Test streaming sessions through the audio processor"""
+
+    @pytest.mark.asyncio
+    async def test_evicted_session_is_restarted_for_chunks(self):
+        """Test that a chunk for an evicted session starts a fresh one"""
+
+        processor = AudioProcessor(max_sessions=1)
+        await processor.start_streaming_session("first")
+        (await processor.streaming_session("first")).attachments["redactor"] = "state"
+        await processor.start_streaming_session("second")
+
+        with pytest.raises(KeyError):
+            processor.feed_stream("first", b"\x00\x00")
+        session = await processor.streaming_session("first")
+        assert session.attachments == {}
+        assert processor.health_check()["streaming_sessions"]["active"] == 1
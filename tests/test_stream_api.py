@@ -0,0 +1,110 @@
+"""
+Test module for the during-care streaming WebSocket endpoint
+
+Validates that connections are authenticated from the Authorization header
+or the bearer subprotocol (never the query string), and that streamed
+audio yields finalized transcript frames, then the end/flush/final
+sequence. Runs against the FastAPI app, so it is skipped when the API
+dependencies (FastAPI, httpx, PyJWT) are missing.
+"""
+
+import pytest
+import asyncio
+import json
+import math
+import os
+import struct
+import sys
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("jwt")
+
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+# main.py imports its packages relative to src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+import main  # noqa: E402
+
+PATIENT_ID = "patient-stream-test"
+FULL_CONSENT = {"audio_recording": True, "transcription": True, "ai_processing": True}
+SAMPLE_RATE = 16000
+
+
+def make_pcm(seconds: float) -> bytes:
+    """16-bit mono PCM of a 440 Hz tone"""
+    count = int(seconds * SAMPLE_RATE)
+    return struct.pack(f"<{count}h", *(int(8000 * math.sin(2 * math.pi * 440 * n / SAMPLE_RATE))
+                                       for n in range(count)))
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def patient_token():
+    return asyncio.run(main.consent_manager.authenticate_patient(PATIENT_ID, FULL_CONSENT))
+
+
+def stream_url(session_id: str) -> str:
+    return f"/api/v1/during-care/stream/{session_id}?sample_rate={SAMPLE_RATE}"
+
+
+class TestStreamAuthentication:
+    """Test connection authentication"""
+
+    def test_missing_or_query_token_is_rejected(self, client, patient_token):
+        """Test that a connection without a header or subprotocol token is refused"""
+
+        for url in (stream_url("stream-anonymous"), stream_url("stream-query") + f"&token={patient_token}"):
+            with pytest.raises(WebSocketDisconnect) as refused:
+                with client.websocket_connect(url) as websocket:
+                    websocket.receive_json()
+            assert refused.value.code == 1008
+
+    def test_invalid_subprotocol_token_is_rejected(self, client):
+        """Test that a forged token offered as a subprotocol is refused"""
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect(stream_url("stream-forged"),
+                                          subprotocols=[main.STREAM_AUTH_SUBPROTOCOL, "not-a-jwt"]) as websocket:
+                websocket.receive_json()
+
+
+class TestStreamTranscription:
+    """Test the streamed transcript"""
+
+    def test_transcript_frames_then_final(self, client, patient_token):
+        """Test that audio yields transcript frames and end flushes the rest before final"""
+
+        session_id = "stream-flow"
+        with client.websocket_connect(stream_url(session_id),
+                                      subprotocols=[main.STREAM_AUTH_SUBPROTOCOL, patient_token]) as websocket:
+            assert websocket.accepted_subprotocol == main.STREAM_AUTH_SUBPROTOCOL
+            ready = websocket.receive_json()
+            assert ready["type"] == "ready" and ready["session_id"] == session_id
+
+            audio = make_pcm(main.settings.stream_segment_seconds * 2.5)
+            step = SAMPLE_RATE  # half a second of 16-bit samples
+            for offset in range(0, len(audio), step):
+                websocket.send_bytes(audio[offset:offset + step])
+            websocket.send_text(json.dumps({"type": "end"}))
+
+            messages = []
+            while not messages or messages[-1]["type"] != "final":
+                messages.append(websocket.receive_json())
+
+        finals = [message for message in messages if message["type"] == "transcript"]
+        assert all(message["type"] in ("partial", "transcript", "final") for message in messages)
+        assert len(finals) >= 2 and all(message["is_final"] for message in finals)
+        assert [message["sequence"] for message in finals] == sorted(message["sequence"] for message in finals)
+        assert "Audio chunk transcribed" in "".join(message["text"] for message in finals)
+        # The flush after end leaves nothing pending
+        assert finals[-1]["pending"] == ""
+        assert messages[-1] == {"type": "final", "session_id": session_id}
+        # The finished session is not kept in the registry
+        with pytest.raises(KeyError):
+            main.audio_processor.sessions.get(session_id)
@@ -0,0 +1,137 @@
+"""
+Test module for live audio segmentation
+
+Validates that streamed PCM is cut into contiguous segments near the
+target length, that cuts move to quiet points, and that segment
+transcripts are placed on the stream timeline.
+"""
+
+import pytest
+import io
+import wave
+
+import numpy as np
+
+from src.transcription.audio_processor import AudioProcessor
+from src.transcription.stream_segmenter import StreamSegmenter
+
+SAMPLE_RATE = 16000
+
+
+def make_pcm(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    """Mono 16-bit samples of a steady tone"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t) * 32767).astype('<i2')
+
+
+def read_segment(audio: bytes) -> np.ndarray:
+    with wave.open(io.BytesIO(audio), 'rb') as reader:
+        return np.frombuffer(reader.readframes(reader.getnframes()), dtype='<i2')
+
+
+class TestStreamSegmenter:
+    """Test cutting streamed PCM into segments"""
+
+    def test_segments_cover_the_stream(self):
+        """Test that segments are contiguous and reassemble the stream exactly"""
+
+        samples = make_pcm(7.3)
+        segmenter = StreamSegmenter(SAMPLE_RATE, segment_seconds=2.0)
+
+        segments = []
+        data = samples.tobytes()
+        for start in range(0, len(data), 3200):  # 100ms messages
+            segments.extend(segmenter.feed(data[start:start + 3200]))
+        segments.append(segmenter.flush())
+
+        assert [s.sequence for s in segments] == list(range(len(segments)))
+        assert segments[0].start_time == 0.0
+        for previous, current in zip(segments, segments[1:]):
+            assert current.start_time == previous.end_time
+        assert segments[-1].end_time == pytest.approx(7.3)
+        assert all(1.5 <= s.end_time - s.start_time <= 2.0 for s in segments[:-1])
+        assert np.array_equal(np.concatenate([read_segment(s.audio) for s in segments]), samples)
+
+    def test_cut_moves_to_quiet_point(self):
+        """Test that a pause shortly before the target length is where the segment ends"""
+
+        samples = np.concatenate([make_pcm(1.7), make_pcm(0.05, amplitude=0.0), make_pcm(1.0)])
+        segmenter = StreamSegmenter(SAMPLE_RATE, segment_seconds=2.0, search_seconds=0.5)
+
+        segment = segmenter.feed(samples.tobytes())[0]
+
+        assert 1.7 <= segment.end_time <= 1.75
+
+    def test_pending_audio_is_not_consumed(self):
+        """Test that interim audio carries the next sequence number and stays buffered"""
+
+        segmenter = StreamSegmenter(SAMPLE_RATE, segment_seconds=2.0)
+        first = segmenter.feed(make_pcm(2.6).tobytes())[0]
+
+        pending = segmenter.pending()
+        assert pending.sequence == first.sequence + 1
+        assert pending.start_time == first.end_time
+        assert pending.end_time == pytest.approx(2.6)
+        assert segmenter.flush().audio == pending.audio
+
+    def test_flush_empty_stream(self):
+        """Test that flushing with nothing buffered emits no segment"""
+
+        segmenter = StreamSegmenter(SAMPLE_RATE)
+        assert segmenter.feed(make_pcm(0.5).tobytes()) == []
+        assert segmenter.flush().end_time == pytest.approx(0.5)
+        assert segmenter.flush() is None
+
+    def test_buffer_is_bounded(self):
+        """Test that a single oversized message is refused"""
+
+        segmenter = StreamSegmenter(SAMPLE_RATE, max_buffer_seconds=5.0)
+        with pytest.raises(ValueError):
+            segmenter.feed(make_pcm(6.0).tobytes())
+
+
+class TestStreamingSession:
+    """Test streaming sessions on the audio processor"""
+
+    @pytest.mark.asyncio
+    async def test_segment_timestamps_are_on_stream_timeline(self):
+        """Test that a later segment's transcript is offset by its start time"""
+
+        processor = AudioProcessor(stream_segment_seconds=2.0)
+        session = await processor.start_streaming_session("stream-1")
+        assert session["sample_rate"] == SAMPLE_RATE
+
+        segments = processor.feed_stream("stream-1", make_pcm(4.5).tobytes())
+        final = processor.finish_streaming_session("stream-1")
+        assert "stream-1" not in processor.sessions
+
+        result = await processor.transcribe_segment(segments[1], {"session_id": "stream-1"})
+        assert result.text
+        assert result.timestamps[0]["start_time"] == pytest.approx(segments[1].start_time)
+        assert final.end_time == pytest.approx(4.5)
+
+    @pytest.mark.asyncio
+    async def test_first_words_arrive_before_the_first_segment(self):
+        """Test that an interim result is available after a fraction of a segment"""
+
+        processor = AudioProcessor(stream_segment_seconds=2.0)
+        await processor.start_streaming_session("stream-2")
+        data = make_pcm(3.0).tobytes()
+
+        first_partial = first_final = None
+        for start in range(0, len(data), 3200):  # 100ms messages
+            segments = processor.feed_stream("stream-2", data[start:start + 3200])
+            pending = processor.pending_segment("stream-2")
+            if first_partial is None and pending is not None and pending.end_time >= 0.5:
+                first_partial = await processor.transcribe_segment(pending, {"is_final": False})
+                first_partial_at = pending.end_time
+            if first_final is None and segments:
+                first_final = await processor.transcribe_segment(segments[0], {})
+                first_final_at = segments[0].end_time
+
+        print(f"\n  First words after {first_partial_at:.1f}s of audio (interim), "
+              f"{first_final_at:.1f}s (final segment), 30s (chunk upload)")
+        assert first_partial.metadata["is_final"] is False
+        assert first_final.metadata["is_final"] is True
+        assert first_partial.text
+        assert first_partial_at * 3 <= first_final_at
@@ -0,0 +1,176 @@
+"""
+Test module for the transcription cache
+
+Validates that repeated uploads are served from the cache without ASR,
+that keys depend on the secret and the configuration, that entries are
+encrypted on disk, and that tampered, expired and surplus entries are
+dropped.
+"""
+
+import pytest
+import base64
+import io
+import json
+import os
+import time
+import wave
+
+from src.transcription import transcription_cache
+from src.transcription.asr_backend import ASR_BACKENDS, StubASRBackend
+from src.transcription.audio_ingest import SpooledAudio
+from src.transcription.audio_processor import AudioProcessor
+from src.transcription.transcription_cache import TranscriptionCache
+
+
+def make_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    """16-bit mono WAV of a quiet ramp (distinct content per length)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(bytes(range(256)) * int(seconds * sample_rate * 2 / 256))
+    return buffer.getvalue()
+
+
+class CountingASRBackend(StubASRBackend):
+    """Stub backend counting the transcriptions it runs"""
+
+    name = "counting"
+    calls = 0
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, audio, language=None, context=None):
+        type(self).calls += 1
+        time.sleep(0.2)
+        return super().transcribe(audio, language, context)
+
+
+@pytest.fixture
+def counting_backend():
+    ASR_BACKENDS[CountingASRBackend.name] = CountingASRBackend
+    CountingASRBackend.calls = 0
+    yield CountingASRBackend.name
+    ASR_BACKENDS.pop(CountingASRBackend.name, None)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptionCache(str(tmp_path / "cache"), "test-secret")
+
+
+class TestTranscriptionCache:
+    """Test the on-disk store"""
+
+    def test_keys_depend_on_secret_config_and_audio(self, cache, tmp_path):
+        """Test that keys change with any input and match for bytes and a file"""
+
+        audio = make_wav(5.0)
+        path = tmp_path / "upload.wav"
+        path.write_bytes(audio)
+
+        key = cache.key(audio, "config-a")
+        assert cache.key(str(path), "config-a") == key
+        assert cache.key(audio, "config-b") != key
+        assert cache.key(audio + b"\x00", "config-a") != key
+        assert TranscriptionCache(str(tmp_path / "other"), "other-secret").key(audio, "config-a") != key
+
+    def test_entries_are_encrypted(self, cache):
+        """Test that no transcript text reaches the disk and entries need the secret"""
+
+        cache.put("abc", {"text": "John Smith reports chest pain"})
+        with open(os.path.join(cache.directory, "abc.json"), "rb") as handle:
+            entry = handle.read()
+
+        assert b"John" not in entry and b"chest" not in entry
+        assert cache.get("abc") == {"text": "John Smith reports chest pain"}
+        assert TranscriptionCache(cache.directory, "other-secret").get("abc") is None
+
+    def test_tampered_entry_is_rejected(self, cache):
+        """Test that an entry edited on disk is not served"""
+
+        cache.put("abc", {"text": "original"})
+        path = os.path.join(cache.directory, "abc.json")
+        with open(path) as handle:
+            entry = json.load(handle)
+        ciphertext = bytearray(base64.b64decode(entry["ciphertext"]))
+        ciphertext[0] ^= 1
+        entry["ciphertext"] = base64.b64encode(bytes(ciphertext)).decode()
+        with open(path, "w") as handle:
+            json.dump(entry, handle)
+
+        assert cache.get("abc") is None
+        assert not os.path.exists(path)
+
+    def test_entry_is_bound_to_its_key(self, cache):
+        """Test that an entry copied under another key is not served"""
+
+        cache.put("abc", {"text": "original"})
+        os.replace(os.path.join(cache.directory, "abc.json"), os.path.join(cache.directory, "xyz.json"))
+
+        assert cache.get("xyz") is None
+
+    def test_expired_entry_is_a_miss(self, cache, monkeypatch):
+        """Test that entries are not served past their TTL"""
+
+        cache.put("abc", {"text": "old"})
+        now = time.time()
+        monkeypatch.setattr(transcription_cache.time, "time", lambda: now + cache.ttl + 1)
+
+        assert cache.get("abc") is None
+
+    def test_least_recently_used_are_evicted_over_size(self, tmp_path):
+        """Test that the directory is trimmed to max_bytes, oldest use first"""
+
+        cache = TranscriptionCache(str(tmp_path / "cache"), "test-secret")
+        now = time.time()
+        for n, key in enumerate(["a", "b", "c"]):
+            cache.put(key, {"text": "x" * 300})
+            os.utime(os.path.join(cache.directory, f"{key}.json"), (now - 100 + n, now - 100 + n))
+        # Room for three entries
+        cache.max_bytes = int(3.5 * os.path.getsize(os.path.join(cache.directory, "a.json")))
+        cache.get("a")
+        cache.put("d", {"text": "x" * 300})
+
+        assert cache.get("b") is None
+        assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+
+
+class TestCachedTranscription:
+    """Test caching in front of the audio processor"""
+
+    @pytest.mark.asyncio
+    async def test_retried_upload_skips_asr(self, cache, counting_backend):
+        """Test that a duplicate upload returns the cached result in milliseconds"""
+
+        processor = AudioProcessor(backend=counting_backend, cache=cache)
+        audio = make_wav(10.0)
+
+        start = time.perf_counter()
+        first = await processor.transcribe_audio(audio)
+        miss = time.perf_counter() - start
+
+        spooled = SpooledAudio(max_memory=1024)
+        spooled.write(audio)
+        start = time.perf_counter()
+        retry = await processor.transcribe_audio(spooled)
+        hit = time.perf_counter() - start
+        spooled.close()
+
+        print(f"\n  First upload {miss * 1000:.0f}ms, retried upload {hit * 1000:.1f}ms")
+        assert CountingASRBackend.calls == 1
+        assert retry.metadata.pop("cached") is True
+        assert retry == first
+        assert hit < 0.05
+
+    @pytest.mark.asyncio
+    async def test_config_change_is_a_miss(self, cache, counting_backend):
+        """Test that a different transcription configuration does not reuse entries"""
+
+        audio = make_wav(5.0)
+        await AudioProcessor(backend=counting_backend, language="en", cache=cache).transcribe_audio(audio)
+        await AudioProcessor(backend=counting_backend, language="es", cache=cache).transcribe_audio(audio)
+
+        assert CountingASRBackend.calls == 2
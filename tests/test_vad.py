@@ -0,0 +1,227 @@
+"""
+Test module for voice activity detection
+
+Validates speech detection on synthetic recordings, silence compaction,
+mapping of timestamps back to the original audio and the ASR time saved.
+"""
+
+import pytest
+import io
+import wave
+
+import numpy as np
+
+from src.transcription.asr_backend import ASR_BACKENDS, ASRBackend
+from src.transcription.audio_masker import spans_to_time_ranges
+from src.transcription.audio_processor import AudioProcessor
+from src.transcription.segment_table import SegmentTable
+from src.transcription.vad import TimeMap, VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+
+def make_recording(layout, noise_level: float = 0.001, seed: int = 7) -> bytes:
+    """
+    16-bit mono WAV from [(seconds, is_speech), ...]
+
+    Speech is a modulated 220Hz voice-like tone; silence is faint background noise.
+    """
+    rng = np.random.default_rng(seed)
+    parts = []
+    for seconds, is_speech in layout:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        signal = rng.normal(0, noise_level, len(t))
+        if is_speech:
+            signal += 0.3 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+        parts.append(signal)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        writer.writeframes((np.concatenate(parts) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+class BurstASRBackend(ASRBackend):
+    """Backend emitting one segment per loud burst it hears, recording audio received"""
+
+    name = "burst"
+    seconds_heard = []
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, audio, language=None, context=None):
+        with wave.open(io.BytesIO(audio), 'rb') as reader:
+            samples = np.frombuffer(reader.readframes(reader.getnframes()), dtype='<i2')
+        self.seconds_heard.append(len(samples) / SAMPLE_RATE)
+
+        # 10ms loudness grid
+        loud = np.abs(samples[:len(samples) // 160 * 160].reshape(-1, 160)).max(axis=1) > 1000
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], loud.astype(np.int8), [0]))))
+        segments = [
+            {"start_time": start / 100, "end_time": end / 100, "text": f"burst{n}"}
+            for n, (start, end) in enumerate(zip(edges[::2], edges[1::2]))
+        ]
+        return {"text": " ".join(s["text"] for s in segments), "confidence": 0.9,
+                "segments": segments, "language": "en", "duration": len(samples) / SAMPLE_RATE}
+
+
+class SpanningASRBackend(ASRBackend):
+    """Backend returning one segment over all the audio it hears, its text spoken at an even pace"""
+
+    name = "spanning"
+    # Spoken at an even pace, the phone number falls in the second burst
+    text = "Patient visit notes are here ok, call 555-123-4567 back"
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, audio, language=None, context=None):
+        with wave.open(io.BytesIO(audio), 'rb') as reader:
+            duration = reader.getnframes() / reader.getframerate()
+        return {"text": self.text, "confidence": 0.9, "language": "en", "duration": duration,
+                "segments": [{"start_time": 0.0, "end_time": duration, "text": self.text}]}
+
+
+@pytest.fixture
+def spanning_backend():
+    ASR_BACKENDS[SpanningASRBackend.name] = SpanningASRBackend
+    yield SpanningASRBackend.name
+    ASR_BACKENDS.pop(SpanningASRBackend.name, None)
+
+
+@pytest.fixture
+def burst_backend():
+    ASR_BACKENDS[BurstASRBackend.name] = BurstASRBackend
+    BurstASRBackend.seconds_heard = []
+    yield BurstASRBackend.name
+    ASR_BACKENDS.pop(BurstASRBackend.name, None)
+
+
+LAYOUT = [(3.0, False), (4.0, True), (5.0, False), (2.0, True), (6.0, False)]
+
+
+class TestVoiceActivityDetector:
+    """Test speech region detection"""
+
+    def test_detects_speech_regions(self):
+        """Test that detected regions match the planted speech within the padding"""
+
+        vad = VoiceActivityDetector(padding=0.2)
+        regions, sample_rate, total_frames = vad.detect(make_recording(LAYOUT))
+
+        assert total_frames == 20 * SAMPLE_RATE
+        assert len(regions) == 2
+        for (start, end), (expected_start, expected_end) in zip(regions, [(3.0, 7.0), (12.0, 14.0)]):
+            assert abs(start / sample_rate - (expected_start - 0.2)) < 0.1
+            assert abs(end / sample_rate - (expected_end + 0.2)) < 0.1
+
+    def test_short_pauses_are_kept(self):
+        """Test that pauses shorter than min_silence are not cut"""
+
+        vad = VoiceActivityDetector(padding=0.1, min_silence=0.6)
+        regions, _, _ = vad.detect(make_recording([(1.0, False), (2.0, True), (0.5, False), (2.0, True), (1.0, False)]))
+
+        assert len(regions) == 1
+
+    def test_padding_keeps_one_flag_per_frame(self):
+        """Test that padding a clip shorter than the padding window keeps the mask length"""
+
+        vad = VoiceActivityDetector(padding=0.2, min_silence=0.6)
+        energy_db = np.array([-80.0, -80.0, -10.0, -80.0, -80.0, -80.0])
+        zcr = np.zeros(len(energy_db))
+
+        assert vad.speech_mask(energy_db, zcr, 5.0).tolist() == [False, True, True, True, False, False]
+        assert vad.speech_mask(energy_db, zcr, 50.0).tolist() == [True] * len(energy_db)
+
+        regions, _, total_frames = vad.detect(make_recording([(0.05, False), (0.1, True), (0.05, False)]))
+        assert regions == [(0, total_frames)]
+
+    def test_mostly_speech_is_left_alone(self):
+        """Test that audio that is nearly all speech is not compacted"""
+
+        vad = VoiceActivityDetector()
+        assert vad.compact(make_recording([(0.2, False), (10.0, True)])) is None
+
+    def test_time_map_round_trip(self):
+        """Test that compacted times map back into the kept regions"""
+
+        time_map = TimeMap([(2.8, 7.2), (11.8, 14.2)])
+
+        assert time_map.compact_duration == pytest.approx(6.8)
+        assert time_map.to_original(0.0) == pytest.approx(2.8)
+        assert time_map.to_original(4.4) == pytest.approx(11.8)
+        assert time_map.to_original(5.0) == pytest.approx(12.4)
+        assert time_map.to_original(99.0) == pytest.approx(14.2)
+
+
+    def test_segments_spanning_a_cut_are_split(self):
+        """Test that a segment crossing removed silence becomes one piece per kept region"""
+
+        time_map = TimeMap([(0.0, 3.0), (13.0, 16.0)])
+        segments = [{"start_time": 1.0, "end_time": 5.0, "text": "abcdefgh"}]
+        expected = [(1.0, 3.0, "abcd"), (13.0, 15.0, "efgh")]
+
+        for remapped in (time_map.remap_segments(segments),
+                         time_map.remap_segments(SegmentTable.from_segments(segments))):
+            assert [(s["start_time"], s["end_time"], s["text"]) for s in remapped] == expected
+
+
+class TestVADStage:
+    """Test the VAD stage in front of ASR"""
+
+    @pytest.mark.asyncio
+    async def test_timestamps_refer_to_original_audio(self, burst_backend):
+        """Test that segments transcribed from compacted audio land at their original times"""
+
+        processor = AudioProcessor(backend=burst_backend, vad=VoiceActivityDetector())
+        result = await processor.transcribe_audio(make_recording(LAYOUT))
+
+        assert [s["text"] for s in result.timestamps] == ["burst0", "burst1"]
+        for segment, (start, end) in zip(result.timestamps, [(3.0, 7.0), (12.0, 14.0)]):
+            assert segment["start_time"] == pytest.approx(start, abs=0.05)
+            assert segment["end_time"] == pytest.approx(end, abs=0.05)
+        assert result.metadata["duration"] == pytest.approx(20.0)
+
+    @pytest.mark.asyncio
+    async def test_asr_time_scales_with_speech(self, burst_backend):
+        """Test that only the speech (plus padding) is sent to ASR"""
+
+        processor = AudioProcessor(backend=burst_backend, vad=VoiceActivityDetector(padding=0.2))
+        result = await processor.transcribe_audio(make_recording(LAYOUT))
+
+        heard = sum(BurstASRBackend.seconds_heard)
+        print(f"\n  ASR received {heard:.1f}s of a 20.0s recording with 6.0s of speech")
+        assert heard < 7.5
+        assert result.metadata["silence_removed_seconds"] == pytest.approx(20.0 - heard, abs=0.05)
+
+    @pytest.mark.asyncio
+    async def test_masked_span_lands_in_original_speech(self, spanning_backend):
+        """Test that PHI in a segment spanning removed silence is masked where it was spoken"""
+
+        processor = AudioProcessor(backend=spanning_backend, vad=VoiceActivityDetector(padding=0.2))
+        result = await processor.transcribe_audio(make_recording(LAYOUT))
+        phone_start = result.text.index("555")
+        phone_end = phone_start + len("555-123-4567")
+
+        ranges = spans_to_time_ranges(result.text, result.timestamps, [(phone_start, phone_end)], padding=0.0)
+
+        # Inside the second burst (12-14s, kept as about 11.8-14.2s), not in the silence before it
+        assert len(ranges) == 1
+        start, end = ranges[0]
+        assert 11.7 < start < end < 14.3
+        assert end - start < 2.0
+
+    @pytest.mark.asyncio
+    async def test_silence_only_skips_asr(self, burst_backend):
+        """Test that a silent recording never reaches the ASR backend"""
+
+        processor = AudioProcessor(backend=burst_backend, vad=VoiceActivityDetector())
+        result = await processor.transcribe_audio(make_recording([(10.0, False)]))
+
+        assert result.text == ""
+        assert BurstASRBackend.seconds_heard == []
+        assert result.metadata["duration"] == pytest.approx(10.0)